@@ -0,0 +1,88 @@
+"""
+Benchmark: incremental OLSR topology update cost vs. network size
+
+For random geometric topologies of increasing size, compares the average
+cost of applying a single-link TC change incrementally against a full
+shortest-path recomputation plus full MPR selection.
+
+Usage: python benchmarks/bench_olsr_topology.py [--sizes 50 100 200 400 800]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from models import HelloMessage, LSAMessage
+from olsr_topology import OLSRTopology
+
+
+def random_topology(num_nodes: int, rng: random.Random, avg_degree: float = 8.0):
+    """Unit-disk graph in a unit square with the requested average degree"""
+    radius = math.sqrt(avg_degree / (math.pi * num_nodes))
+    pos = [(rng.random(), rng.random()) for _ in range(num_nodes)]
+    neighbors = {f"host[{i}]": set() for i in range(num_nodes)}
+    for i in range(num_nodes):
+        for j in range(i + 1, num_nodes):
+            if math.dist(pos[i], pos[j]) <= radius:
+                neighbors[f"host[{i}]"].add(f"host[{j}]")
+                neighbors[f"host[{j}]"].add(f"host[{i}]")
+    return neighbors
+
+
+def build_engine(neighbors):
+    owner = "host[0]"
+    engine = OLSRTopology(owner)
+    for node, nbrs in neighbors.items():
+        if node != owner:
+            engine.process_lsa(LSAMessage(node, 1, set(nbrs), 0.0))
+    for node in neighbors[owner]:
+        engine.process_hello(HelloMessage(node, set(neighbors[node]), 0.0))
+    return engine
+
+
+def run(num_nodes: int, updates: int = 200, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    neighbors = random_topology(num_nodes, rng)
+    engine = build_engine(neighbors)
+    nodes = [n for n in neighbors if n != engine.owner]
+    seq = {n: 1 for n in nodes}
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        node = rng.choice(nodes)
+        other = rng.choice(nodes)
+        advertised = set(engine.tc_neighbors.get(node, set()))
+        advertised ^= {other} - {node}
+        seq[node] += 1
+        engine.process_lsa(LSAMessage(node, seq[node], advertised, 0.0))
+    incremental = (time.perf_counter() - start) / updates
+
+    start = time.perf_counter()
+    rounds = max(updates // 20, 1)
+    for _ in range(rounds):
+        engine.recompute_tree()
+        engine.select_mprs()
+    full = (time.perf_counter() - start) / rounds
+
+    return {"nodes": num_nodes, "incremental_us": incremental * 1e6, "full_us": full * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 400, 800])
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'Nodes':>7}{'Incremental (us)':>20}{'Full (us)':>14}{'Speedup':>10}")
+    for size in args.sizes:
+        r = run(size, args.updates)
+        print(f"{r['nodes']:>7}{r['incremental_us']:>20.1f}{r['full_us']:>14.1f}"
+              f"{r['full_us'] / r['incremental_us']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Benchmarks for the OmnetManager hot paths, using the fake opp_run stand-in
+
+Measures create_config, run_simulation overhead (fake opp_run that does no
+work), parse_results throughput on synthetic .sca files, .sca size and
+parse time of a 500-node run per recording profile,
+find_available_networks on a synthetic NED tree and end-to-end sweep
+throughput at several concurrency levels (one OmnetManager and working
+directory per worker). POSIX only: fake_opp_run.py is executed directly.
+
+The suite runs --rounds times; every metric is the best round (lowest
+time, highest throughput) and its noise the interquartile range over the
+rounds. Every run is appended to benchmarks/results/bench_omnet_manager.jsonl;
+the newest result is compared against the previous entry (or --baseline
+FILE) and the script exits with status 1 if a metric got worse by more
+than --threshold, by more than its MIN_DELTA and by more than NOISE_FACTOR
+times the noise of either run. Sub-millisecond timings easily double between two runs of the
+same commit, so the relative threshold alone would fail on noise.
+
+Usage: python benchmarks/bench_omnet_manager.py [--quick] [--rounds N] [--baseline FILE] [--threshold 0.2]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+
+from fake_opp_run import write_sca  # noqa: E402  (benchmarks/ is on sys.path as the script dir)
+from omnet_manager import OmnetManager  # noqa: E402
+
+FAKE_OPP_RUN = os.path.join(BENCH_DIR, "fake_opp_run.py")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results", "bench_omnet_manager.jsonl")
+# Smallest change that counts as a regression, by metric suffix (longest match wins)
+MIN_DELTA = {"_ms": 1.0, "_mb_per_s": 10.0, "_runs_per_s": 0.5}
+NOISE_FACTOR = 3.0  # IQRs a change must exceed (Tukey's far-out fence); runs on a busy host vary a lot
+
+
+def higher_is_better(metric: str) -> bool:
+    """Throughputs (*_per_s) should go up, times (*_ms) down"""
+    return metric.endswith("_per_s")
+
+
+def scalar_metrics(results: dict) -> dict:
+    return {k: v for k, v in results.items() if isinstance(v, (int, float)) and k.endswith(("_ms", "_per_s"))}
+
+
+def min_delta(metric: str) -> float:
+    suffixes = [suffix for suffix in MIN_DELTA if metric.endswith(suffix)]
+    return MIN_DELTA[max(suffixes, key=len)] if suffixes else 0.0
+
+
+def combine_rounds(rounds: list):
+    """(best value of every metric, its interquartile range over the rounds); other values from the last round"""
+    results, noise = dict(rounds[-1]), {}
+    for metric in scalar_metrics(rounds[-1]):
+        values = [r[metric] for r in rounds]
+        results[metric] = max(values) if higher_is_better(metric) else min(values)
+        if len(values) > 1:
+            quartiles = statistics.quantiles(values, n=4, method="inclusive")
+            noise[metric] = quartiles[2] - quartiles[0]
+    return results, noise
+
+
+def make_workdir(root: str, name: str) -> str:
+    path = os.path.join(root, name)
+    os.makedirs(os.path.join(path, "src", "INET"), exist_ok=True)
+    return path
+
+
+def make_manager(workdir: str) -> OmnetManager:
+    return OmnetManager(FAKE_OPP_RUN, workdir)
+
+
+def bench_create_config(root: str, repeat: int) -> float:
+    manager = make_manager(make_workdir(root, "create_config"))
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        manager.create_config(protocol=("AODV", "OLSR", "DSR")[i % 3], num_nodes=50, seed=i,
+                              num_traffic_pairs=10)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def bench_run_overhead(root: str, repeat: int) -> dict:
+    """Wall time of run_simulation with a zero-work opp_run, plus its phase split"""
+    manager = make_manager(make_workdir(root, "overhead"))
+    os.environ.update(FAKE_OPP_SETUP="0", FAKE_OPP_SLEEP="0")
+    samples = []
+    for seed in range(repeat):
+        manager.create_config(seed=seed)
+        start = time.perf_counter()
+        if not manager.run_simulation():
+            raise RuntimeError("fake opp_run failed")
+        samples.append(time.perf_counter() - start)
+        manager.parse_results()
+    phases = {phase: round(summary['mean'] * 1000, 3)
+              for phase, summary in manager.recorder.phase_summary().items()}
+    return {"run_overhead_ms": statistics.median(samples) * 1000, "run_phases_ms": phases}
+
+
+def bench_parse(root: str, sizes_kb, repeat: int) -> dict:
+    manager = make_manager(make_workdir(root, "parse"))
+    throughput = {}
+    for size_kb in sizes_kb:
+        for old in os.listdir(manager.results_dir):
+            os.remove(os.path.join(manager.results_dir, old))
+        path = os.path.join(manager.results_dir, "General-#0.sca")
+        size = write_sca(path, num_hosts=50, min_bytes=size_kb * 1024)
+        best = min(_timed(manager.parse_results) for _ in range(repeat))
+        throughput[f"{size_kb}KiB"] = size / best / 1e6
+    return {"parse_mb_per_s": statistics.median(throughput.values()), "parse_by_size_mb_per_s": throughput}
+
+
+def bench_recording(root: str, repeat: int, num_nodes: int = 500) -> dict:
+    """.sca size and parse time of one large run per recording profile"""
+    manager = make_manager(make_workdir(root, "recording"))
+    os.environ.update(FAKE_OPP_SETUP="0", FAKE_OPP_SLEEP="0")
+    results = {}
+    for profile in ("full", "results"):
+        manager.create_config(num_nodes=num_nodes, num_traffic_pairs=num_nodes // 10, recording=profile)
+        if not manager.run_simulation():
+            raise RuntimeError("fake opp_run failed")
+        stats = manager.parse_results()
+        results[f"sca_{profile}_kb"] = os.path.getsize(stats["result_file"]) / 1024
+        best = min(_timed(manager.parse_results) for _ in range(repeat))
+        results[f"parse_{num_nodes}_{profile}_ms"] = best * 1000
+    return {f"recording_{key}" if key.startswith("sca") else key: value for key, value in results.items()}
+
+
+def make_ned_tree(workdir: str, dirs: int, files_per_dir: int):
+    examples = os.path.join(workdir, "examples")
+    for d in range(dirs):
+        directory = os.path.join(examples, f"example{d}", "sub")
+        os.makedirs(directory, exist_ok=True)
+        for f in range(files_per_dir):
+            body = "\n".join(f"    submodules:\n        host{i}: StandardHost;" for i in range(20))
+            kind = "network" if f % 3 == 0 else "module"
+            with open(os.path.join(directory, f"Net{d}_{f}.ned"), "w", encoding="utf-8") as out:
+                out.write(f"package inet.examples.example{d}.sub;\n\nimport inet.node.inet.StandardHost;\n\n"
+                          f"{kind} Net{d}_{f}\n{{\n    parameters:\n        int n = 10;\n{body}\n}}\n")
+        with open(os.path.join(directory, "omnetpp.ini"), "w", encoding="utf-8") as out:
+            out.write("[General]\nnetwork = Net\n")
+
+
+def bench_find_networks(root: str, dirs: int, files_per_dir: int, repeat: int) -> dict:
+    workdir = make_workdir(root, "ned")
+    make_ned_tree(workdir, dirs, files_per_dir)
+    manager = make_manager(workdir)
+    best = min(_timed(manager.find_available_networks) for _ in range(repeat))
+    return {"find_networks_ms": best * 1000, "ned_files": dirs * files_per_dir}
+
+
+def bench_sweep(root: str, runs: int, concurrency_levels, sim_sleep: float) -> dict:
+    """Runs per second for `runs` simulations spread over N independent workers"""
+    os.environ.update(FAKE_OPP_SETUP="0.02", FAKE_OPP_SLEEP=str(sim_sleep))
+    throughput = {}
+    for workers in concurrency_levels:
+        managers = [make_manager(make_workdir(root, f"sweep{workers}_{w}")) for w in range(workers)]
+
+        def worker(index):
+            manager = managers[index]
+            for seed in range(index, runs, workers):
+                manager.create_config(seed=seed)
+                if not manager.run_simulation():
+                    raise RuntimeError("fake opp_run failed")
+                manager.parse_results()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(worker, range(workers)))
+        throughput[str(workers)] = runs / (time.perf_counter() - start)
+    return {"sweep_runs_per_s": throughput}
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(quick: bool = False) -> dict:
+    repeat = 3 if quick else 10
+    root = tempfile.mkdtemp(prefix="manet_bench_")
+    try:
+        results = {"create_config_ms": bench_create_config(root, repeat * 10)}
+        results.update(bench_run_overhead(root, repeat))
+        results.update(bench_parse(root, [64, 1024] if quick else [64, 1024, 16384], repeat))
+        results.update(bench_recording(root, repeat))
+        results.update(bench_find_networks(root, 20 if quick else 100, 10, repeat))
+        results.update(bench_sweep(root, 8 if quick else 32, [1, 2, 4] if quick else [1, 2, 4, 8], 0.1))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    for workers, value in results["sweep_runs_per_s"].items():
+        results[f"sweep_x{workers}_runs_per_s"] = value
+    return results
+
+
+def load_history(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return [json.loads(text)]  # single saved result
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def compare(current: dict, baseline: dict, threshold: float, noise: dict = None, baseline_noise: dict = None):
+    """
+    [(metric, baseline, current, relative change)] for metrics that got worse
+    by more than threshold, MIN_DELTA and NOISE_FACTOR times the IQR of either run
+    """
+    regressions = []
+    for metric, value in scalar_metrics(current).items():
+        if not baseline.get(metric):
+            continue
+        delta = value - baseline[metric]
+        worse = -delta if higher_is_better(metric) else delta
+        spread = max((noise or {}).get(metric, 0.0), (baseline_noise or {}).get(metric, 0.0))
+        band = max(NOISE_FACTOR * spread, min_delta(metric))
+        if worse > threshold * abs(baseline[metric]) and worse > band:
+            regressions.append((metric, baseline[metric], value, delta / baseline[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions and smaller inputs")
+    parser.add_argument("--baseline", help="JSON file (or JSON-lines history) to compare against")
+    parser.add_argument("--rounds", type=int, default=3, help="suite repetitions (best round and IQR per metric)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--results", default=RESULTS_FILE, help="history file to append to")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results, noise = combine_rounds([run(args.quick) for _ in range(max(1, args.rounds))])
+    record = {"timestamp": time.time(), "commit": _git_commit(), "host": platform.node(),
+              "python": platform.python_version(), "quick": args.quick, "rounds": max(1, args.rounds),
+              "results": results, "noise": noise}
+
+    history = load_history(args.baseline or args.results)
+    baseline = next((h for h in reversed(history) if h.get("quick") == args.quick), None)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    with open(args.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    print("OmnetManager benchmarks (fake opp_run)")
+    for metric, value in scalar_metrics(results).items():
+        line = f"  {metric:<26}{value:12.3f}"
+        if metric in noise:
+            line += f" ±{noise[metric]:<8.3f}"
+        old = baseline["results"].get(metric) if baseline else None
+        if old:
+            line += f"   (baseline {old:.3f}, {(value - old) / old * 100:+.1f}%)"
+        print(line)
+    print(f"  run phases (ms): {results['run_phases_ms']}")
+    print(f"  .sca size (KiB): full {results['recording_sca_full_kb']:.0f}, "
+          f"results {results['recording_sca_results_kb']:.0f}")
+
+    if baseline:
+        regressions = compare(results, baseline["results"], args.threshold, noise, baseline.get("noise"))
+        for metric, old, new, change in regressions:
+            print(f"REGRESSION {metric}: {old:.3f} -> {new:.3f} ({change * 100:+.1f}%)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
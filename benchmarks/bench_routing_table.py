@@ -0,0 +1,77 @@
+"""
+Micro-benchmarks for RoutingTable: lookup, update and purge at 1,000 destinations
+
+Usage: python benchmarks/bench_routing_table.py [--destinations N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from models import RouteEntry
+from routing_table import RoutingTable
+
+
+def build_table(num_destinations: int, rng: random.Random) -> RoutingTable:
+    table = RoutingTable("host[0]")
+    for i in range(num_destinations):
+        table.update(RouteEntry(
+            destination=f"host[{i}]",
+            next_hop=f"host[{rng.randrange(num_destinations)}]",
+            hop_count=rng.randint(1, 10),
+            sequence_number=1,
+            expiry_time=rng.uniform(0.0, 10.0),
+        ))
+    return table
+
+
+def run(num_destinations: int = 1000, repeat: int = 5) -> dict:
+    rng = random.Random(42)
+    table = build_table(num_destinations, rng)
+    destinations = [f"host[{i}]" for i in range(num_destinations)]
+
+    def lookup():
+        for dest in destinations:
+            table.lookup(dest, 0.0)
+
+    seq = [1]
+
+    def update():
+        seq[0] += 1
+        for dest in destinations:
+            table.update(RouteEntry(dest, "host[1]", 2, seq[0], rng.uniform(0.0, 10.0)))
+
+    def purge():
+        # Fresh table per round; only the purge sweep itself is timed
+        t = build_table(num_destinations, rng)
+        start = time.perf_counter()
+        for step in range(1, 11):
+            t.purge(float(step))
+        return time.perf_counter() - start
+
+    results = {}
+    for name, fn in (("lookup", lookup), ("update", update)):
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        results[name] = best / num_destinations * 1e6  # us per destination
+    results["purge"] = min(purge() for _ in range(repeat)) / num_destinations * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--destinations", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.destinations, args.repeat)
+    print(f"RoutingTable @ {args.destinations} destinations (us per destination)")
+    for name, value in results.items():
+        print(f"  {name:<8}{value:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
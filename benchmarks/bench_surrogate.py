@@ -0,0 +1,94 @@
+"""
+Benchmark of the surrogate model: fit time, accuracy and interval coverage on a synthetic sweep
+
+Usage: python benchmarks/bench_surrogate.py [--points N] [--seeds S] [--protocols P]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from surrogate import DEFAULT_TOLERANCES, Surrogate
+
+
+def true_metrics(protocol: int, nodes: float, radio_range: float, speed: float) -> dict:
+    """Smooth made-up response: PDR falls with density/speed, delay grows with hops"""
+    density = nodes * radio_range ** 2 / 500.0 ** 2
+    pdr = 95.0 / (1.0 + math.exp(-(density - 2.0))) - 2.0 * speed - 3.0 * protocol
+    hops = 1.0 + 400.0 / radio_range + 0.01 * nodes
+    delay = 5.0 * hops * (1.0 + 0.1 * speed) * (1.0 + 0.2 * protocol)
+    return {"pdr": pdr, "avg_delay": delay, "avg_hops": hops}
+
+
+def sample_configs(rng, count: int, protocols: int) -> list:
+    return [{"protocol": f"P{p}", "num_nodes": int(rng.integers(10, 80)), "radio_range": float(rng.uniform(120, 300)),
+             "max_speed": float(rng.uniform(1, 10)), "sim_time_limit": "100s"}
+            for p in range(protocols) for _ in range(count)]
+
+
+def noisy_rows(rng, configs: list, seeds: int) -> list:
+    rows = []
+    for config in configs:
+        truth = true_metrics(int(config["protocol"][1:]), config["num_nodes"], config["radio_range"],
+                             config["max_speed"])
+        for seed in range(seeds):
+            rows.append(dict(config, seed=seed, success=True,
+                             pdr=truth["pdr"] + rng.normal(0, 4.0),
+                             avg_delay=truth["avg_delay"] * math.exp(rng.normal(0, 0.15)),
+                             avg_hops=truth["avg_hops"] + rng.normal(0, 0.2)))
+    return rows
+
+
+def run(points: int = 400, seeds: int = 5, protocols: int = 3, test_points: int = 500) -> dict:
+    rng = np.random.default_rng(7)
+    surrogate = Surrogate()
+    for row in noisy_rows(rng, sample_configs(rng, points, protocols), seeds):
+        surrogate.add(row)
+    tests = sample_configs(rng, test_points, protocols)
+
+    start = time.perf_counter()
+    for group in surrogate.rows:
+        for metric in surrogate.metrics:
+            surrogate.model(group, metric)
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    predictions = surrogate.predict_many(tests)
+    predict_seconds = time.perf_counter() - start
+
+    results = {"fit": fit_seconds, "predict": predict_seconds}
+    for metric in surrogate.metrics:
+        errors, covered = [], 0
+        for config, prediction in zip(tests, predictions):
+            truth = true_metrics(int(config["protocol"][1:]), config["num_nodes"], config["radio_range"],
+                                 config["max_speed"])[metric]
+            low, high = prediction.metrics[metric].interval()
+            errors.append(prediction.metrics[metric].mean - truth)
+            covered += low <= truth <= high
+        results[metric] = (float(np.sqrt(np.mean(np.square(errors)))), covered / len(tests))
+    results["confident"] = float(np.mean([p.confident(DEFAULT_TOLERANCES) for p in predictions]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=400, help="simulated configurations per protocol")
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--protocols", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.points, args.seeds, args.protocols)
+    print(f"Surrogate @ {args.points} configurations x {args.seeds} seeds x {args.protocols} protocols")
+    print(f"  fit {results['fit']:.2f} s, predict 1500 points {results['predict'] * 1000:.0f} ms")
+    for metric in ("pdr", "avg_delay", "avg_hops"):
+        rmse, coverage = results[metric]
+        print(f"  {metric:<10} RMSE {rmse:7.3f}   95% interval coverage {coverage:.0%}")
+    print(f"  confident (would be skipped): {results['confident']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
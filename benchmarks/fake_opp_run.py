@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Stand-in for OMNeT++'s opp_run, for benchmarks without an OMNeT++ install
+
+Accepts the command line OmnetManager.run_simulation builds
+(-u Cmdenv -l <library> -n <nedpath> -f <ini> -c <config> -r <run>), reads
+numHosts / sim-time-limit / warmup-period / seed-set / result-dir from the
+ini file, prints Cmdenv-style progress and writes a synthetic
+<result-dir>/<config>-#<run>.sca in the format OmnetManager.parse_results
+reads. When the ini enables udpApp vector recording, a .vec file with
+sentPk/rcvdPk/endToEndDelay vectors is written too, appended to (and
+flushed) as the run progresses; its traffic has an initial transient (route
+establishment) that decays over FAKE_OPP_TRANSIENT seconds. Like Cmdenv, it
+handles SIGTERM by ending the run at the current simulated time and calling
+finish(), i.e. writing the results up to that point. Only the scalars the
+ini's <object>.scalar-recording patterns enable (first match wins) are
+written, so recording profiles shrink the .sca file as they would in
+OMNeT++. With parallel-simulation = true it acts as one partition
+(--parsim-procid, --parsim-num-partitions, --result-dir): it checks the
+communications directory exists, runs 1/N of the work and writes the
+results of the hosts the ini's *.host[a..b]**.partition-id assigns to it.
+
+Behaviour is tuned with environment variables (OmnetManager passes its
+environment through):
+
+    FAKE_OPP_SETUP     seconds spent "loading" before Running simulation... (0.05)
+    FAKE_OPP_SLEEP     seconds of simulated run time (0.1)
+    FAKE_OPP_SLEEP_PER_NODE  additional run time per host (0)
+    FAKE_OPP_MODULES   extra scalar-recording modules per host (8)
+    FAKE_OPP_SCA_KB    pad the .sca file to at least this many KiB (0)
+    FAKE_OPP_EXIT      exit code to fail with after the run (0)
+    FAKE_OPP_TRANSIENT time constant of the start-up transient in .vec output (10)
+    FAKE_OPP_STEPS     progress steps (vector flushes) over the run (4)
+    FAKE_OPP_PDR       delivery ratio scale, 0 for a run that delivers nothing (1)
+"""
+import argparse
+import configparser
+import math
+import os
+import random
+import re
+import signal
+import sys
+import time
+
+CMDENV_BANNER = "OMNeT++ Discrete Event Simulation  (C) 1992-2019 Andras Varga, OpenSim Ltd."
+MODULE_STATS = ("rcvdPk:count", "sentPk:count", "passedUpPk:count", "droppedPkWrongPort:count",
+                "queueLength:timeavg", "queueingTime:mean")
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def read_ini(path: str, section: str) -> dict:
+    parser = configparser.RawConfigParser(strict=False, delimiters=("=",), comment_prefixes=("#",))
+    parser.optionxform = str
+    with open(path, "r", encoding="utf-8") as f:
+        parser.read_file(f)
+    name = section if section == "General" else f"Config {section}"
+    if not parser.has_section(name):
+        raise KeyError(f"Configuration '{section}' not found in {path}")
+    return dict(parser.items(name))
+
+
+class Terminated(Exception):
+    """SIGTERM received"""
+
+
+def _terminate(signum, frame):
+    raise Terminated()
+
+
+def ini_pattern(pattern: str) -> "re.Pattern":
+    """OMNeT++ ini key pattern (**, *, ?, {a,b}, [*] index) as a regex"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            regex.append(r"[^.]*")
+        elif c == "?":
+            regex.append(r"[^.]")
+        elif c == "{":
+            end = pattern.index("}", i)
+            regex.append("(?:" + "|".join(re.escape(a) for a in pattern[i + 1:end].split(",")) + ")")
+            i = end
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    return re.compile("".join(regex) + "$")
+
+
+def recording_filter(ini: dict, option: str = "scalar-recording"):
+    """(module path, result name) -> recorded?, from the ini's per-object options"""
+    suffix = "." + option
+    rules = [(ini_pattern(key[:-len(suffix)]), value.strip() == "true")
+             for key, value in ini.items() if key.endswith(suffix)]
+
+    def recorded(module: str, name: str) -> bool:
+        path = f"{module}.{name}"
+        return next((enabled for pattern, enabled in rules if pattern.match(path)), True)
+    return recorded
+
+
+def partition_hosts(ini: dict, partition: int):
+    """range of the hosts assigned to a partition by *.host[a..b]**.partition-id lines"""
+    for key, value in ini.items():
+        match = re.fullmatch(r"\*\.host\[(\d+)\.\.(\d+)\]\*\*\.partition-id", key)
+        if match and int(_quantity(value, -1)) == partition:
+            return range(int(match.group(1)), int(match.group(2)) + 1)
+    return None
+
+
+def _host_index(module: str):
+    match = re.search(r"\.host\[(\d+)\]", module)
+    return int(match.group(1)) if match else None
+
+
+def _quantity(value: str, default: float) -> float:
+    match = re.match(r"\s*([0-9.]+)", value or "")
+    return float(match.group(1)) if match else default
+
+
+def write_sca(path: str, num_hosts: int, modules_per_host: int = 8, min_bytes: int = 0,
+              seed: int = 0, run_number: int = 0, config: str = "General",
+              sim_time: float = 100.0, warmup: float = 0.0, pdr_scale: float = 1.0,
+              recorded=None) -> int:
+    """Synthetic scalar file: udpApp statistics per traffic pair plus filler modules"""
+    rng = random.Random(seed * 1000 + run_number)
+    network = "GenericManetNetwork"
+    lines = [
+        "version 2",
+        f"run {config}-{run_number}-{time.strftime('%Y%m%d-%H:%M:%S')}-{os.getpid()}",
+        f"attr configname {config}",
+        f"attr network {network}",
+        f"attr runnumber {run_number}",
+        f"attr seedset {seed}",
+        "",
+    ]
+    recorded = recorded or (lambda module, name: True)
+
+    def scalar(module: str, name: str, value: str):
+        if recorded(module, name):
+            lines.append(f"scalar {module} {name} {value}")
+
+    sent_per_pair = max(1, int((sim_time - max(2.0, warmup)) / 0.5))
+    for src in range(0, num_hosts - 1, 2):
+        received = int(sent_per_pair * rng.uniform(0.5, 1.0) * pdr_scale)
+        scalar(f"{network}.host[{src}].udpApp[0]", "sentPk:count", str(sent_per_pair))
+        scalar(f"{network}.host[{src + 1}].udpApp[0]", "rcvdPk:count", str(received))
+        scalar(f"{network}.host[{src + 1}].udpApp[0]", "endToEndDelay:mean", f"{rng.uniform(0.002, 0.05):.6f}")
+        scalar(f"{network}.host[{src + 1}].udpApp[0]", "hopCount:mean", f"{rng.uniform(1.0, 4.0):.4f}")
+
+    size = sum(len(line) + 1 for line in lines)
+    i = 0
+    while i < num_hosts * modules_per_host or size < min_bytes:
+        host, module = divmod(i, max(1, modules_per_host))
+        stat = MODULE_STATS[i % len(MODULE_STATS)]
+        count = len(lines)
+        scalar(f"{network}.host[{host % max(1, num_hosts)}].module{module}.sub{host // max(1, num_hosts)}",
+               stat, f"{rng.random() * 100:.6f}")
+        if len(lines) == count and size < min_bytes:
+            break  # filler not recorded: padding impossible
+        size += sum(len(line) + 1 for line in lines[count:])
+        i += 1
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return size
+
+
+def vector_samples(num_hosts: int, seed: int = 0, run_number: int = 0, config: str = "General",
+                   sim_time: float = 100.0, transient: float = 10.0, pdr_scale: float = 1.0,
+                   hosts=None):
+    """(header lines, [(time, data line)] sorted by time) of a synthetic vector file"""
+    rng = random.Random(seed * 1000 + run_number + 1)
+    network = "GenericManetNetwork"
+    header = [
+        "version 2",
+        f"run {config}-{run_number}-{time.strftime('%Y%m%d-%H:%M:%S')}-{os.getpid()}",
+        f"attr configname {config}",
+        f"attr network {network}",
+        "",
+    ]
+    data = []
+    vector_id = 0
+    for pair, src in enumerate(range(0, num_hosts - 1, 2)):
+        # Pairs of other partitions still draw their numbers: same traffic per pair for any split
+        samples = data if hosts is None or src in hosts else []
+        sent_id, rcvd_id, delay_id = vector_id, vector_id + 1, vector_id + 2
+        vector_id += 3
+        if samples is data:
+            header.append(f"vector {sent_id} {network}.host[{src}].udpApp[0] sentPk:vector(packetBytes) ETV")
+            header.append(f"vector {rcvd_id} {network}.host[{src + 1}].udpApp[0] rcvdPk:vector(packetBytes) ETV")
+            header.append(f"vector {delay_id} {network}.host[{src + 1}].udpApp[0] endToEndDelay:vector ETV")
+        steady_pdr, steady_delay = rng.uniform(0.7, 0.95), rng.uniform(0.005, 0.03)
+        start = 2.0 + pair * 0.1
+        t = start
+        event = 0
+        while t < sim_time:
+            decay = math.exp(-(t - start) / max(transient, 1e-6))
+            samples.append((t, f"{sent_id}\t{event}\t{t:.6f}\t512"))
+            if rng.random() < steady_pdr * (1.0 - decay) * pdr_scale:
+                delay = steady_delay * (1.0 + 5.0 * decay) * rng.lognormvariate(0.0, 0.3)
+                if t + delay < sim_time:
+                    samples.append((t + delay, f"{rcvd_id}\t{event + 1}\t{t + delay:.6f}\t512"))
+                    samples.append((t + delay, f"{delay_id}\t{event + 1}\t{t + delay:.6f}\t{delay:.6f}"))
+            event += 100
+            t += 0.5
+    data.sort(key=lambda sample: sample[0])
+    return header, data
+
+
+def write_vec(path: str, num_hosts: int, seed: int = 0, run_number: int = 0, config: str = "General",
+              sim_time: float = 100.0, transient: float = 10.0) -> int:
+    """Synthetic vector file: per-packet send/receive/delay with a decaying start-up transient"""
+    header, data = vector_samples(num_hosts, seed, run_number, config, sim_time, transient)
+    text = "\n".join(header + [line for _, line in data]) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return len(text)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="opp_run", description="opp_run stand-in for benchmarks")
+    parser.add_argument("-u", dest="user_interface", default="Cmdenv")
+    parser.add_argument("-l", dest="libraries", action="append", default=[])
+    parser.add_argument("-n", dest="ned_path", default=".")
+    parser.add_argument("-f", dest="ini_file", default="omnetpp.ini")
+    parser.add_argument("-c", dest="config", default="General")
+    parser.add_argument("-r", dest="run", type=int, default=0)
+    parser.add_argument("--parsim-procid", type=int, default=0)
+    parser.add_argument("--parsim-num-partitions", type=int)
+    parser.add_argument("--result-dir")
+    args = parser.parse_args(argv)
+
+    if args.user_interface != "Cmdenv":
+        print(f"<!> Error: fake opp_run only supports Cmdenv, not {args.user_interface}", file=sys.stderr)
+        return 1
+
+    print(CMDENV_BANNER)
+    print("Version: 5.6.2, build: fake, edition: Academic Public License -- NOT FOR COMMERCIAL USE")
+    print("Setting up Cmdenv...")
+    for library in args.libraries:
+        print(f"Loading library {library}")
+    ned_folders = [p for p in re.split(r"[;:]", args.ned_path) if p]
+    print(f"Loading NED files from {' '.join(ned_folders)}: {len(ned_folders) * 700}")
+    sys.stdout.flush()
+
+    try:
+        ini = read_ini(args.ini_file, args.config)
+    except (OSError, KeyError) as e:
+        print(f"<!> Error: {e}", file=sys.stderr)
+        return 1
+    num_hosts = int(_quantity(ini.get("*.numHosts"), 10))
+    sim_time = _quantity(ini.get("sim-time-limit"), 100.0)
+    seed = int(_quantity(ini.get("seed-set"), 0))
+    warmup = _quantity(ini.get("warmup-period"), 0.0)
+    record_vectors = any("udpApp" in key and key.endswith("vector-recording") and value.strip() == "true"
+                         for key, value in ini.items())
+    partitions, hosts = 1, None
+    if ini.get("parallel-simulation", "false").strip() == "true":
+        partitions = args.parsim_num_partitions or int(_quantity(ini.get("parsim-num-partitions"), 1))
+        prefix = next((v.strip('"') for k, v in ini.items() if k.startswith("parsim-") and k.endswith("-prefix")),
+                      "comm/")
+        if not os.path.isdir(os.path.dirname(prefix) or "."):
+            print(f"<!> Error: Cannot open communications prefix {prefix}", file=sys.stderr)
+            return 1
+        hosts = partition_hosts(ini, args.parsim_procid)
+        if hosts is None:
+            print(f"<!> Error: No hosts assigned to partition {args.parsim_procid}", file=sys.stderr)
+            return 1
+        print(f"Partition {args.parsim_procid} of {partitions}: host[{hosts.start}..{hosts.stop - 1}]")
+    time.sleep(_env_float("FAKE_OPP_SETUP", 0.05))
+
+    network = ini.get("network", "GenericManetNetwork")
+    print(f"\nPreparing for running configuration {args.config}, run #{args.run}...")
+    print(f"Assigned runID={args.config}-{args.run}-{os.getpid()}")
+    print(f"Setting up network \"{network}\"...")
+    print("Initializing...")
+    print("\nRunning simulation...")
+    sys.stdout.flush()
+
+    result_dir = args.result_dir or ini.get("result-dir", "results").strip('"')
+    os.makedirs(result_dir, exist_ok=True)
+    pdr_scale = _env_float("FAKE_OPP_PDR", 1.0)
+    vec_file, vec_data = None, []
+    if record_vectors:
+        header, vec_data = vector_samples(num_hosts, seed, args.run, args.config, sim_time,
+                                          _env_float("FAKE_OPP_TRANSIENT", 10.0), pdr_scale, hosts)
+        vec_file = open(os.path.join(result_dir, f"{args.config}-#{args.run}.vec"), "w", encoding="utf-8")
+        vec_file.write("\n".join(header) + "\n")
+    written = 0
+
+    duration = _env_float("FAKE_OPP_SLEEP", 0.1) + _env_float("FAKE_OPP_SLEEP_PER_NODE", 0.0) * num_hosts
+    if partitions > 1:
+        duration = duration / partitions * 1.1  # null-message synchronisation overhead
+    steps = max(1, int(_env_float("FAKE_OPP_STEPS", 4)))
+    events_per_step = num_hosts * 25_000
+    start = time.perf_counter()
+    reached, step = sim_time, steps
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        for step in range(1, steps + 1):
+            time.sleep(duration / steps)
+            reached = sim_time * step / steps
+            elapsed = time.perf_counter() - start
+            print(f"** Event #{step * events_per_step}   t={reached:g}   "
+                  f"Elapsed: {elapsed:.3f}s ({elapsed / 60:.0f}m {elapsed % 60:02.0f}s)  {100 * step // steps}% completed")
+            print(f"     Speed:     ev/sec={events_per_step / max(duration / steps, 1e-6):.0f}   "
+                  f"simsec/sec={sim_time / steps / max(duration / steps, 1e-6):g}   ev/simsec={events_per_step / (sim_time / steps):g}")
+            sys.stdout.flush()
+            if vec_file is not None:
+                end = written
+                while end < len(vec_data) and vec_data[end][0] <= reached:
+                    end += 1
+                vec_file.write("".join(line + "\n" for _, line in vec_data[written:end]))
+                vec_file.flush()
+                written = end
+        print(f"\n<!> Simulation time limit reached -- at t={sim_time:g}s, event #{steps * events_per_step}")
+    except Terminated:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        reached = sim_time * (step - 1) / steps
+        print(f"\n<!> SIGINT or SIGTERM received, exiting -- at t={reached:g}s, event #{(step - 1) * events_per_step}")
+    if vec_file is not None:
+        vec_file.write("".join(line + "\n" for t, line in vec_data[written:] if t <= reached))
+        vec_file.close()
+
+    print(f"\nCalling finish() at end of Run #{args.run}...")
+    recorded = recording_filter(ini)
+    if hosts is not None:
+        scalar_recorded = recorded
+
+        def recorded(module, name):
+            return _host_index(module) in hosts and scalar_recorded(module, name)
+    write_sca(os.path.join(result_dir, f"{args.config}-#{args.run}.sca"), num_hosts,
+              int(_env_float("FAKE_OPP_MODULES", 8)), int(_env_float("FAKE_OPP_SCA_KB", 0) * 1024),
+              seed, args.run, args.config, reached, warmup, pdr_scale, recorded)
+    print("\nEnd.")
+    return int(_env_float("FAKE_OPP_EXIT", 0))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
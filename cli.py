@@ -0,0 +1,901 @@
+"""
+Headless command-line interface for MANET simulations
+
+    python main.py run --protocol AODV --nodes 20 --time 100s --seed 0
+    python main.py sweep sweep.json --output results.csv
+    python main.py compare --runs 5 --output results.jsonl
+    python main.py parse --results-dir /path/to/results
+    python main.py warmup --protocol AODV --nodes 20 --pilot-time 300s
+    python main.py analyze results.csv --spec sweep.json --paired -o significance.csv
+    python main.py serve --listen unix:/srv/manet/manet.sock -j 16
+    python main.py submit sweep.json --service unix:/srv/manet/manet.sock -o results.csv
+    python main.py sweep sweep.json --coordinator 0.0.0.0:8766 -o results.csv
+    python main.py worker --coordinator head-node:8766 -j 8
+    python main.py sweep sweep.json --surrogate old.csv -o results.csv
+    python main.py suggest sweep.json --surrogate old.csv --samples 500 -n 20
+
+Drives OmnetManager directly and writes machine-readable results (JSON lines
+or CSV, chosen by --format or the output file extension). Never imports
+tkinter or matplotlib; omnet_manager itself is imported only when a command
+runs, so --help returns immediately.
+
+Sweep spec (JSON):
+
+    {
+      "protocols": ["AODV", "OLSR"],
+      "seeds": {"start": 0, "count": 5},          (or a list: [0, 1, 2])
+      "base": {"num_nodes": 20, "sim_time_limit": "100s", "area_size": "500m"},
+      "grid": {"num_nodes": [10, 20, 50], "radio_range": [150, 250]}
+    }
+
+"base" and "grid" keys are create_config() keyword arguments; every grid
+combination is run for every protocol and seed.
+
+--warmup auto runs a pilot (application vectors recorded) for every distinct
+scenario, detects the end of the start-up transient with MSER-5 and sets
+warmup-period for the real runs; --warmup SECONDS sets it directly and
+--fit-sim-time also shortens sim-time-limit to the pilot's recommendation.
+
+Runtimes are predicted from earlier runs (results/runtime_history.jsonl and
+--metrics-jsonl): sweeps start the longest runs first, every run gets a
+cpu-time-limit / timeout sized to its prediction and progress lines show an
+ETA.
+
+--abort-if "received == 0 after 30s" (repeatable) aborts hopeless runs and
+reports them as failures; --stop-when-converged ends a run once its PDR and
+delay batch means are precise enough (see early_stop.py). Every result row
+records why the run stopped (stop_reason).
+
+--recording selects what OMNeT++ records (recording.py): "results" (the
+default: only what the result rows need), "pdr", "full" (every scalar, for
+debugging) or a list of metrics such as pdr,delay.
+
+--partitions N runs every simulation as an OMNeT++ parallel simulation
+(PDES) with N opp_run processes on this machine (parsim.py); -j still
+counts runs, so -j 2 --partitions 4 keeps up to 8 processes busy. INET
+wireless networks, including the default GenericManetNetwork, cannot be
+split: N > 1 needs --network, a NED network whose host[] are connected by
+links with a delay (a wired or link-delay model of the scenario).
+
+analyze reads result rows (JSON lines or CSV, e.g. a sweep's output) and
+writes bootstrap confidence intervals and pairwise protocol tests for every
+scenario (significance.py); scenarios are the sweep spec's grid keys
+(--spec) or the columns given with --by.
+
+serve runs the shared simulation service (service.py): one job queue for
+all users of the machine with fair share, deduplication of identical jobs
+and a result cache. submit sends a sweep spec to it and streams progress
+and results back; gui --service starts the GUI as a client of it. Over TCP
+(loopback only) the user name is whatever the client claims; listen on a
+Unix socket when fair share and owner checks must hold between users. The
+socket is readable and writable by its owner and group (--socket-mode,
+--socket-group); only the user running serve may pause the queue.
+
+--coordinator HOST:PORT (sweep, compare, serve) runs the jobs on other
+machines (cluster.py): every worker process has its own OMNeT++/INET
+installation and working directory, pulls jobs from the coordinator and
+sends back the parsed stats (and the result files with --fetch-files).
+Jobs of workers that stop sending heartbeats are reassigned.
+
+--surrogate RESULTS (sweep) trains a Gaussian-process surrogate on stored
+result rows (surrogate.py) and writes its prediction instead of running a
+configuration whose PDR and delay it predicts within --surrogate-pdr /
+--surrogate-delay (rows with stop_reason "predicted"); suggest ranks the
+spec's grid points (and --samples random points between them) by how
+uncertain the surrogate is, i.e. which points to simulate next.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from defaults import (CLUSTER_PORT, CORRECTIONS, DEFAULT_CONFIDENCE, DEFAULT_CORRECTION, DEFAULT_PARSIM_COMMUNICATIONS,
+                      DEFAULT_RESAMPLES, PARSIM_COMMUNICATIONS, SERVICE_PORT)
+
+SURROGATE_SHOWN = 5  # uncertain points listed by sweep --surrogate
+
+# CSV columns of job rows after the create_config keys; a failed first job has no stats
+RESULT_FIELDS = ('sent', 'received', 'pdr', 'avg_delay', 'avg_hops', 'avg_throughput', 'result_file',
+                 'stop_reason', 'sim_time_reached', 'success', 'failure', 'error', 'attempts')
+
+
+class ResultWriter:
+    """
+    Incremental JSON-lines / CSV writer (partial sweeps keep their results)
+
+    CSV columns are the first row's keys followed by `fields`; missing values
+    are left blank. A later row with new keys rewrites a CSV file with the
+    union header (on stdout those columns are dropped).
+    """
+
+    def __init__(self, path: Optional[str] = None, fmt: Optional[str] = None, fields: Iterable[str] = ()):
+        self.path = path
+        self.format = fmt or ('csv' if path and path.lower().endswith('.csv') else 'json')
+        self._file = open(path, 'w', encoding='utf-8', newline='') if path else sys.stdout
+        self._fields = list(fields)
+        self._csv = None
+        self._rows: List[Dict] = []  # CSV rows so far, for a header rewrite
+
+    def write(self, record: Dict):
+        if self.format == 'csv':
+            if self._csv is None:
+                self._fields = list(record) + [f for f in self._fields if f not in record]
+                self._start_csv()
+            elif self._file is not sys.stdout and any(key not in self._fields for key in record):
+                self._fields += [key for key in record if key not in self._fields]
+                self._file.seek(0)
+                self._file.truncate()
+                self._start_csv()
+                self._csv.writerows(self._rows)
+            self._csv.writerow(record)
+            if self._file is not sys.stdout:
+                self._rows.append(record)
+        else:
+            self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def _start_csv(self):
+        import csv
+        self._csv = csv.DictWriter(self._file, fieldnames=self._fields, restval='', extrasaction='ignore')
+        self._csv.writeheader()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+def load_sweep_spec(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if 'protocols' not in spec:
+        raise ValueError(f"Sweep spec {path} has no 'protocols' list")
+    return spec
+
+
+def _spec_seeds(spec: Dict) -> List[int]:
+    seeds = spec.get('seeds', {'start': 0, 'count': 1})
+    if isinstance(seeds, dict):
+        return list(range(seeds.get('start', 0), seeds.get('start', 0) + seeds.get('count', 1)))
+    return [int(s) for s in seeds]
+
+
+def expand_sweep(spec: Dict) -> Iterator[Dict]:
+    """Yield create_config kwargs for every protocol x grid point x seed"""
+    base = dict(spec.get('base', {}))
+    grid = spec.get('grid', {})
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        point = dict(base, **dict(zip(keys, values)))
+        for protocol in spec['protocols']:
+            for seed in _spec_seeds(spec):
+                yield dict(point, protocol=protocol, seed=seed)
+
+
+def job_record(job) -> Dict:
+    """Output row of a finished job; failed runs carry no metric values"""
+    from job_queue import JobStatus
+
+    record = dict(job.params)
+    if job.status == JobStatus.DONE:
+        record.update(job.result)
+        record.update(success=True, failure='', error='')
+    else:
+        record.update(success=False, failure=job.failure or job.status, error=job.error)
+    record['attempts'] = job.attempts
+    return record
+
+
+def run_jobs(manager, configs: Iterable[Dict], writer: ResultWriter, jobs: int = 1,
+             retries: int = 3, predictor=None, early_stop=None, cluster=None) -> List[Dict]:
+    """
+    Run configurations through a memory-admitted JobQueue, writing rows in submission order.
+    With a ClusterRunner the runs go to its coordinator's workers, as many at once as they have slots.
+    """
+    import threading
+    from job_queue import JobQueue
+    from runtime_model import format_duration
+    from scheduler import ResourceAdmission, RetryPolicy, SimulationRunner
+
+    if cluster is None:
+        admission = ResourceAdmission()
+        runner = SimulationRunner(manager, admission=admission, predictor=predictor, early_stop=early_stop)
+    else:
+        admission, runner = None, cluster
+        jobs = cluster.coordinator.capacity
+    queue = JobQueue(runner, runner.cancel, max_workers=jobs, admission=admission,
+                     retry_policy=RetryPolicy(max_attempts=retries), estimator=runner)
+    if cluster is not None:
+        cluster.coordinator.on_capacity = queue.set_max_workers
+    submitted = []
+    finished = []
+    lock = threading.Lock()
+
+    def progress(job):
+        # Completion order (longest-first dispatch finishes small jobs last)
+        if not job.finished:
+            return
+        status = f"PDR={job.result['pdr']:.2f}%" if job.result else f"FAILED ({job.error or job.status})"
+        with lock:
+            finished.append(job)
+            eta = f", ETA {format_duration(queue.eta())}" if len(finished) < len(submitted) else ""
+            sys.stderr.write(f"[{len(finished)}/{len(submitted)}] {job.protocol} seed={job.seed}: {status}{eta}\n")
+
+    queue.pause()  # ETA and longest-first order need the whole sweep queued
+    submitted.extend(queue.submit(config['protocol'], config['seed'], config) for config in configs)
+    queue.listeners.append(progress)
+    if predictor is not None and len(submitted) > 1:
+        print(f"Estimated time: {format_duration(queue.eta())} "
+              f"({len(predictor)} recorded runs)", file=sys.stderr)
+    queue.resume()
+    records = []
+    try:
+        for job in submitted:
+            job.wait()
+            record = job_record(job)
+            writer.write(record)
+            records.append(record)
+    finally:
+        queue.stop()
+    if early_stop is not None:
+        from early_stop import format_stop_reasons
+        print(f"Stop reasons: {format_stop_reasons(records)}", file=sys.stderr)
+    return records
+
+
+# --- Commands ---
+
+def _make_manager(args):
+    from omnet_manager import OmnetManager
+    manager = OmnetManager(args.omnet, args.working_dir, ned_path=args.ned_path)
+    manager.configure_metrics_export(args.metrics_jsonl, args.metrics_prom)
+    return manager
+
+
+def _make_predictor(args, manager):
+    """Runtime model trained on the history file (and the metrics file, if any)"""
+    from runtime_model import RUNTIME_HISTORY_FILE, RuntimePredictor
+
+    predictor = RuntimePredictor(args.runtime_history or os.path.join(manager.results_dir, RUNTIME_HISTORY_FILE))
+    if args.metrics_jsonl:
+        predictor.load(args.metrics_jsonl)
+    return predictor
+
+
+def _make_early_stop(args):
+    """EarlyStopPolicy from --abort-if / --stop-when-converged, None if neither is given"""
+    if not args.abort_if and not args.stop_when_converged:
+        return None
+    from early_stop import EarlyStopPolicy
+    return EarlyStopPolicy.from_strings(args.abort_if or (), args.stop_when_converged,
+                                        pdr_tolerance=args.converge_pdr, delay_tolerance=args.converge_delay)
+
+
+def _make_coordinator(args, manager):
+    """Started cluster.Coordinator for --coordinator, None without it"""
+    if not getattr(args, 'coordinator', None):
+        return None
+    from cluster import Coordinator
+
+    coordinator = Coordinator(args.coordinator, manager.results_dir, args.fetch_files).start()
+    host, port = coordinator.address
+    print(f"Coordinator on {host}:{port}; start workers with "
+          f"'main.py worker --coordinator <this host>:{port}'", file=sys.stderr)
+    return coordinator
+
+
+def _scenario_key(config: Dict) -> str:
+    return json.dumps({k: v for k, v in config.items() if k not in ('seed', 'antithetic')}, sort_keys=True)
+
+
+def apply_warmup(args, manager, configs: List[Dict]) -> List[Dict]:
+    """Set warmup_period (and sim_time_limit with --fit-sim-time) from --warmup"""
+    if not args.warmup:
+        return configs
+    if args.warmup != "auto":
+        return [dict(config, warmup_period=float(args.warmup)) for config in configs]
+
+    from warmup import format_warmup, run_pilot
+
+    pilot_manager = manager.worker_copy("pilot")
+    results = {}
+    for config in configs:
+        key = _scenario_key(config)
+        if key not in results:
+            print(f"Pilot run: {config['protocol']} ({args.pilot_time} x{args.pilot_runs})", file=sys.stderr)
+            results[key] = run_pilot(pilot_manager, config, args.pilot_time, range(args.pilot_runs))
+            print(format_warmup(results[key]), file=sys.stderr)
+    return [results[_scenario_key(config)].apply(config, sim_time=args.fit_sim_time) for config in configs]
+
+
+def _surrogate_tolerances(args) -> Dict[str, float]:
+    return {'pdr': args.surrogate_pdr, 'avg_delay': args.surrogate_delay}
+
+
+def apply_surrogate(args, configs: List[Dict]):
+    """(configs to simulate, rows predicted instead) with --surrogate; every config runs without it"""
+    if not getattr(args, 'surrogate', None):
+        return configs, []
+    from surrogate import Surrogate, format_prediction
+
+    surrogate = Surrogate.from_files(args.surrogate)
+    tolerances = _surrogate_tolerances(args)
+    to_run, predicted, uncertain = surrogate.split(configs, tolerances)
+    print(f"Surrogate ({len(surrogate)} stored results): {len(predicted)} of {len(configs)} runs predicted, "
+          f"{len(to_run)} to simulate", file=sys.stderr)
+    if uncertain:
+        points = {}  # one line per grid point, not per seed
+        for prediction in sorted(uncertain, key=lambda p: -p.uncertainty(tolerances)):
+            points.setdefault(_scenario_key(prediction.config), prediction)
+        print("Most uncertain points:", file=sys.stderr)
+        for prediction in list(points.values())[:SURROGATE_SHOWN]:
+            print(f"  {format_prediction(prediction, tolerances)}", file=sys.stderr)
+    return to_run, predicted
+
+
+def _execute(args, configs: List[Dict], jobs: int = 1) -> List[Dict]:
+    if args.recording:
+        configs = [dict(config, recording=args.recording) for config in configs]
+    configs = [dict(config, **_parallel_config(args)) for config in configs]
+    manager = _make_manager(args)
+    configs = apply_warmup(args, manager, configs)
+    configs, predicted = apply_surrogate(args, configs)
+    predictor = _make_predictor(args, manager)
+    coordinator = _make_coordinator(args, manager)
+    cluster = None
+    if coordinator is not None:
+        from cluster import ClusterRunner
+        cluster = ClusterRunner(coordinator, predictor=predictor, early_stop=_early_stop_spec(args))
+    writer = ResultWriter(args.output, args.format, RESULT_FIELDS)
+    try:
+        records = run_jobs(manager, configs, writer, jobs, args.retries, predictor, _make_early_stop(args),
+                           cluster) if configs else []
+        for record in predicted:
+            writer.write(record)
+        return records + predicted
+    finally:
+        writer.close()
+        if coordinator is not None:
+            coordinator.stop()
+
+
+def _config_from_args(args) -> Dict:
+    return {
+        'num_nodes': args.nodes,
+        'sim_time_limit': args.time,
+        'area_size': args.area,
+        'radio_range': args.range,
+        'min_speed': args.min_speed,
+        'max_speed': args.max_speed,
+        'pause_time': args.pause,
+        'num_traffic_pairs': args.traffic_pairs,
+        'aodv_timeout': args.aodv_timeout,
+        'aodv_hello_interval': args.aodv_hello,
+        'aodv_hello_loss': args.aodv_hello_loss,
+    }
+
+
+def cmd_run(args) -> int:
+    config = dict(_config_from_args(args), protocol=args.protocol, seed=args.seed)
+    records = _execute(args, [config])
+    return 0 if records[0]['success'] else 1
+
+
+def cmd_sweep(args) -> int:
+    configs = list(expand_sweep(load_sweep_spec(args.spec)))
+    print(f"Sweep: {len(configs)} runs", file=sys.stderr)
+    records = _execute(args, configs, args.jobs)
+    return 0 if all(r['success'] for r in records) else 1
+
+
+def cmd_compare(args) -> int:
+    from omnet_manager import COMPARE_PROTOCOLS
+    from significance import ResultTable, analyze, format_intervals, format_tests
+
+    protocols = args.protocols or COMPARE_PROTOCOLS
+    base = dict(_config_from_args(args), common_random_numbers=args.crn)
+    variants = [False, True] if args.antithetic else [False]
+    configs = [dict(base, protocol=p, seed=args.seed + i, antithetic=a)
+               for p in protocols for i in range(args.runs) for a in variants]
+    records = _execute(args, configs, args.jobs)
+
+    report = analyze(ResultTable.from_records(records), paired=args.crn)
+    print("\nMean [95% bootstrap CI]:", file=sys.stderr)
+    for line in format_intervals(report):
+        print(f"  {line}", file=sys.stderr)
+    tests = format_tests(report)
+    if tests:
+        print(f"\nPDR differences ({'paired' if args.crn else 'unpaired'} permutation tests, "
+              f"{report.correction}-adjusted):", file=sys.stderr)
+        for line in tests:
+            print(f"  {line}", file=sys.stderr)
+
+    if args.crn:
+        from variance_reduction import PairedResults, format_comparison, rank_paired
+        paired = PairedResults()
+        for r in records:
+            if r['success']:
+                paired.add(r['protocol'], r['seed'], r['pdr'])
+        print("\nPaired comparison (95% CI of PDR difference):", file=sys.stderr)
+        for comparison in rank_paired(paired)[1]:
+            print(f"  {format_comparison(comparison)}", file=sys.stderr)
+    return 0 if all(r['success'] for r in records) else 1
+
+
+def cmd_warmup(args) -> int:
+    from warmup import format_warmup, run_pilot
+
+    config = dict(_config_from_args(args), protocol=args.protocol, **_parallel_config(args))
+    result = run_pilot(_make_manager(args), config, args.pilot_time, range(args.seed, args.seed + args.pilot_runs))
+    print(format_warmup(result), file=sys.stderr)
+    writer = ResultWriter(args.output, args.format)
+    try:
+        writer.write(dict(result.to_dict(), protocol=args.protocol, num_nodes=args.nodes))
+    finally:
+        writer.close()
+    return 0 if result.converged else 1
+
+
+def load_results(path: str) -> List[Dict]:
+    """Result rows written by ResultWriter (JSON lines or CSV)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            import csv
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def cmd_analyze(args) -> int:
+    from significance import DEFAULT_METRICS, ResultTable, analyze
+
+    records = [record for path in args.results for record in load_results(path)]
+    scenario_keys = args.by or (list(load_sweep_spec(args.spec).get('grid', {})) if args.spec else [])
+    table = ResultTable.from_records(records, args.metrics or DEFAULT_METRICS, scenario_keys)
+    report = analyze(table, paired=args.paired, confidence=args.confidence,
+                     resamples=args.resamples, correction=args.correction)
+    tests = report.significant[report.pair_count > 0]
+    print(f"Analyzed {len(table.scenarios)} scenarios x {len(table.protocols)} protocols x "
+          f"{len(table.seeds)} seeds: {int(tests.sum())} of {tests.size} pairwise tests significant "
+          f"({args.correction}, alpha={report.alpha:g})", file=sys.stderr)
+    writer = ResultWriter(args.output, args.format)
+    try:
+        for row in report.rows():
+            writer.write(row)
+    finally:
+        writer.close()
+    return 0
+
+
+def _sample_grid(spec: Dict, count: int, seed: int = 0) -> List[Dict]:
+    """Random points inside the sweep grid: numeric keys uniform between their extremes"""
+    import random
+    from runtime_model import parse_quantity
+
+    rng = random.Random(seed)
+    base, grid = dict(spec.get('base', {})), spec.get('grid', {})
+    points = []
+    for _ in range(count):
+        point = dict(base, protocol=rng.choice(spec['protocols']))
+        for key, values in grid.items():
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                low, high = min(values), max(values)
+                point[key] = (rng.randint(low, high) if all(isinstance(v, int) for v in values)
+                              else round(rng.uniform(low, high), 3))
+            elif all(isinstance(v, str) and parse_quantity(v, -1.0) >= 0 for v in values):
+                # '500m', '100s': sample the number, keep the unit of the first value
+                numbers = [parse_quantity(v, 0.0) for v in values]
+                unit = values[0].strip().lstrip("0123456789.eE+-")
+                point[key] = f"{round(rng.uniform(min(numbers), max(numbers)))}{unit}"
+            else:
+                point[key] = rng.choice(values)
+        points.append(point)
+    return points
+
+
+def cmd_suggest(args) -> int:
+    from surrogate import Surrogate, format_prediction
+
+    spec = load_sweep_spec(args.spec)
+    # One candidate per grid point (the surrogate predicts the mean over seeds)
+    points = {_scenario_key(config): config for config in expand_sweep(dict(spec, seeds=[0]))}
+    candidates = [{k: v for k, v in config.items() if k != 'seed'} for config in points.values()]
+    candidates += _sample_grid(spec, args.samples)
+    surrogate = Surrogate.from_files(args.surrogate)
+    tolerances = _surrogate_tolerances(args)
+    ranked = surrogate.rank(candidates, tolerances)
+    confident = sum(p.confident(tolerances) for p in ranked)
+    print(f"Surrogate ({len(surrogate)} stored results): {confident} of {len(ranked)} candidate points "
+          f"predicted within tolerance; simulate next:", file=sys.stderr)
+    writer = ResultWriter(args.output, args.format)
+    try:
+        for prediction in ranked[:args.count]:
+            print(f"  {format_prediction(prediction, tolerances)}", file=sys.stderr)
+            writer.write(dict(prediction.record(), uncertainty=round(prediction.uncertainty(tolerances), 3)))
+    finally:
+        writer.close()
+    return 0
+
+
+def _share_value(value: str):
+    user, _, share = value.partition("=")
+    try:
+        return user, float(share)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected USER=SHARES, e.g. alice=2")
+
+
+def _early_stop_spec(args) -> Optional[Dict]:
+    """--abort-if / --stop-when-converged as a service early_stop spec (EarlyStopPolicy.from_strings)"""
+    if not args.abort_if and not args.stop_when_converged:
+        return None
+    return {'rules': args.abort_if or [], 'converge': args.stop_when_converged,
+            'options': {'pdr_tolerance': args.converge_pdr, 'delay_tolerance': args.converge_delay}}
+
+
+def cmd_serve(args) -> int:
+    from service import SOCKET_MODE, ServiceError, SimulationService, serve
+
+    manager = _make_manager(args)
+    coordinator = _make_coordinator(args, manager)
+    service = SimulationService(manager, args.jobs, args.cache, dict(args.share or ()), args.retries,
+                                _make_predictor(args, manager), coordinator)
+    workers = "cluster workers" if coordinator else f"{service.queue.max_workers} workers"
+    print(f"Serving on {args.listen} ({workers}); Ctrl+C to stop", file=sys.stderr)
+    try:
+        serve(service, args.listen, SOCKET_MODE if args.socket_mode is None else args.socket_mode,
+              args.socket_group)
+    except ServiceError as e:
+        print(f"Cannot serve on {args.listen}: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if coordinator is not None:
+            coordinator.stop()
+    return 0
+
+
+def cmd_worker(args) -> int:
+    from cluster import ClusterWorker
+
+    manager = _make_manager(args)
+    worker = ClusterWorker(manager, args.coordinator, args.jobs, args.name, _make_predictor(args, manager))
+    print(f"Worker {worker.name} ({worker.slots} slots) for coordinator {args.coordinator}; Ctrl+C to stop",
+          file=sys.stderr)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+    print(f"{worker.completed} runs completed", file=sys.stderr)
+    return 0
+
+
+def cmd_submit(args) -> int:
+    from service import ServiceClient
+
+    client = ServiceClient(args.service, args.user)
+    configs = list(expand_sweep(load_sweep_spec(args.spec)))
+    if args.recording:
+        configs = [dict(config, recording=args.recording) for config in configs]
+    sweep = client.submit_sweep(configs, priority=args.priority, early_stop=_early_stop_spec(args))
+    total = len(set(sweep['job_ids']))
+    done = sweep['counts'].get('done', 0)
+    print(f"Sweep {sweep['sweep_id']}: {len(configs)} runs, {total} jobs "
+          f"({len(configs) - total} duplicates, {done} already done)", file=sys.stderr)
+    finished = set()
+    try:
+        for event in client.events(sweep_id=sweep['sweep_id']):
+            if event['status'] in ('done', 'failed', 'cancelled') and event['job_id'] not in finished:
+                finished.add(event['job_id'])
+                result = event['result']
+                status = f"PDR={result['pdr']:.2f}%" if result else f"FAILED ({event['error'] or event['status']})"
+                sys.stderr.write(f"[{len(finished)}/{total}] {event['protocol']} seed={event['seed']}: {status}\n")
+    except KeyboardInterrupt:
+        print("\nDetached; the jobs keep running on the service. Resubmit the same spec to collect "
+              "the results (finished runs come from its cache).", file=sys.stderr)
+        return 130
+    records = client.sweep(sweep['sweep_id'])['records']
+    writer = ResultWriter(args.output, args.format, RESULT_FIELDS)
+    try:
+        for record in records:
+            writer.write(record)
+    finally:
+        writer.close()
+    return 0 if all(r['success'] for r in records) else 1
+
+
+def cmd_gui(args) -> int:
+    from main import run_gui
+    return run_gui(service=args.service, user=args.user)
+
+
+def cmd_parse(args) -> int:
+    manager = _make_manager(args)
+    if args.results_dir:
+        manager.results_dir = args.results_dir
+    writer = ResultWriter(args.output, args.format)
+    try:
+        writer.write(manager.parse_results())
+    finally:
+        writer.close()
+    return 0
+
+
+def _warmup_value(value: str) -> str:
+    if value != "auto":
+        try:
+            float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError("expected seconds or 'auto'")
+    return value
+
+
+def _mode_value(value: str) -> int:
+    try:
+        mode = int(value, 8)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected an octal mode such as 660")
+    if not 0 <= mode <= 0o777:
+        raise argparse.ArgumentTypeError("expected an octal mode such as 660")
+    return mode
+
+
+def _partitions_value(value: str) -> int:
+    try:
+        partitions = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a number of partitions")
+    if partitions < 1:
+        raise argparse.ArgumentTypeError("at least 1 partition")
+    return partitions
+
+
+def _check_partitionable(parser: argparse.ArgumentParser, args):
+    """--partitions N > 1 needs a --network that can be split"""
+    if getattr(args, 'partitions', 1) <= 1:
+        return
+    from omnet_manager import GENERIC_NETWORK
+    from parsim import check_partitionable
+    try:
+        check_partitionable(args.network or GENERIC_NETWORK, args.partitions)
+    except ValueError as e:
+        parser.error(f"{e} (--network)")
+
+
+def _parallel_config(args) -> Dict:
+    """create_config kwargs of --network / --partitions / --parsim-comm (none by default)"""
+    config = {'network_name': args.network} if args.network else {}
+    if args.partitions > 1:
+        config.update(partitions=args.partitions, parsim_communications=args.parsim_comm)
+    return config
+
+
+def _recording_value(value: str) -> str:
+    from recording import resolve_metrics
+    try:
+        resolve_metrics(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def _stop_rule(value: str) -> str:
+    from early_stop import StopRule
+    try:
+        StopRule.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="MANET simulator (OMNeT++/INETMANET). Without a command the GUI is started."
+    )
+    parser.add_argument("--omnet", help="opp_run executable")
+    parser.add_argument("--working-dir", help="INETMANET working directory")
+    parser.add_argument("--ned-path", help="NED path (default: src;examples)")
+    parser.add_argument("--quiet", action="store_true", help="only log warnings and errors")
+    parser.add_argument("--metrics-jsonl", help="append per-run phase timings/CPU/RSS to this JSON-lines file")
+    parser.add_argument("--metrics-prom", help="Prometheus textfile-collector file to keep updated")
+    parser.add_argument("--runtime-history",
+                        help="run-time history for ETA/limits (default: <results>/runtime_history.jsonl)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_output(p):
+        p.add_argument("-o", "--output", help="result file (default: stdout)")
+        p.add_argument("--format", choices=["json", "csv"], help="default: from extension, else json lines")
+
+    def add_execution(p):
+        p.add_argument("-j", "--jobs", type=int, default=1,
+                       help="parallel opp_run processes (admitted by estimated memory)")
+        p.add_argument("--retries", type=int, default=3,
+                       help="attempts per run for transient failures (timeout, OOM)")
+        add_warmup(p)
+        add_early_stop(p)
+        add_recording(p)
+        add_parallel(p)
+        add_cluster(p)
+
+    def add_cluster(p):
+        p.add_argument("--coordinator", metavar="HOST:PORT",
+                       help=f"run on remote workers: listen for them here, e.g. 0.0.0.0:{CLUSTER_PORT}")
+        p.add_argument("--fetch-files", action="store_true",
+                       help="with --coordinator: copy result files back (results/cluster/<worker>/)")
+
+    def add_recording(p):
+        p.add_argument("--recording", type=_recording_value,
+                       help="recording profile (results, pdr, full) or metrics, e.g. pdr,delay (default: results)")
+
+    def add_parallel(p):
+        p.add_argument("--network", metavar="NED_NETWORK",
+                       help="NED network with host[], numHosts and hostType (default: GenericManetNetwork)")
+        p.add_argument("--partitions", type=_partitions_value, default=1,
+                       help="split each simulation into N partitions (OMNeT++ PDES, one opp_run per partition; "
+                            "needs a --network connected by links, not an INET wireless one)")
+        p.add_argument("--parsim-comm", choices=list(PARSIM_COMMUNICATIONS),
+                       default=DEFAULT_PARSIM_COMMUNICATIONS,
+                       help="PDES communications between the partition processes")
+
+    def add_pilot(p):
+        p.add_argument("--pilot-time", default="300s", help="sim-time-limit of pilot runs")
+        p.add_argument("--pilot-runs", type=int, default=1, help="pilot replications (seeds) per scenario")
+
+    def add_warmup(p):
+        p.add_argument("--warmup", type=_warmup_value, help="warm-up period in seconds, or 'auto' (MSER-5 on a pilot run)")
+        p.add_argument("--fit-sim-time", action="store_true",
+                       help="with --warmup auto: use the recommended (shorter) sim-time-limit")
+        add_pilot(p)
+
+    def add_early_stop(p):
+        p.add_argument("--abort-if", action="append", type=_stop_rule, metavar="RULE",
+                       help="abort a run when e.g. 'received == 0 after 30s' holds (repeatable)")
+        p.add_argument("--stop-when-converged", action="store_true",
+                       help="stop a run once PDR/delay batch means are precise enough")
+        p.add_argument("--converge-pdr", type=float, default=1.0,
+                       help="convergence: 95%% CI half-width of PDR, percentage points")
+        p.add_argument("--converge-delay", type=float, default=0.05,
+                       help="convergence: CI half-width of delay relative to its mean")
+
+    def add_scenario(p):
+        # Defaults follow OmnetManager.create_config
+        p.add_argument("--nodes", type=int, default=10)
+        p.add_argument("--time", default="100s", help="sim-time-limit, e.g. 100s")
+        p.add_argument("--area", default="500m")
+        p.add_argument("--range", type=float, default=250.0, help="radio range (m)")
+        p.add_argument("--min-speed", type=float, default=1.0)
+        p.add_argument("--max-speed", type=float, default=5.0)
+        p.add_argument("--pause", type=float, default=2.0)
+        p.add_argument("--traffic-pairs", type=int, default=3)
+        p.add_argument("--aodv-timeout", type=float, default=3.0)
+        p.add_argument("--aodv-hello", type=float, default=1.0)
+        p.add_argument("--aodv-hello-loss", type=int, default=2)
+        p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("run", help="run a single simulation")
+    p.add_argument("--protocol", default="AODV")
+    add_scenario(p)
+    add_output(p)
+    p.add_argument("--retries", type=int, default=3,
+                   help="attempts for transient failures (timeout, OOM)")
+    add_warmup(p)
+    add_early_stop(p)
+    add_recording(p)
+    add_parallel(p)
+    p.set_defaults(func=cmd_run)
+
+    def add_surrogate(p, required=False):
+        p.add_argument("--surrogate", action="append", metavar="RESULTS", required=required,
+                       help="train the surrogate model on these result files / service caches (repeatable)")
+        p.add_argument("--surrogate-pdr", type=float, default=2.0,
+                       help="confident: 95%% interval of the predicted PDR within +-this many points")
+        p.add_argument("--surrogate-delay", type=float, default=0.10,
+                       help="confident: 95%% interval of the predicted delay within +-this fraction")
+
+    p = sub.add_parser("sweep", help="run every configuration of a JSON sweep spec")
+    p.add_argument("spec", help="sweep spec file (JSON)")
+    add_output(p)
+    add_execution(p)
+    add_surrogate(p)
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("suggest", help="rank sweep points by surrogate uncertainty: what to simulate next")
+    p.add_argument("spec", help="sweep spec file (JSON): its grid points are the candidates")
+    p.add_argument("-n", "--count", type=int, default=10, help="points to list")
+    p.add_argument("--samples", type=int, default=0,
+                   help="also rank this many random points between the grid values")
+    add_surrogate(p, required=True)
+    add_output(p)
+    p.set_defaults(func=cmd_suggest)
+
+    p = sub.add_parser("compare", help="Monte Carlo comparison of protocols")
+    p.add_argument("--protocols", nargs="+", help="default: all GUI comparison protocols")
+    p.add_argument("--runs", type=int, default=5, help="Monte Carlo runs per protocol")
+    p.add_argument("--crn", action="store_true",
+                   help="common random numbers: same mobility/traffic per seed, paired analysis")
+    p.add_argument("--antithetic", action="store_true", help="add an antithetic run for every seed")
+    add_scenario(p)
+    add_output(p)
+    add_execution(p)
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("warmup", help="pilot run: detect the warm-up period, recommend sim-time-limit")
+    p.add_argument("--protocol", default="AODV")
+    add_scenario(p)
+    add_pilot(p)
+    add_parallel(p)
+    add_output(p)
+    p.set_defaults(func=cmd_warmup)
+
+    p = sub.add_parser("analyze", help="bootstrap CIs and pairwise protocol tests of result files")
+    p.add_argument("results", nargs="+", help="result files (JSON lines or .csv)")
+    p.add_argument("--spec", help="sweep spec: its grid keys define the scenarios")
+    p.add_argument("--by", nargs="+", metavar="KEY", help="result columns that define a scenario")
+    p.add_argument("--metrics", nargs="+", help="result columns to analyze (default: pdr avg_delay avg_hops)")
+    p.add_argument("--paired", action="store_true", help="paired by seed (results of a --crn run)")
+    p.add_argument("--correction", choices=CORRECTIONS, default=DEFAULT_CORRECTION,
+                   help="multiple-comparison correction per scenario and metric")
+    p.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    p.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES, help="bootstrap/permutation replicates")
+    add_output(p)
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("serve", help="run the shared simulation service (queue, fair share, result cache)")
+    p.add_argument("--listen", default=f"127.0.0.1:{SERVICE_PORT}",
+                   help="unix:/path/to/socket or a loopback host:port (default: %(default)s); over TCP "
+                        "the user is just the client's --user claim, a Unix socket uses the peer's uid")
+    p.add_argument("--socket-mode", type=_mode_value,
+                   help="permissions of the Unix socket, octal (default: owner and group; 666 lets every local "
+                        "user in)")
+    p.add_argument("--socket-group", help="group of the Unix socket, e.g. one all analysts are in")
+    p.add_argument("-j", "--jobs", type=int, help="parallel opp_run processes (default: CPU count)")
+    p.add_argument("--retries", type=int, default=3, help="attempts per run for transient failures")
+    p.add_argument("--cache", help="result cache file (default: <results>/service_cache.jsonl)")
+    p.add_argument("--share", action="append", type=_share_value, metavar="USER=SHARES",
+                   help="fair-share weight of a user (default 1; repeatable)")
+    add_cluster(p)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("worker", help="run jobs for a coordinator (sweep/compare/serve --coordinator)")
+    p.add_argument("--coordinator", required=True, metavar="HOST:PORT", help="coordinator address")
+    p.add_argument("-j", "--jobs", type=int, help="parallel opp_run processes (default: CPU count)")
+    p.add_argument("--name", help="worker name (default: <hostname>-<pid>)")
+    p.set_defaults(func=cmd_worker)
+
+    def add_service(p):
+        p.add_argument("--service", default=os.environ.get("MANET_SERVICE", f"127.0.0.1:{SERVICE_PORT}"),
+                       help="service address (default: $MANET_SERVICE or %(default)s)")
+        p.add_argument("--user", help="user name for fair share (default: login name; "
+                                      "a Unix-socket service uses the peer's uid)")
+
+    p = sub.add_parser("submit", help="submit a sweep spec to a running service and collect its results")
+    p.add_argument("spec", help="sweep spec file (JSON)")
+    p.add_argument("--priority", type=int, default=0, help="lower runs earlier (among your own jobs)")
+    add_service(p)
+    add_output(p)
+    add_early_stop(p)
+    add_recording(p)
+    p.set_defaults(func=cmd_submit)
+
+    p = sub.add_parser("gui", help="start the GUI as a client of a running service")
+    add_service(p)
+    p.set_defaults(func=cmd_gui)
+
+    p = sub.add_parser("parse", help="parse the newest .sca file")
+    p.add_argument("--results-dir", help="default: <working-dir>/results")
+    add_output(p)
+    p.set_defaults(func=cmd_parse)
+    return parser
+
+
+def run_cli(argv: List[str]) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _check_partitionable(parser, args)
+    import logging  # after parse_args: --help exits without it
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, stream=sys.stderr)
+    return args.func(args)
@@ -0,0 +1,618 @@
+"""
+Multi-host worker pool: a coordinator hands runs to workers on other machines
+
+    python main.py sweep sweep.json --coordinator 0.0.0.0:8766 -o results.csv
+    python main.py --omnet ... --working-dir ... worker --coordinator head:8766 -j 8   # on every host
+
+Each worker is a process with its own OMNeT++/INET installation and
+working directory. It connects to the coordinator over TCP, announces how
+many runs it takes at once and pulls jobs: the coordinator only sends a job
+to a worker that has asked for one. The worker runs it through a local
+JobQueue (memory admission, worker copies of its OmnetManager) and pushes
+back the parsed stats, optionally with the zlib-compressed result files.
+
+On the coordinator, ClusterRunner is the JobQueue runner, so retries,
+runtime prediction, fair share (serve --coordinator) and the GUI work as
+with local runs. Workers send a heartbeat every HEARTBEAT_INTERVAL seconds;
+a worker whose connection drops or that stays silent for
+HEARTBEAT_TIMEOUT is dropped and its jobs go back to the front of the
+queue for the next free worker (a job that loses MAX_REASSIGNMENTS workers
+fails as a crash). A worker that loses its coordinator cancels its runs
+and reconnects.
+
+Protocol: one TCP connection per worker, one JSON object per line; a
+message with "size" is followed by that many bytes (result files).
+
+    worker -> coordinator
+        hello      {"name", "host", "slots"}
+        pull       {"count"}            free slots: the coordinator may send count more jobs
+        heartbeat  {"running": [job ids]}
+        result     {"job", "stats", "seconds", "files": [{"name", "size"}]} + compressed files
+        failure    {"job", "kind", "error"}
+    coordinator -> worker
+        welcome    {"worker_id", "heartbeat"}
+        assign     {"job", "config", "early_stop", "timeout_retries", "oom_retries", "files"}
+        cancel     {"job"}
+
+There is no authentication: bind the coordinator to a trusted network.
+"""
+import collections
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from defaults import CLUSTER_PORT
+from instrumentation import FailureKind
+from job_queue import JobQueue, JobStatus, SimulationJob
+from scheduler import ResourceAdmission, SimulationFailure, default_job_config
+from service import ServiceError, ServiceRunner, service_job_config, validate_config
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 5.0  # seconds between worker heartbeats
+HEARTBEAT_TIMEOUT = 3 * HEARTBEAT_INTERVAL  # silent this long -> the worker is considered dead
+MAX_REASSIGNMENTS = 3  # workers a job may lose before it fails
+RECONNECT_DELAY = (1.0, 30.0)  # worker reconnect backoff: first and longest delay (seconds)
+CLUSTER_RESULTS_DIR = "cluster"  # fetched result files: results/cluster/<worker>/job<id>/
+MAX_LINE = 1 << 20  # longest accepted message line (bytes)
+
+
+def parse_cluster_address(address: str) -> Tuple[str, int]:
+    """'host:port', ':port' or 'host' -> (host, port)"""
+    host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+    return host or "0.0.0.0", int(port or CLUSTER_PORT)
+
+
+class Connection:
+    """Message framing on a socket: JSON lines, each optionally followed by a binary payload"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.rfile = sock.makefile("rb")
+        self._send_lock = threading.Lock()
+
+    def send(self, message: Dict, payload: bytes = b""):
+        if payload:
+            message = dict(message, size=len(payload))
+        data = (json.dumps(message, default=str) + "\n").encode("utf-8") + payload
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def receive(self) -> Optional[Tuple[Dict, bytes]]:
+        """Next (message, payload); None once the peer has closed the connection"""
+        line = self.rfile.readline(MAX_LINE)
+        if not line:
+            return None
+        message = json.loads(line)
+        size = int(message.get("size", 0))
+        payload = self.rfile.read(size) if size else b""
+        if len(payload) < size:
+            return None
+        return message, payload
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def pack_files(paths: List[str]) -> Tuple[List[Dict], bytes]:
+    """zlib-compress files for a result message: (file entries, concatenated payload)"""
+    entries, chunks = [], []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = zlib.compress(f.read(), 6)
+        entries.append({"name": os.path.basename(path), "size": len(data)})
+        chunks.append(data)
+    return entries, b"".join(chunks)
+
+
+def unpack_files(entries: List[Dict], payload: bytes, directory: str) -> List[str]:
+    """Write the files of a result message into directory; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths, offset = [], 0
+    for entry in entries:
+        data = payload[offset:offset + entry["size"]]
+        offset += entry["size"]
+        path = os.path.join(directory, os.path.basename(entry["name"]))
+        with open(path, "wb") as f:
+            f.write(zlib.decompress(data))
+        paths.append(path)
+    return paths
+
+
+def result_files(stats: Dict) -> List[str]:
+    """The run's .sca file and the vector files next to it"""
+    sca = stats.get("result_file")
+    if not sca or not os.path.exists(sca):
+        return []
+    stem = os.path.splitext(sca)[0]
+    return [sca] + [stem + ext for ext in (".vec", ".vci") if os.path.exists(stem + ext)]
+
+
+# --- Coordinator ---
+
+@dataclass(eq=False)
+class _Task:
+    """A coordinator job waiting for, or running on, a worker"""
+    job_id: int
+    config: Dict
+    early_stop: Optional[Dict] = None
+    timeout_retries: int = 0
+    oom_retries: int = 0
+    worker: Optional["WorkerInfo"] = None
+    reassignments: int = 0
+    cancel_requested: bool = False
+    stats: Optional[Dict] = None
+    seconds: Optional[float] = None
+    failure: Optional[Tuple[str, str]] = None  # (FailureKind, message)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def finish(self, stats: Optional[Dict] = None, seconds: Optional[float] = None,
+               failure: Optional[Tuple[str, str]] = None):
+        self.stats, self.seconds, self.failure = stats, seconds, failure
+        self.done.set()
+
+
+@dataclass(eq=False)
+class WorkerInfo:
+    """A registered worker as the coordinator sees it"""
+    worker_id: int
+    name: str
+    host: str
+    slots: int
+    connection: Connection = field(repr=False)
+    credit: int = 0  # jobs the worker has asked for and not received yet
+    tasks: Dict[int, _Task] = field(default_factory=dict, repr=False)  # job_id -> task
+    last_seen: float = field(default_factory=time.time)
+    completed: int = 0
+
+    def to_dict(self) -> Dict:
+        return {"worker_id": self.worker_id, "name": self.name, "host": self.host, "slots": self.slots,
+                "running": sorted(self.tasks), "completed": self.completed,
+                "last_seen": round(time.time() - self.last_seen, 1)}
+
+
+class _CoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    """One worker connection: registration, then messages until it closes"""
+
+    def handle(self):
+        coordinator: Coordinator = self.server.coordinator
+        connection = Connection(self.request)
+        worker = None
+        try:
+            hello = connection.receive()
+            if hello is None or hello[0].get("type") != "hello":
+                return
+            worker = coordinator._register(hello[0], connection, self.client_address[0])
+            while True:
+                received = connection.receive()
+                if received is None:
+                    break
+                coordinator._handle(worker, *received)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Worker connection {self.client_address}: {e}")
+        finally:
+            if worker is not None:
+                coordinator._drop(worker, "disconnected")
+            connection.close()
+
+
+class Coordinator:
+    """
+    Accepts workers on a TCP address and runs tasks on them.
+
+    run() blocks until a worker has returned the job's stats (or raises
+    SimulationFailure), so one JobQueue thread waits per job in flight;
+    on_capacity(slots) is called whenever workers come or go so the queue
+    can match its concurrency to the pool.
+    """
+
+    def __init__(self, address: str = f"0.0.0.0:{CLUSTER_PORT}", results_dir: Optional[str] = None,
+                 fetch_files: bool = False, heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+                 on_capacity: Optional[Callable[[int], None]] = None):
+        self.address = parse_cluster_address(address)
+        self.results_dir = results_dir
+        self.fetch_files = fetch_files
+        self.heartbeat_timeout = heartbeat_timeout
+        self.on_capacity = on_capacity
+        self.workers: Dict[int, WorkerInfo] = {}
+        self._pending: collections.deque = collections.deque()
+        self._tasks: Dict[int, _Task] = {}
+        self._worker_ids = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._server: Optional[_CoordinatorServer] = None
+
+    @property
+    def capacity(self) -> int:
+        with self._lock:
+            return sum(w.slots for w in self.workers.values())
+
+    def start(self) -> "Coordinator":
+        self._server = _CoordinatorServer(self.address, _WorkerHandler)
+        self._server.coordinator = self
+        self.address = self._server.server_address[:2]  # port 0 -> the port actually bound
+        threading.Thread(target=self._server.serve_forever, name="ClusterCoordinator", daemon=True).start()
+        threading.Thread(target=self._monitor, name="ClusterMonitor", daemon=True).start()
+        logger.info(f"Coordinator listening on {self.address[0]}:{self.address[1]}")
+        return self
+
+    def stop(self):
+        """Close every worker connection and fail the tasks still in flight as cancelled"""
+        self._stopping.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        with self._lock:
+            workers = list(self.workers.values())
+            tasks = list(self._tasks.values())
+            self.workers.clear()
+            self._pending.clear()
+        for worker in workers:
+            worker.connection.close()
+        for task in tasks:
+            if not task.done.is_set():
+                task.finish(failure=(FailureKind.CANCELLED, "coordinator stopped"))
+
+    # --- Jobs ---
+
+    def run(self, job_id: int, config: Dict, early_stop: Optional[Dict] = None,
+            timeout_retries: int = 0, oom_retries: int = 0) -> Tuple[Dict, Optional[float]]:
+        """Run a job on the next free worker; (stats, run seconds on the worker)"""
+        task = _Task(job_id, config, early_stop, timeout_retries, oom_retries)
+        with self._lock:
+            self._tasks[job_id] = task
+            self._pending.append(task)
+        self._dispatch()
+        task.done.wait()
+        with self._lock:
+            self._tasks.pop(job_id, None)
+        if task.failure is not None:
+            raise SimulationFailure(*task.failure)
+        return task.stats, task.seconds
+
+    def cancel(self, job_id: int):
+        with self._lock:
+            task = self._tasks.get(job_id)
+            if task is None:
+                return
+            task.cancel_requested = True
+            worker = task.worker
+            if worker is None:
+                if task in self._pending:
+                    self._pending.remove(task)
+                task.finish(failure=(FailureKind.CANCELLED, ""))
+                return
+        self._send(worker, {"type": "cancel", "job": job_id})
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {"workers": [w.to_dict() for w in self.workers.values()],
+                    "slots": sum(w.slots for w in self.workers.values()), "pending": len(self._pending)}
+
+    # --- Workers ---
+
+    def _register(self, hello: Dict, connection: Connection, peer: str) -> WorkerInfo:
+        with self._lock:
+            self._worker_ids += 1
+            worker = WorkerInfo(self._worker_ids, str(hello.get("name") or peer), str(hello.get("host") or peer),
+                                max(1, int(hello.get("slots", 1))), connection)
+            self.workers[worker.worker_id] = worker
+        connection.send({"type": "welcome", "worker_id": worker.worker_id, "heartbeat": HEARTBEAT_INTERVAL})
+        logger.info(f"Worker {worker.name} ({worker.host}) joined with {worker.slots} slots")
+        self._capacity_changed()
+        return worker
+
+    def _drop(self, worker: WorkerInfo, reason: str):
+        """Remove a worker; its jobs go back to the front of the queue"""
+        with self._lock:
+            if self.workers.pop(worker.worker_id, None) is None:
+                return
+            tasks = list(worker.tasks.values())
+            worker.tasks.clear()
+            requeued = 0
+            for task in reversed(tasks):
+                task.worker = None
+                task.reassignments += 1
+                if task.cancel_requested or self._stopping.is_set():
+                    task.finish(failure=(FailureKind.CANCELLED, ""))
+                elif task.reassignments > MAX_REASSIGNMENTS:
+                    task.finish(failure=(FailureKind.CRASH, f"lost {task.reassignments} workers"))
+                else:
+                    self._pending.appendleft(task)
+                    requeued += 1
+        worker.connection.close()
+        if self._stopping.is_set():
+            return
+        logger.warning(f"Worker {worker.name} {reason}"
+                       + (f"; reassigning {requeued} jobs" if requeued else ""))
+        self._capacity_changed()
+        self._dispatch()
+
+    def _handle(self, worker: WorkerInfo, message: Dict, payload: bytes):
+        worker.last_seen = time.time()
+        kind = message.get("type")
+        if kind == "pull":
+            with self._lock:
+                worker.credit += int(message.get("count", 1))
+            self._dispatch()
+        elif kind in ("result", "failure"):
+            with self._lock:
+                task = worker.tasks.pop(message["job"], None)
+                if task is not None:
+                    worker.completed += 1
+            if task is None:
+                return  # reassigned or cancelled meanwhile
+            if kind == "failure":
+                task.finish(failure=(message.get("kind") or FailureKind.CRASH, message.get("error", "")))
+                return
+            stats = dict(message["stats"], worker=worker.name)
+            if message.get("files") and self.results_dir:
+                directory = os.path.join(self.results_dir, CLUSTER_RESULTS_DIR, worker.name, f"job{task.job_id}")
+                paths = unpack_files(message["files"], payload, directory)
+                stats["result_file"] = paths[0]
+            task.finish(stats, message.get("seconds"))
+
+    def _dispatch(self):
+        """Hand pending jobs to workers with credit, least loaded first"""
+        assignments = []
+        with self._lock:
+            while self._pending:
+                ready = [w for w in self.workers.values() if w.credit > 0]
+                if not ready:
+                    break
+                worker = min(ready, key=lambda w: (len(w.tasks) / w.slots, w.worker_id))
+                task = self._pending.popleft()
+                worker.credit -= 1
+                worker.tasks[task.job_id] = task
+                task.worker = worker
+                assignments.append((worker, task))
+        for worker, task in assignments:
+            self._send(worker, {"type": "assign", "job": task.job_id, "config": task.config,
+                                "early_stop": task.early_stop, "timeout_retries": task.timeout_retries,
+                                "oom_retries": task.oom_retries, "files": self.fetch_files})
+
+    def _send(self, worker: WorkerInfo, message: Dict):
+        try:
+            worker.connection.send(message)
+        except OSError as e:
+            self._drop(worker, f"unreachable ({e})")
+
+    def _monitor(self):
+        while not self._stopping.wait(HEARTBEAT_INTERVAL / 2):
+            deadline = time.time() - self.heartbeat_timeout
+            with self._lock:
+                silent = [w for w in self.workers.values() if w.last_seen < deadline]
+            for worker in silent:
+                self._drop(worker, f"missed heartbeats for {self.heartbeat_timeout:.0f}s")
+
+    def _capacity_changed(self):
+        if self.on_capacity is not None:
+            self.on_capacity(self.capacity)
+
+
+class ClusterRunner:
+    """
+    JobQueue runner/canceller that executes jobs on a Coordinator's workers.
+
+    early_stop is an early-stop spec ({"rules", "converge", "options"}, see
+    service.py) applied to jobs that do not bring their own.
+    """
+
+    def __init__(self, coordinator: Coordinator, config_for: Callable = default_job_config,
+                 predictor=None, early_stop: Optional[Dict] = None):
+        self.coordinator = coordinator
+        self.config_for = config_for
+        self.predictor = predictor
+        self.early_stop = early_stop
+
+    def estimate(self, job) -> Optional[float]:
+        """Predicted run seconds (JobQueue estimator hook); None without history"""
+        if self.predictor is None:
+            return None
+        estimate = self.predictor.predict(self.config_for(job))
+        return estimate.seconds if estimate else None
+
+    def __call__(self, job) -> Dict:
+        config = self.config_for(job)
+        stats, seconds = self.coordinator.run(job.job_id, config, job.params.get('early_stop') or self.early_stop,
+                                              job.timeout_retries, job.oom_retries)
+        if self.predictor is not None and seconds and stats.get('stop_reason', 'completed') == 'completed':
+            self.predictor.observe(config, seconds)
+        return stats
+
+    def cancel(self, job):
+        self.coordinator.cancel(job.job_id)
+
+
+# --- Worker ---
+
+WORKER_PARAMS = ('timeout_retries', 'fetch_files')  # assignment fields kept in job params
+
+
+def worker_job_config(job) -> Dict:
+    """create_config kwargs of a job received from the coordinator"""
+    config = service_job_config(job)
+    for key in WORKER_PARAMS:
+        config.pop(key, None)
+    return config
+
+
+class WorkerRunner(ServiceRunner):
+    """ServiceRunner that continues the coordinator's timeout retry count (limits double per retry)"""
+
+    def __call__(self, job) -> Dict:
+        job.timeout_retries = int(job.params.get('timeout_retries', 0))
+        return super().__call__(job)
+
+
+class ClusterWorker:
+    """
+    Worker process: pulls jobs from a coordinator and runs them with a local OmnetManager.
+
+    slots runs execute at once (each in its own worker copy of the manager);
+    with a local ResourceAdmission a run only starts when its memory fits on
+    this host.
+    """
+
+    def __init__(self, manager, address: str, slots: Optional[int] = None, name: Optional[str] = None,
+                 predictor=None):
+        self.manager = manager
+        self.address = parse_cluster_address(address)
+        self.slots = slots or os.cpu_count() or 1
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.admission = ResourceAdmission()
+        self.runner = WorkerRunner(manager, worker_job_config, self.admission, predictor)
+        self.queue = JobQueue(self.runner, self.runner.cancel, max_workers=self.slots, admission=self.admission)
+        self.queue.listeners.append(self._on_job)
+        self.completed = 0
+        self._connection: Optional[Connection] = None
+        self._remote: Dict[int, Tuple[Connection, int]] = {}  # local job_id -> (connection, coordinator job)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def run(self):
+        """Serve the coordinator until stop(); reconnects with backoff when the connection is lost"""
+        delay = RECONNECT_DELAY[0]
+        while not self._stopping.is_set():
+            try:
+                sock = socket.create_connection(self.address, timeout=10)
+            except OSError as e:
+                logger.warning(f"Coordinator {self.address[0]}:{self.address[1]} unreachable ({e}); "
+                               f"retrying in {delay:.0f}s")
+                self._stopping.wait(delay)
+                delay = min(delay * 2, RECONNECT_DELAY[1])
+                continue
+            delay = RECONNECT_DELAY[0]
+            sock.settimeout(None)
+            try:
+                self._session(Connection(sock))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Connection to the coordinator lost: {e}")
+            if not self._stopping.is_set():
+                self._stopping.wait(delay)
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            connection = self._connection
+        if connection is not None:
+            connection.close()
+        self.queue.cancel_all()
+        self.queue.stop()
+
+    def _session(self, connection: Connection):
+        connection.send({"type": "hello", "name": self.name, "host": socket.gethostname(), "slots": self.slots})
+        welcome = connection.receive()
+        if welcome is None or welcome[0].get("type") != "welcome":
+            connection.close()
+            return
+        interval = float(welcome[0].get("heartbeat", HEARTBEAT_INTERVAL))
+        logger.info(f"Registered with the coordinator as worker {welcome[0].get('worker_id')} ({self.slots} slots)")
+        with self._lock:
+            self._connection = connection
+        ended = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(connection, interval, ended), daemon=True).start()
+        try:
+            connection.send({"type": "pull", "count": self.slots})
+            while True:
+                received = connection.receive()
+                if received is None:
+                    break
+                message = received[0]
+                if message.get("type") == "assign":
+                    self._assign(connection, message)
+                elif message.get("type") == "cancel":
+                    self._cancel(connection, message["job"])
+        finally:
+            ended.set()
+            with self._lock:
+                self._connection = None
+                orphaned = [local for local, (conn, _) in self._remote.items() if conn is connection]
+                for local in orphaned:
+                    del self._remote[local]
+            # The coordinator has already given these jobs to other workers
+            for local in orphaned:
+                self.queue.cancel(local)
+            connection.close()
+
+    def _assign(self, connection: Connection, message: Dict):
+        config = dict(message["config"])
+        try:
+            validate_config(config)  # the values go into omnetpp.ini; the coordinator is not authenticated
+        except ServiceError as e:
+            logger.warning(f"Job {message['job']} rejected: {e}")
+            connection.send({"type": "failure", "job": message["job"], "kind": FailureKind.CONFIG_ERROR,
+                             "error": str(e)})
+            connection.send({"type": "pull", "count": 1})
+            return
+        params = dict(config, timeout_retries=message.get("timeout_retries", 0))
+        if message.get("early_stop"):
+            params['early_stop'] = message["early_stop"]
+        if message.get("files"):
+            params['fetch_files'] = True
+        # Paused while the retry counters are set: admission reserves memory by oom_retries
+        self.queue.pause()
+        try:
+            job = self.queue.submit(config['protocol'], int(config.get('seed', 0)), params)
+            job.oom_retries = int(message.get("oom_retries", 0))
+            with self._lock:
+                self._remote[job.job_id] = (connection, message["job"])
+        finally:
+            self.queue.resume()
+        logger.info(f"Job {message['job']}: {config['protocol']} seed={config.get('seed')}")
+
+    def _cancel(self, connection: Connection, remote_id: int):
+        with self._lock:
+            local = next((local for local, (conn, remote) in self._remote.items()
+                          if conn is connection and remote == remote_id), None)
+        if local is not None:
+            self.queue.cancel(local)
+
+    def _on_job(self, job: SimulationJob):
+        if not job.finished:
+            return
+        with self._lock:
+            connection, remote_id = self._remote.pop(job.job_id, (None, None))
+        self.queue.clear_finished()
+        if connection is None:
+            return
+        try:
+            if job.status == JobStatus.DONE:
+                files, payload = (pack_files(result_files(job.result)) if job.params.get('fetch_files')
+                                  else ([], b""))
+                connection.send({"type": "result", "job": remote_id, "stats": job.result,
+                                 "seconds": job.finished_at - job.started_at, "files": files}, payload)
+                self.completed += 1
+            else:
+                connection.send({"type": "failure", "job": remote_id,
+                                 "kind": job.failure or (FailureKind.CANCELLED if job.status == JobStatus.CANCELLED
+                                                         else FailureKind.CRASH),
+                                 "error": job.error})
+            connection.send({"type": "pull", "count": 1})
+        except OSError as e:
+            logger.warning(f"Could not report job {remote_id}: {e}")
+
+    def _heartbeat(self, connection: Connection, interval: float, ended: threading.Event):
+        while not ended.wait(interval):
+            with self._lock:
+                running = [remote for conn, remote in self._remote.values() if conn is connection]
+            try:
+                connection.send({"type": "heartbeat", "running": running})
+            except OSError:
+                return
@@ -0,0 +1,173 @@
+"""
+Live result dashboard for the MANET Simulator GUI
+
+Embeds a matplotlib figure (FigureCanvasTkAgg) showing PDR, delay and hop
+count per protocol. Results are pre-aggregated into running mean/stdev
+summaries as they arrive, redraws are throttled, and existing bar/whisker
+artists are updated in place instead of re-creating the figure - so the
+cost of a redraw depends on the number of protocols, not of results.
+
+Whiskers show ±1 std dev while results stream in; show_intervals() replaces
+them with bootstrap confidence intervals (significance.analyze) until the
+protocol's next result arrives.
+
+matplotlib is imported only when a ResultsDashboard is constructed.
+"""
+import queue
+import time
+from typing import Dict, List, Tuple
+
+from metrics import RunningStats
+
+DASHBOARD_METRICS = [
+    ('pdr', 'PDR (%)'),
+    ('avg_delay', 'Delay (ms)'),
+    ('avg_hops', 'Hop Count'),
+]
+DASHBOARD_COLORS = ['#2ecc71', '#3498db', '#e74c3c', '#f39c12', '#9b59b6', '#1abc9c']
+DASHBOARD_REDRAW_MS = 500  # Minimum interval between redraws
+
+
+class ResultAggregator:
+    """Running mean/stdev per protocol and metric"""
+
+    def __init__(self):
+        self.summaries: Dict[str, Dict[str, RunningStats]] = {}
+
+    def add(self, protocol: str, stats: Dict):
+        summary = self.summaries.setdefault(
+            protocol, {metric: RunningStats() for metric, _ in DASHBOARD_METRICS}
+        )
+        for metric, _ in DASHBOARD_METRICS:
+            if metric in stats:
+                summary[metric].add(float(stats[metric]))
+
+    def clear(self):
+        self.summaries = {}
+
+    def series(self, metric: str) -> Tuple[List[str], List[float], List[float], List[int]]:
+        protocols = list(self.summaries)
+        running = [self.summaries[p][metric] for p in protocols]
+        return (protocols, [r.mean for r in running], [r.stdev for r in running],
+                [r.count for r in running])
+
+
+class ResultsDashboard:
+    """Embedded, incrementally updated comparison charts"""
+
+    def __init__(self, parent, min_interval_ms: int = DASHBOARD_REDRAW_MS):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.parent = parent
+        self.min_interval_ms = min_interval_ms
+        self.aggregator = ResultAggregator()
+        self.pending = queue.SimpleQueue()  # filled from worker threads
+        self._dirty = False
+        self._last_draw = 0.0
+        self._artists: Dict[str, Dict] = {}
+        self.intervals: Dict[str, Dict[str, Tuple[float, float]]] = {}  # {metric: {protocol: (low, high)}}
+
+        self.figure = Figure(figsize=(8, 3), dpi=100)
+        self.axes = dict(zip((m for m, _ in DASHBOARD_METRICS), self.figure.subplots(1, len(DASHBOARD_METRICS))))
+        for metric, title in DASHBOARD_METRICS:
+            self._setup_axis(metric, title)
+        self.figure.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=parent)
+        self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.canvas.draw_idle()
+        self.parent.after(self.min_interval_ms, self._tick)
+
+    def submit(self, protocol: str, stats: Dict):
+        """Queue one run's results (safe to call from any thread)"""
+        self.pending.put((protocol, dict(stats)))
+
+    def show_intervals(self, report):
+        """Use the confidence intervals of a SignificanceReport (first scenario) as whiskers"""
+        table = report.table
+        self.intervals = {
+            metric: {protocol: (float(report.ci_low[0, p, k]), float(report.ci_high[0, p, k]))
+                     for p, protocol in enumerate(table.protocols) if report.count[0, p, k] > 1}
+            for k, metric in enumerate(table.metrics)
+        }
+        self._dirty = True
+
+    def clear(self):
+        self.aggregator.clear()
+        self._artists = {}
+        self.intervals = {}
+        for metric, title in DASHBOARD_METRICS:
+            self.axes[metric].clear()
+            self._setup_axis(metric, title)
+        self.canvas.draw_idle()
+
+    def refresh(self):
+        """Redraw immediately (e.g. when the dashboard tab is shown)"""
+        self._drain()
+        self._redraw()
+
+    def _tick(self):
+        self._drain()
+        if self._dirty and (time.monotonic() - self._last_draw) * 1000 >= self.min_interval_ms:
+            self._redraw()
+        self.parent.after(self.min_interval_ms, self._tick)
+
+    def _drain(self):
+        try:
+            while True:
+                protocol, stats = self.pending.get_nowait()
+                self.aggregator.add(protocol, stats)
+                for intervals in self.intervals.values():
+                    intervals.pop(protocol, None)  # stale now
+                self._dirty = True
+        except queue.Empty:
+            pass
+
+    def _redraw(self):
+        for metric, title in DASHBOARD_METRICS:
+            self._update_axis(metric, title)
+        self.canvas.draw_idle()
+        self._dirty = False
+        self._last_draw = time.monotonic()
+
+    def _setup_axis(self, metric: str, title: str):
+        ax = self.axes[metric]
+        ax.set_title(title, fontsize=10)
+        ax.grid(axis='y', alpha=0.3)
+        if metric == 'pdr':
+            ax.set_ylim(0, 105)
+            ax.axhline(y=50, color='gray', linestyle='--', alpha=0.5)
+
+    def _update_axis(self, metric: str, title: str):
+        ax = self.axes[metric]
+        protocols, means, stds, _ = self.aggregator.series(metric)
+        intervals = self.intervals.get(metric, {})
+        lows = [intervals.get(p, (m - s, m + s))[0] for p, m, s in zip(protocols, means, stds)]
+        highs = [intervals.get(p, (m - s, m + s))[1] for p, m, s in zip(protocols, means, stds)]
+        x = list(range(len(protocols)))
+        artists = self._artists.get(metric)
+
+        if artists is None or artists['protocols'] != protocols:
+            # Protocol set changed (rare): rebuild this axis once
+            ax.clear()
+            self._setup_axis(metric, title)
+            colors = [DASHBOARD_COLORS[i % len(DASHBOARD_COLORS)] for i in x]
+            bars = ax.bar(x, means, color=colors, edgecolor='black', linewidth=1.0, alpha=0.8)
+            whiskers = ax.vlines(x, lows, highs, colors='black')
+            labels = [ax.text(xi, 0, '', ha='center', va='bottom', fontsize=8) for xi in x]
+            ax.set_xticks(x)
+            ax.set_xticklabels(protocols, fontsize=8, rotation=30)
+            artists = {'protocols': protocols, 'bars': bars, 'whiskers': whiskers, 'labels': labels}
+            self._artists[metric] = artists
+
+        for bar, mean in zip(artists['bars'], means):
+            bar.set_height(mean)
+        artists['whiskers'].set_segments([[(xi, low), (xi, high)] for xi, low, high in zip(x, lows, highs)])
+        for label, xi, mean, high in zip(artists['labels'], x, means, highs):
+            label.set_position((xi, high))
+            label.set_text(f"{mean:.1f}")
+
+        if metric != 'pdr' and means:
+            top = max(highs)
+            ax.set_ylim(0, top * 1.25 if top > 0 else 1)
@@ -0,0 +1,22 @@
+"""
+Values shared by cli.py and the modules behind its commands
+
+cli.py builds its parser (and answers --help) without importing service,
+cluster, parsim or the NumPy-based significance module, so the defaults
+both sides need live here, in a module without imports.
+"""
+SERVICE_PORT = 8765  # service.py HTTP API over TCP
+CLUSTER_PORT = 8766  # cluster.py coordinator
+
+# parsim.py: local communications backend -> (OMNeT++ class, prefix option)
+PARSIM_COMMUNICATIONS = {
+    "named_pipes": ("cNamedPipeCommunications", "parsim-namedpipecommunications-prefix"),
+    "file": ("cFileCommunications", "parsim-filecommunications-prefix"),
+}
+DEFAULT_PARSIM_COMMUNICATIONS = "named_pipes"
+
+# significance.py: analyze options
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 2000
+CORRECTIONS = ("holm", "bh", "none")
+DEFAULT_CORRECTION = "holm"
@@ -0,0 +1,254 @@
+"""
+Early termination of running simulations
+
+An EarlyStopPolicy is attached to OmnetManager.early_stop (SimulationRunner
+does this per job). While opp_run is running, a RunMonitor thread polls
+
+    - the run's growing .vec file (udpApp sentPk / rcvdPk / endToEndDelay,
+      recorded with create_config(record_vectors=True)) for the packets
+      sent and received so far and their delays
+    - Cmdenv's progress lines for the simulated time and simsec/sec
+
+and evaluates
+
+    failure rules   "received == 0 after 30s", "pdr < 5 after 60s",
+                    "simrate < 0.01 after 120s" - the run is aborted
+                    (SIGTERM, then SIGKILL) and reported as a failure of
+                    kind "aborted", never as a 0% result
+    convergence     once the batch-means confidence interval of PDR (and
+                    delay) after the warm-up period is narrower than the
+                    tolerance, the run is stopped gracefully: Cmdenv handles
+                    SIGTERM by ending the run and calling finish(), so its
+                    scalars cover the simulated time up to that point
+
+Every run records why it stopped (RunMetrics.stop_reason, the
+'stop_reason' result field): "completed", "converged" or "rule: <rule>".
+
+OMNeT++ buffers vector output (output-vectors-memory-limit, lowered for
+monitored runs) and writes all buffers together, so the monitor sees
+vector data in chunks. Rules on vector metrics (sent, received, pdr,
+delay_ms) are therefore timed by the simulated time the flushed vector data
+covers, not by Cmdenv's current t - a run is never judged on data that is
+still buffered.
+"""
+import logging
+import operator
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from warmup import (BATCH_WIDTH, DELAY_VECTORS, RECEIVED_VECTORS, SENT_VECTORS, VectorTail,
+                    batch_half_width, batch_means)
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 2.0  # seconds between monitor checks
+CONVERGE_MIN_BATCHES = 10
+STOP_COMPLETED = "completed"
+STOP_CONVERGED = "converged"
+
+METRICS = ("t", "sent", "received", "pdr", "delay_ms", "simrate", "elapsed")
+VECTOR_METRICS = ("sent", "received", "pdr", "delay_ms")
+_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+        "==": operator.eq, "!=": operator.ne}
+_RULE = re.compile(r"\s*(\w+)\s*(<=|>=|==|!=|<|>)\s*([0-9.eE+-]+)\s*(?:after\s+([0-9.]+)\s*s?)?\s*$")
+_PROGRESS_T = re.compile(r"\bt=([0-9.eE+-]+)")
+_PROGRESS_RATE = re.compile(r"simsec/sec=([0-9.eE+-]+)")
+
+
+@dataclass
+class StopRule:
+    """Abort when `metric op threshold` holds at simulated time >= after"""
+    metric: str
+    op: str
+    threshold: float
+    after: float = 0.0
+
+    @classmethod
+    def parse(cls, text: str) -> "StopRule":
+        """'received == 0 after 30s', 'pdr < 5 after 60', 'simrate < 0.01'"""
+        match = _RULE.match(text)
+        if not match or match.group(1) not in METRICS:
+            raise ValueError(f"Invalid stop rule '{text}' (expected '<metric> <op> <value> [after <N>s]', "
+                             f"metrics: {', '.join(METRICS)})")
+        return cls(match.group(1), match.group(2), float(match.group(3)), float(match.group(4) or 0.0))
+
+    def matches(self, state: "MonitorState") -> bool:
+        reached = state.vector_t if self.metric in VECTOR_METRICS else state.t
+        if reached < self.after:
+            return False
+        value = state.value(self.metric)
+        return value is not None and _OPS[self.op](value, self.threshold)
+
+    def __str__(self) -> str:
+        return f"{self.metric} {self.op} {self.threshold:g}" + (f" after {self.after:g}s" if self.after else "")
+
+
+DEFAULT_RULES = ("received == 0 after 30s",)
+
+
+@dataclass
+class Convergence:
+    """Stop once PDR (and delay) batch means are precise enough after the warm-up period"""
+    pdr_tolerance: float = 1.0  # CI half-width, percentage points
+    delay_tolerance: Optional[float] = 0.05  # relative to the mean delay, None: ignore delay
+    batch_width: float = BATCH_WIDTH
+    min_batches: int = CONVERGE_MIN_BATCHES
+    confidence: float = 0.95
+
+    def converged(self, state: "MonitorState", warmup: float) -> bool:
+        pdr = batch_means(state.pdr_bins(self.batch_width), warmup, self.batch_width)
+        if len(pdr) < self.min_batches or batch_half_width(pdr, self.confidence) > self.pdr_tolerance:
+            return False
+        if self.delay_tolerance is None:
+            return True
+        delay = batch_means(state.delays, warmup, self.batch_width)
+        if len(delay) < self.min_batches:
+            return False
+        mean = sum(delay) / len(delay)
+        return batch_half_width(delay, self.confidence) <= self.delay_tolerance * mean
+
+
+@dataclass
+class EarlyStopPolicy:
+    rules: List[StopRule] = field(default_factory=list)
+    convergence: Optional[Convergence] = None
+    poll_interval: float = POLL_INTERVAL
+
+    @classmethod
+    def from_strings(cls, rules, converge: bool = False, **convergence_options) -> "EarlyStopPolicy":
+        return cls([StopRule.parse(r) for r in rules],
+                   Convergence(**convergence_options) if converge else None)
+
+    @property
+    def needs_vectors(self) -> bool:
+        """Whether the run must record the application vectors"""
+        return self.convergence is not None or any(r.metric in VECTOR_METRICS for r in self.rules)
+
+    def check(self, state: "MonitorState", warmup: float = 0.0) -> Optional[Tuple[str, bool]]:
+        """(stop reason, abort) or None to keep running"""
+        for rule in self.rules:
+            if rule.matches(state):
+                return f"rule: {rule}", True
+        if self.convergence is not None and self.convergence.converged(state, warmup):
+            return STOP_CONVERGED, False
+        return None
+
+
+class MonitorState:
+    """What is known about a running simulation"""
+
+    def __init__(self):
+        self.t = 0.0  # simulated time reached (Cmdenv progress)
+        self.vector_t = 0.0  # simulated time covered by the vector data written so far
+        self.simrate: Optional[float] = None  # simsec/sec (Cmdenv)
+        self.started = time.monotonic()
+        self.sent_times: List[float] = []
+        self.received_times: List[float] = []
+        self.delays: List[Tuple[float, float]] = []  # (time, ms)
+
+    @property
+    def sent(self) -> int:
+        return len(self.sent_times)
+
+    @property
+    def received(self) -> int:
+        return len(self.received_times)
+
+    def value(self, metric: str) -> Optional[float]:
+        if metric == "pdr":
+            return 100.0 * self.received / self.sent if self.sent else None
+        if metric == "delay_ms":
+            return sum(d for _, d in self.delays) / len(self.delays) if self.delays else None
+        if metric == "elapsed":
+            return time.monotonic() - self.started
+        return getattr(self, metric)
+
+    def add_vectors(self, samples: Dict[str, List[Tuple[float, float]]]):
+        for prefix in SENT_VECTORS:
+            self.sent_times.extend(t for t, _ in samples.get(prefix, ()))
+        for prefix in RECEIVED_VECTORS:
+            self.received_times.extend(t for t, _ in samples.get(prefix, ()))
+        for prefix in DELAY_VECTORS:
+            self.delays.extend((t, v * 1000.0) for t, v in samples.get(prefix, ()))
+        latest = [t for values in samples.values() for t, _ in values]
+        if latest:
+            self.vector_t = max(self.vector_t, max(latest))
+            self.t = max(self.t, self.vector_t)
+
+    def add_output(self, lines: List[str]):
+        """Cmdenv progress lines: '** Event #... t=12.5 ...' and '... simsec/sec=3.2 ...'"""
+        for line in lines:
+            match = _PROGRESS_T.search(line)
+            if match and line.lstrip().startswith("**"):
+                self.t = max(self.t, float(match.group(1)))
+            match = _PROGRESS_RATE.search(line)
+            if match:
+                self.simrate = float(match.group(1))
+
+    def pdr_bins(self, width: float) -> List[Tuple[float, float]]:
+        """(bin start, PDR %) per width-second bin of send times"""
+        sent: Dict[int, int] = {}
+        received: Dict[int, int] = {}
+        for t in self.sent_times:
+            sent[int(t // width)] = sent.get(int(t // width), 0) + 1
+        for t in self.received_times:
+            received[int(t // width)] = received.get(int(t // width), 0) + 1
+        return [(k * width, 100.0 * min(received.get(k, 0), n) / n) for k, n in sorted(sent.items())]
+
+
+class RunMonitor(threading.Thread):
+    """
+    Polls a running simulation and calls stop(reason, abort) once the policy
+    fires. output is the list the stdout reader appends Cmdenv lines to;
+    vector_files are the run's .vec files (one per partition of a parallel run).
+    """
+
+    def __init__(self, policy: EarlyStopPolicy, vector_files: Sequence[str], output: List[str],
+                 stop: Callable[[str, bool], None], warmup: float = 0.0):
+        super().__init__(name="RunMonitor", daemon=True)
+        self.policy = policy
+        self.state = MonitorState()
+        self.output = output
+        self.stop_callback = stop
+        self.warmup = warmup
+        self.tails = [VectorTail(path, SENT_VECTORS + RECEIVED_VECTORS + DELAY_VECTORS) for path in vector_files]
+        self._finished = threading.Event()
+        self._seen_lines = 0
+        self.decision: Optional[Tuple[str, bool]] = None
+
+    def finish(self):
+        self._finished.set()
+
+    def poll(self):
+        for tail in self.tails:
+            self.state.add_vectors(tail.poll())
+        count = len(self.output)
+        self.state.add_output(self.output[self._seen_lines:count])
+        self._seen_lines = count
+
+    def run(self):
+        while not self._finished.wait(self.policy.poll_interval):
+            try:
+                self.poll()
+                decision = self.policy.check(self.state, self.warmup)
+            except Exception as e:  # a monitoring problem must never kill the run
+                logger.warning(f"Run monitor error: {e}")
+                continue
+            if decision is not None:
+                self.decision = decision
+                logger.info(f"Stopping run early at t={self.state.t:g}s: {decision[0]}")
+                self.stop_callback(*decision)
+                return
+
+
+def format_stop_reasons(records: List[Dict]) -> str:
+    """'12 completed, 3 converged, 1 rule: received == 0 after 30s'"""
+    counts: Dict[str, int] = {}
+    for record in records:
+        reason = record.get('stop_reason') or record.get('failure') or 'unknown'
+        counts[reason] = counts.get(reason, 0) + 1
+    return ", ".join(f"{n} {reason}" for reason, n in sorted(counts.items(), key=lambda kv: -kv[1]))
+
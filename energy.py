@@ -0,0 +1,154 @@
+"""
+Array-backed energy accounting for MANET simulator
+
+EnergyBank keeps residual energy and per-state power of every node in NumPy
+arrays. Idle drain is applied to all nodes with one vector operation per time
+step, TX/RX charges are applied in batches, and node deaths are predicted from
+the idle drain rate and kept in a min-heap instead of polling each node.
+"""
+import heapq
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import EnergyModel, Event
+
+
+class EnergyBank:
+    """Residual energy and power figures for all nodes"""
+
+    def __init__(self, node_ids: Sequence[str], initial_energy=100.0,
+                 tx_power=0.66, rx_power=0.395, idle_power=0.035, start_time: float = 0.0):
+        self.node_ids = list(node_ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        n = len(self.node_ids)
+
+        self.initial = np.broadcast_to(np.asarray(initial_energy, dtype=float), (n,)).copy()
+        self.residual = self.initial.copy()
+        self.tx_power = np.broadcast_to(np.asarray(tx_power, dtype=float), (n,)).copy()
+        self.rx_power = np.broadcast_to(np.asarray(rx_power, dtype=float), (n,)).copy()
+        self.idle_power = np.broadcast_to(np.asarray(idle_power, dtype=float), (n,)).copy()
+        self.alive = self.residual > 0
+        self.death_time = np.full(n, np.inf)
+        self.current_time = start_time
+
+        # Death prediction heap: (time, version, index); stale entries skipped lazily
+        self._version = np.zeros(n, dtype=np.int64)
+        self._heap: List[Tuple[float, int, int]] = []
+        self._reschedule(np.arange(n))
+
+    @classmethod
+    def from_models(cls, models: Dict[str, EnergyModel], start_time: float = 0.0) -> "EnergyBank":
+        """Build a bank from per-node EnergyModel instances"""
+        node_ids = list(models)
+        bank = cls(
+            node_ids,
+            initial_energy=[models[n].initial_energy for n in node_ids],
+            tx_power=[models[n].tx_power for n in node_ids],
+            rx_power=[models[n].rx_power for n in node_ids],
+            idle_power=[models[n].idle_power for n in node_ids],
+            start_time=start_time,
+        )
+        bank.residual[:] = [models[n].current_energy for n in node_ids]
+        bank.alive[:] = bank.residual > 0
+        bank._reschedule(np.arange(len(node_ids)))
+        return bank
+
+    def write_back(self, models: Dict[str, EnergyModel]):
+        """Copy residual energy back into EnergyModel instances (-1 = dead)"""
+        for node_id, i in self.index.items():
+            models[node_id].current_energy = float(self.residual[i]) if self.alive[i] else -1
+
+    def _indices(self, nodes: Iterable) -> np.ndarray:
+        return np.fromiter((self.index[n] for n in nodes), dtype=np.int64)
+
+    def _reschedule(self, idx: np.ndarray):
+        """Predict depletion time under idle drain for the given node indices"""
+        idx = idx[self.alive[idx]]
+        if idx.size == 0:
+            return
+        self._version[idx] += 1
+        with np.errstate(divide="ignore"):
+            eta = self.current_time + np.where(
+                self.idle_power[idx] > 0,
+                np.maximum(self.residual[idx], 0.0) / self.idle_power[idx],
+                np.where(self.residual[idx] > 0, np.inf, 0.0),
+            )
+        for t, v, i in zip(eta.tolist(), self._version[idx].tolist(), idx.tolist()):
+            if t != np.inf:
+                heapq.heappush(self._heap, (t, v, i))
+
+    def _charge(self, power: np.ndarray, nodes: Iterable, durations) -> np.ndarray:
+        idx = self._indices(nodes)
+        if idx.size == 0:
+            return idx
+        energy = power[idx] * np.broadcast_to(np.asarray(durations, dtype=float), idx.shape)
+        np.subtract.at(self.residual, idx, energy)
+        idx = np.unique(idx)
+        self._reschedule(idx)
+        return idx
+
+    def charge_tx(self, nodes: Iterable, durations):
+        """Charge transmission energy for a batch of (node, duration) pairs"""
+        self._charge(self.tx_power, nodes, durations)
+
+    def charge_rx(self, nodes: Iterable, durations):
+        """Charge reception energy for a batch of (node, duration) pairs"""
+        self._charge(self.rx_power, nodes, durations)
+
+    def next_death_time(self) -> float:
+        """Earliest predicted depletion time (inf if none)"""
+        while self._heap:
+            t, version, i = self._heap[0]
+            if self.alive[i] and version == self._version[i]:
+                return t
+            heapq.heappop(self._heap)
+        return float("inf")
+
+    def advance(self, now: float) -> List[Tuple[str, float]]:
+        """
+        Apply idle drain to all alive nodes up to `now`.
+
+        Returns (node_id, death_time) for nodes depleted in the interval,
+        ordered by death time.
+        """
+        dt = now - self.current_time
+        if dt < 0:
+            raise ValueError(f"Cannot advance energy clock backwards ({self.current_time} -> {now})")
+
+        deaths = []
+        while self._heap and self._heap[0][0] <= now:
+            t, version, i = heapq.heappop(self._heap)
+            if self.alive[i] and version == self._version[i]:
+                deaths.append((self.node_ids[i], max(t, self.current_time)))
+                self.alive[i] = False
+                self.death_time[i] = max(t, self.current_time)
+
+        self.residual -= np.where(self.alive, self.idle_power * dt, 0.0)
+        for node_id, t in deaths:
+            self.residual[self.index[node_id]] = 0.0
+        self.current_time = now
+        return deaths
+
+    def death_events(self, until: float, priority: int = 0) -> List[Event]:
+        """Advance to `until` and return NODE_DEATH events for depleted nodes"""
+        return [
+            Event(event_type="NODE_DEATH", timestamp=t, source_node=node_id, priority=priority)
+            for node_id, t in self.advance(until)
+        ]
+
+    def is_alive(self, node_id: str) -> bool:
+        return bool(self.alive[self.index[node_id]])
+
+    def energy_percentage(self) -> np.ndarray:
+        """Remaining energy percentage of every node"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.initial > 0, np.maximum(self.residual, 0.0) / self.initial * 100, 0.0)
+
+    def alive_count(self) -> int:
+        return int(self.alive.sum())
+
+    def first_death_time(self) -> Optional[float]:
+        """Network lifetime (time of first node death) if any node has died"""
+        t = float(self.death_time.min()) if len(self.node_ids) else np.inf
+        return None if t == np.inf else t
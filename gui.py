@@ -1,28 +1,105 @@
 """
 MANET Simulator GUI - OMNeT++ / INETMANET-3.x Controller
 
-With Monte Carlo support and Graph visualization.
+With Monte Carlo support and live dashboard visualization.
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
 import logging
+import time
+import queue
+import shutil
+import tempfile
+import os
+from collections import deque
 
 # Import our manager module
-from omnet_manager import OmnetManager
+from omnet_manager import OmnetManager, COMPARE_PROTOCOLS, GENERIC_NETWORK
+from dashboard import ResultsDashboard
+from early_stop import DEFAULT_RULES, STOP_COMPLETED, EarlyStopPolicy, format_stop_reasons
+from job_queue import JobQueue, JobStatus
+from parsim import check_partitionable
+from recording import DEFAULT_PROFILE, PROFILES
+from runtime_model import RUNTIME_HISTORY_FILE, RuntimePredictor, format_duration
+from scheduler import ResourceAdmission, RetryPolicy, SimulationRunner
+from service import RemoteJobQueue, ServiceClient, ServiceError
+from significance import ResultTable, analyze, format_ci, format_tests
+from variance_reduction import PairedResults, format_comparison, rank_paired
+from warmup import DEFAULT_PILOT_TIME, format_warmup, run_pilot
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Log pump settings
+LOG_DRAIN_INTERVAL_MS = 100   # How often the Tk main loop drains queued log records
+LOG_BATCH_SIZE = 500          # Max records inserted per drain
+LOG_MAX_LINES = 5000          # Lines retained in the text widget (ring buffer)
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+JOB_PANEL_REFRESH_MS = 500    # Job list refresh interval
+
+
+class LogPump:
+    """
+    Thread-safe log pipeline.
+    
+    Worker threads only enqueue records; the Tk main loop drains them in
+    batches. The most recent LOG_MAX_LINES records are kept in memory for
+    re-filtering, while every record is appended to a temporary file that
+    backs "Save Full Log".
+    """
+    
+    def __init__(self, max_lines=LOG_MAX_LINES):
+        self.queue = queue.SimpleQueue()
+        self.lines = deque(maxlen=max_lines)  # (level, text)
+        self.min_level = "INFO"
+        self._file = tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", prefix="manet_gui_", suffix=".log", delete=False
+        )
+    
+    def put(self, message, level="INFO"):
+        self.queue.put((level, str(message)))
+    
+    def drain(self, limit=LOG_BATCH_SIZE):
+        """Take up to `limit` queued records; returns (records, more_pending)"""
+        records = []
+        try:
+            while len(records) < limit:
+                records.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        if records:
+            self._file.writelines(f"[{level}] {text}\n" for level, text in records)
+            self._file.flush()
+            self.lines.extend(records)
+        return records, not self.queue.empty()
+    
+    def is_visible(self, level):
+        return LOG_LEVELS.get(level, 20) >= LOG_LEVELS[self.min_level]
+    
+    def format(self, records):
+        return "".join(f"> {text}\n" for level, text in records if self.is_visible(level))
+    
+    def save(self, path):
+        self._file.flush()
+        shutil.copyfile(self._file.name, path)
+    
+    def close(self):
+        self._file.close()
+        try:
+            os.remove(self._file.name)
+        except OSError:
+            pass
+
 
 class MANETSimulatorGUI:
     """
     OMNeT++ Control Panel with Monte Carlo and Graph support.
     """
     
-    def __init__(self, root):
+    def __init__(self, root, service=None, user=None):
         self.root = root
         self.root.title("MANET Simulator - OMNeT++ Controller")
         
@@ -35,19 +112,50 @@ class MANETSimulatorGUI:
         center_y = int(screen_height/2 - window_height/2)
         self.root.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
 
-        # Initialize OMNeT++ Manager
+        # Initialize OMNeT++ Manager (optional as a service client: only pilot runs are local)
         try:
             self.omnet_manager = OmnetManager()
             logger.info("OMNeT++ Manager successfully initialized")
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to initialize OMNeT++ Manager:\n{str(e)}")
+            if not service:
+                messagebox.showerror("Error", f"Failed to initialize OMNeT++ Manager:\n{str(e)}")
             self.omnet_manager = None
 
+        # Job queue: memory-admitted parallel runs, can be paused/cancelled/reordered;
+        # transient failures (timeout, OOM) are retried with backoff. Runtimes
+        # predicted from past runs order jobs longest-first and give the ETA.
+        # With a service address the runs go to the shared simulation service instead.
+        self.job_queue = None
+        self.runner = None
+        self.service = service
+        if service:
+            client = ServiceClient(service, user)
+            self.job_queue = RemoteJobQueue(client, self._params_config, self._early_stop_spec)
+            self.job_queue.listeners.append(self._on_job_update)
+        elif self.omnet_manager:
+            self.admission = ResourceAdmission()
+            self.predictor = RuntimePredictor(os.path.join(self.omnet_manager.results_dir, RUNTIME_HISTORY_FILE))
+            self.runner = SimulationRunner(self.omnet_manager, self._job_config, self.admission, self.predictor)
+            self.job_queue = JobQueue(self.runner, self.runner.cancel, max_workers=1,
+                                      admission=self.admission, retry_policy=RetryPolicy(),
+                                      estimator=self.runner)
+            self.job_queue.listeners.append(self._on_job_update)
+
+        self.pilot_manager = None  # warm-up pilot runs (created on first use)
+
         # Storage for Monte Carlo results (for graphing)
-        self.monte_carlo_results = {}  # {protocol: [pdr1, pdr2, ...]}
+        self.monte_carlo_results = {}  # {protocol: [result dict of each completed run, ...]}
+        self.paired_results = PairedResults()  # per-seed PDR for paired comparison
+        self.results_paired = False  # CRN setting of the runs the stored results come from
+        
+        # Worker threads log through the pump; the main loop drains it
+        self.log_pump = LogPump()
+        self.root.protocol("WM_DELETE_WINDOW", self.shutdown)
         
         # Create GUI widgets
         self.create_widgets()
+        self.root.after(LOG_DRAIN_INTERVAL_MS, self._drain_logs)
+        self.root.after(JOB_PANEL_REFRESH_MS, self._refresh_job_panel)
 
     def create_widgets(self):
         # --- Main Frame ---
@@ -142,6 +250,58 @@ class MANETSimulatorGUI:
         self.aodv_hello_loss_entry = ttk.Entry(settings_frame, textvariable=self.aodv_hello_loss_var, width=8)
         self.aodv_hello_loss_entry.grid(row=3, column=5, padx=5, pady=5)
 
+        # --- Row 4: Variance Reduction ---
+        self.crn_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings_frame, text="Common random numbers (paired comparison)", variable=self.crn_var
+        ).grid(row=4, column=0, columnspan=3, padx=5, pady=5, sticky="w")
+        self.antithetic_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings_frame, text="Antithetic seeds", variable=self.antithetic_var
+        ).grid(row=4, column=3, columnspan=2, padx=5, pady=5, sticky="w")
+
+        parallel_frame = ttk.Frame(settings_frame)
+        parallel_frame.grid(row=4, column=5, padx=5, pady=5)
+        ttk.Label(parallel_frame, text="Parallel:").pack(side=tk.LEFT)
+        self.parallel_var = tk.StringVar(value="1")
+        ttk.Spinbox(parallel_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.parallel_var,
+                    width=3).pack(side=tk.LEFT)
+
+        # --- Row 5: Warm-up and Early Stop ---
+        self.auto_warmup_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings_frame, text=f"Auto warm-up (MSER-5 on a {DEFAULT_PILOT_TIME} pilot run)",
+            variable=self.auto_warmup_var
+        ).grid(row=5, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+        self.early_stop_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings_frame, text="Early stop (abort if nothing delivered, stop when converged)",
+            variable=self.early_stop_var
+        ).grid(row=5, column=4, columnspan=2, padx=5, pady=5, sticky="w")
+
+        # --- Row 6: Result Recording ---
+        ttk.Label(settings_frame, text="Recording:").grid(row=6, column=0, padx=5, pady=5, sticky="w")
+        self.recording_var = tk.StringVar(value=DEFAULT_PROFILE)
+        ttk.Combobox(
+            settings_frame, textvariable=self.recording_var, values=list(PROFILES), state="readonly", width=10
+        ).grid(row=6, column=1, padx=5, pady=5)
+        ttk.Label(settings_frame, text="('full' records every scalar, for debugging)").grid(
+            row=6, column=2, columnspan=2, padx=5, pady=5, sticky="w")
+
+        # PDES: one large scenario split over several opp_run processes
+        ttk.Label(settings_frame, text="Partitions:").grid(row=6, column=4, padx=5, pady=5, sticky="w")
+        self.partitions_var = tk.StringVar(value="1")
+        ttk.Spinbox(settings_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.partitions_var,
+                    width=3).grid(row=6, column=5, padx=5, pady=5)
+
+        # --- Row 7: NED network (PDES needs a model whose hosts are connected by links) ---
+        ttk.Label(settings_frame, text="Network:").grid(row=7, column=0, padx=5, pady=5, sticky="w")
+        self.network_var = tk.StringVar(value="")
+        ttk.Entry(settings_frame, textvariable=self.network_var, width=30).grid(
+            row=7, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+        ttk.Label(settings_frame, text="(blank: GenericManetNetwork, which cannot be partitioned)").grid(
+            row=7, column=3, columnspan=3, padx=5, pady=5, sticky="w")
+
         # Pause time (hidden but needed)
         self.pause_var = tk.StringVar(value="2.0")
 
@@ -185,30 +345,205 @@ class MANETSimulatorGUI:
         ttk.Button(
             btn_frame, 
             text="Exit", 
-            command=self.root.quit
+            command=self.shutdown
         ).pack(side=tk.LEFT, padx=5)
 
-        # --- Results Panel ---
-        results_frame = ttk.LabelFrame(main_frame, text="Simulation Results & Logs", padding="10")
-        results_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        # --- Results Panel (Logs / Dashboard tabs) ---
+        self.results_notebook = ttk.Notebook(main_frame)
+        self.results_notebook.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        results_frame = ttk.Frame(self.results_notebook, padding="10")
+        self.results_notebook.add(results_frame, text="Simulation Results & Logs")
+
+        log_bar = ttk.Frame(results_frame)
+        log_bar.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(log_bar, text="Level:").pack(side=tk.LEFT)
+        self.log_level_var = tk.StringVar(value=self.log_pump.min_level)
+        log_level_combo = ttk.Combobox(
+            log_bar,
+            textvariable=self.log_level_var,
+            values=list(LOG_LEVELS),
+            state="readonly",
+            width=9
+        )
+        log_level_combo.pack(side=tk.LEFT, padx=5)
+        log_level_combo.bind("<<ComboboxSelected>>", self._on_log_level_changed)
+        ttk.Button(log_bar, text="💾 Save Full Log", command=self.save_full_log).pack(side=tk.RIGHT)
 
         self.log_text = scrolledtext.ScrolledText(results_frame, height=18, font=("Consolas", 9))
         self.log_text.pack(fill=tk.BOTH, expand=True)
+
+        self.dashboard_frame = ttk.Frame(self.results_notebook, padding="5")
+        self.results_notebook.add(self.dashboard_frame, text="📈 Dashboard")
+        try:
+            self.dashboard = ResultsDashboard(self.dashboard_frame)
+        except ImportError:
+            self.dashboard = None
+            ttk.Label(
+                self.dashboard_frame,
+                text="matplotlib is required for the dashboard.\nInstall with: pip install matplotlib"
+            ).pack(expand=True)
+
+        self._create_job_panel()
         
         # Initial message
         self.log("System ready.")
+        if self.service:
+            self.log(f"• Runs are submitted to the simulation service at {self.service} as {self.job_queue.client.user}")
         self.log("• 'Run Selected Protocol' - Monte Carlo simulation for one protocol")
         self.log("• 'Compare All Protocols' - Run all protocols with same settings")
-        self.log("• 'Show Graph' - Display comparison chart (after running simulations)")
-
-    def log(self, message):
-        """Writes message to the text box in the GUI."""
-        self.log_text.insert(tk.END, f"> {message}\n")
+        self.log("• 'Show Graph' - Open the live dashboard (updates as each run completes)")
+
+    def _create_job_panel(self):
+        """Jobs tab: queued/running/done jobs with cancel, pause and priority controls."""
+        jobs_frame = ttk.Frame(self.results_notebook, padding="5")
+        self.results_notebook.add(jobs_frame, text="🗂 Jobs")
+
+        job_bar = ttk.Frame(jobs_frame)
+        job_bar.pack(fill=tk.X, pady=(0, 5))
+        self.pause_btn = ttk.Button(job_bar, text="⏸ Pause Queue", command=self.toggle_pause)
+        self.pause_btn.pack(side=tk.LEFT, padx=2)
+        ttk.Button(job_bar, text="✖ Cancel", command=self.cancel_selected_jobs).pack(side=tk.LEFT, padx=2)
+        ttk.Button(job_bar, text="✖ Cancel All", command=self.cancel_all_jobs).pack(side=tk.LEFT, padx=2)
+        ttk.Button(job_bar, text="▲ Priority", command=lambda: self.move_selected_jobs(-1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(job_bar, text="▼ Priority", command=lambda: self.move_selected_jobs(1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(job_bar, text="Clear Finished", command=self.clear_finished_jobs).pack(side=tk.RIGHT, padx=2)
+        self.eta_label = ttk.Label(job_bar, text="")
+        self.eta_label.pack(side=tk.RIGHT, padx=10)
+
+        columns = ("id", "protocol", "seed", "priority", "status", "elapsed", "estimate")
+        self.job_tree = ttk.Treeview(jobs_frame, columns=columns, show="headings", selectmode="extended")
+        for column, width in zip(columns, (50, 90, 60, 70, 90, 80, 80)):
+            self.job_tree.heading(column, text=column.capitalize())
+            self.job_tree.column(column, width=width, anchor=tk.CENTER)
+        self.job_tree.pack(fill=tk.BOTH, expand=True)
+
+    def _refresh_job_panel(self):
+        """Sync the job list with the queue (runs in the Tk main loop)."""
+        if self.job_queue:
+            now = time.time()
+            jobs = self.job_queue.jobs()
+            current = set(self.job_tree.get_children())
+            for index, job in enumerate(jobs):
+                iid = str(job.job_id)
+                elapsed = ""
+                if job.started_at:
+                    elapsed = f"{(job.finished_at or now) - job.started_at:.0f}s"
+                status = job.status
+                if job.failure and job.status in (JobStatus.QUEUED, JobStatus.FAILED):
+                    status = f"{job.status} ({job.failure})"
+                estimate = format_duration(job.estimated_seconds) if job.estimated_seconds else ""
+                values = (job.job_id, job.protocol, job.seed, job.priority, status, elapsed, estimate)
+                if iid in current:
+                    self.job_tree.item(iid, values=values)
+                    current.discard(iid)
+                else:
+                    self.job_tree.insert("", tk.END, iid=iid, values=values)
+                self.job_tree.move(iid, "", index)
+            for iid in current:
+                self.job_tree.delete(iid)
+            pending = self.job_queue.pending_count()
+            self.eta_label.config(text=f"{pending} pending, ETA {format_duration(self.job_queue.eta())}"
+                                  if pending else "")
+        self.root.after(JOB_PANEL_REFRESH_MS, self._refresh_job_panel)
+
+    def _selected_job_ids(self):
+        return [int(iid) for iid in self.job_tree.selection()]
+
+    def toggle_pause(self):
+        if not self.job_queue:
+            return
+        try:
+            if self.job_queue.paused:
+                self.job_queue.resume()
+                self.pause_btn.config(text="⏸ Pause Queue")
+                self.log("Job queue resumed.")
+            else:
+                self.job_queue.pause()
+                self.pause_btn.config(text="▶ Resume Queue")
+                self.log("Job queue paused (the running job will finish).")
+        except ServiceError as e:
+            self.log(f"ERROR: {e.message}", level="ERROR")
+
+    def cancel_selected_jobs(self):
+        if not self.job_queue:
+            return
+        for job_id in self._selected_job_ids():
+            if self.job_queue.cancel(job_id):
+                self.log(f"Job {job_id} cancelled.", level="WARNING")
+
+    def cancel_all_jobs(self):
+        if self.job_queue and messagebox.askyesno("Cancel All", "Cancel all queued and running jobs?"):
+            self.job_queue.cancel_all()
+            self.log("All jobs cancelled. Completed results are kept.", level="WARNING")
+
+    def move_selected_jobs(self, delta):
+        if self.job_queue:
+            for job_id in self._selected_job_ids():
+                self.job_queue.move(job_id, delta)
+
+    def clear_finished_jobs(self):
+        if self.job_queue:
+            self.job_queue.clear_finished()
+
+    def log(self, message, level="INFO"):
+        """Queue a message for the log box (safe to call from any thread)."""
+        self.log_pump.put(message, level)
+
+    def _drain_logs(self):
+        """Insert queued log records in one batch (runs in the Tk main loop)."""
+        records, more_pending = self.log_pump.drain()
+        text = self.log_pump.format(records)
+        if text:
+            self.log_text.insert(tk.END, text)
+            self._trim_log_widget()
+            self.log_text.see(tk.END)
+        # Catch up quickly while a backlog exists, otherwise poll at the normal rate
+        self.root.after(1 if more_pending else LOG_DRAIN_INTERVAL_MS, self._drain_logs)
+
+    def _trim_log_widget(self):
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        excess = line_count - LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+
+    def _on_log_level_changed(self, event=None):
+        """Re-render retained records with the new level filter."""
+        self.log_pump.min_level = self.log_level_var.get()
+        self.log_text.delete(1.0, tk.END)
+        self.log_text.insert(tk.END, self.log_pump.format(self.log_pump.lines))
+        self._trim_log_widget()
         self.log_text.see(tk.END)
 
+    def save_full_log(self):
+        """Save every record of this session (not only the retained lines)."""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".log",
+            filetypes=[("Log files", "*.log"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            self.log_pump.save(path)
+            self.log(f"Full log saved to {path}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save log:\n{e}")
+
+    def shutdown(self):
+        """Close the application, stop running jobs and remove the temporary log file."""
+        if self.job_queue:
+            self.job_queue.stop()
+        self.log_pump.close()
+        self.root.quit()
+
     def clear_results(self):
         """Clear all stored results and log."""
         self.monte_carlo_results = {}
+        self.paired_results.clear()
+        self.results_paired = False
+        if self.dashboard:
+            self.dashboard.clear()
+        self.log_pump.lines.clear()
         self.log_text.delete(1.0, tk.END)
         self.log("Results cleared.")
         self.graph_btn.config(state=tk.DISABLED)
@@ -231,41 +566,53 @@ class MANETSimulatorGUI:
                 'aodv_timeout': float(self.aodv_timeout_var.get()),
                 'aodv_hello': float(self.aodv_hello_var.get()),
                 'aodv_hello_loss': int(self.aodv_hello_loss_var.get()),
+                'common_random_numbers': self.crn_var.get(),
+                'antithetic': False,  # set per job; antithetic_pairs adds the mirrored runs
+                'antithetic_pairs': self.antithetic_var.get(),
+                'parallel_runs': max(1, int(self.parallel_var.get())),
+                'auto_warmup': self.auto_warmup_var.get(),
+                'early_stop': self.early_stop_var.get(),
+                'recording': self.recording_var.get(),
+                'partitions': max(1, int(self.partitions_var.get())),
+                'network_name': self.network_var.get().strip() or None,
             }
+            check_partitionable(params['network_name'] or GENERIC_NETWORK, params['partitions'])
             return params
         except ValueError as e:
-            self.log(f"ERROR: Invalid parameter value - {e}")
+            self.log(f"ERROR: Invalid parameter value - {e}", level="ERROR")
             return None
 
     def start_simulation_thread(self):
-        """Run single protocol simulation in thread."""
-        if not self.omnet_manager:
+        """Run single protocol simulation in thread (Tk variables are read here, on the main thread)."""
+        if not self.job_queue:
             messagebox.showerror("Error", "OMNeT++ Manager not initialized.")
             return
+        params = self.get_params()
+        if not params:
+            return
         
         self.run_btn.config(state=tk.DISABLED)
         self.compare_btn.config(state=tk.DISABLED)
         self.log("Starting simulation...")
-        threading.Thread(target=self.run_single_protocol, daemon=True).start()
+        threading.Thread(target=self.run_single_protocol, args=(params,), daemon=True).start()
 
     def start_comparison_thread(self):
-        """Run all protocols comparison in thread."""
-        if not self.omnet_manager:
+        """Run all protocols comparison in thread (Tk variables are read here, on the main thread)."""
+        if not self.job_queue:
             messagebox.showerror("Error", "OMNeT++ Manager not initialized.")
             return
+        params = self.get_params()
+        if not params:
+            return
         
         self.run_btn.config(state=tk.DISABLED)
         self.compare_btn.config(state=tk.DISABLED)
         self.log("Starting protocol comparison...")
-        threading.Thread(target=self.run_all_protocols, daemon=True).start()
+        threading.Thread(target=self.run_all_protocols, args=(params,), daemon=True).start()
 
-    def run_single_protocol(self):
+    def run_single_protocol(self, params):
         """Run Monte Carlo simulation for selected protocol."""
         try:
-            params = self.get_params()
-            if not params:
-                return
-
             protocol = params['protocol']
             monte_carlo_runs = params['monte_carlo_runs']
             
@@ -274,30 +621,27 @@ class MANETSimulatorGUI:
             self.log(f"Monte Carlo Runs: {monte_carlo_runs}")
             self.log(f"{'='*50}")
 
-            pdr_results = self._run_monte_carlo(protocol, params)
+            results = self._run_monte_carlo(protocol, params)
             
-            if pdr_results:
-                self.monte_carlo_results[protocol] = pdr_results
-                self._display_statistics(protocol, pdr_results)
-                self.graph_btn.config(state=tk.NORMAL)
+            if results:
+                self.monte_carlo_results[protocol] = results
+                self.results_paired = params['common_random_numbers']
+                self._display_statistics(protocol, results)
+                self.root.after(0, lambda: self.graph_btn.config(state=tk.NORMAL))
 
         except Exception as e:
-            self.log(f"ERROR: {str(e)}")
+            self.log(f"ERROR: {str(e)}", level="ERROR")
             import traceback
-            self.log(traceback.format_exc())
+            self.log(traceback.format_exc(), level="ERROR")
         finally:
             self.root.after(0, lambda: self.run_btn.config(state=tk.NORMAL))
             self.root.after(0, lambda: self.compare_btn.config(state=tk.NORMAL))
 
-    def run_all_protocols(self):
+    def run_all_protocols(self, params):
         """Run Monte Carlo for all protocols."""
         try:
-            params = self.get_params()
-            if not params:
-                return
-
             # Protocols to compare (excluding DSDV which has issues)
-            protocols = ["AODV", "DSR", "OLSR", "DYMO", "BATMAN"]
+            protocols = COMPARE_PROTOCOLS
             
             self.log(f"\n{'='*60}")
             self.log(f"🔬 PROTOCOL COMPARISON - Monte Carlo x{params['monte_carlo_runs']}")
@@ -306,209 +650,227 @@ class MANETSimulatorGUI:
 
             # Clear previous results
             self.monte_carlo_results = {}
-
-            for protocol in protocols:
-                self.log(f"\n--- Running {protocol} ---")
-                pdr_results = self._run_monte_carlo(protocol, params)
+            self.paired_results.clear()
+            self.results_paired = params['common_random_numbers']
+            if params['common_random_numbers']:
+                self.log("Common random numbers: identical mobility/traffic per seed across protocols")
+
+            # Queue the whole sweep up front so it can be reordered in the Jobs tab
+            batches = [(protocol, self._submit_monte_carlo(protocol, params)) for protocol in protocols]
+            total = sum(len(jobs) for _, jobs in batches)
+            self.log(f"Queued {total} runs, estimated time: {format_duration(self.job_queue.eta())}")
+
+            for protocol, jobs in batches:
+                self.log(f"\n--- Waiting for {protocol} ---")
+                results = self._collect_results(jobs)
                 
-                if pdr_results:
-                    self.monte_carlo_results[protocol] = pdr_results
-                    self._display_statistics(protocol, pdr_results, compact=True)
+                if results:
+                    self.monte_carlo_results[protocol] = results
+                    self._display_statistics(protocol, results, compact=True)
 
             # Final Summary
             self._display_final_summary()
-            self.graph_btn.config(state=tk.NORMAL)
+            self.root.after(0, lambda: self.graph_btn.config(state=tk.NORMAL))
 
         except Exception as e:
-            self.log(f"ERROR: {str(e)}")
+            self.log(f"ERROR: {str(e)}", level="ERROR")
             import traceback
-            self.log(traceback.format_exc())
+            self.log(traceback.format_exc(), level="ERROR")
         finally:
             self.root.after(0, lambda: self.run_btn.config(state=tk.NORMAL))
             self.root.after(0, lambda: self.compare_btn.config(state=tk.NORMAL))
 
     def _run_monte_carlo(self, protocol, params):
-        """Run Monte Carlo simulation and return PDR results."""
-        pdr_results = []
-        
+        """Run Monte Carlo simulation and return the results of the completed runs."""
+        return self._collect_results(self._submit_monte_carlo(protocol, params))
+
+    def _submit_monte_carlo(self, protocol, params):
+        """Queue one job per seed (plus its antithetic run if enabled) and return the jobs."""
+        if params.get('auto_warmup'):
+            params = dict(params, warmup_period=self._pilot_warmup(protocol, params))
+        self.job_queue.set_max_workers(params['parallel_runs'])
+        if self.runner is not None:
+            self.runner.early_stop = (EarlyStopPolicy.from_strings(DEFAULT_RULES, converge=True)
+                                      if params.get('early_stop') else None)
+        jobs = []
         for run_idx in range(params['monte_carlo_runs']):
-            current_seed = params['start_seed'] + run_idx
-            
-            # Create config
-            self.omnet_manager.create_config(
-                protocol=protocol,
-                num_nodes=params['num_nodes'],
-                sim_time_limit=params['sim_time'],
-                aodv_timeout=params['aodv_timeout'],
-                aodv_hello_interval=params['aodv_hello'],
-                aodv_hello_loss=params['aodv_hello_loss'],
-                seed=current_seed,
-                num_traffic_pairs=params['traffic_pairs'],
-                area_size=f"{params['area_size']}m",
-                radio_range=params['radio_range'],
-                min_speed=params['min_speed'],
-                max_speed=params['max_speed'],
-                pause_time=params['pause_time']
-            )
-            
-            # Run simulation
-            success = self.omnet_manager.run_simulation()
-            
-            if success:
-                stats = self.omnet_manager.parse_results()
-                pdr = stats.get('pdr', 0.0)
-                pdr_results.append(pdr)
-                self.log(f"  Seed {current_seed}: PDR = {pdr:.2f}%")
-            else:
-                self.log(f"  Seed {current_seed}: FAILED")
-                pdr_results.append(0.0)
-        
-        return pdr_results
+            seed = params['start_seed'] + run_idx
+            jobs.append(self.job_queue.submit(protocol, seed, params))
+            if params['antithetic_pairs']:
+                jobs.append(self.job_queue.submit(protocol, seed, dict(params, antithetic=True)))
+        return jobs
+
+    def _collect_results(self, jobs):
+        """Wait for jobs; only completed runs count - failed and cancelled runs are never 0%."""
+        results = []
+        failed = 0
+        stops = []
+        for job in jobs:
+            job.wait()
+            if job.status == JobStatus.DONE:
+                results.append(dict(job.result, protocol=job.protocol, seed=job.seed))
+                self.paired_results.add(job.protocol, job.seed, job.result.get('pdr', 0.0))
+                stops.append(job.result)
+            elif job.status == JobStatus.FAILED:
+                failed += 1
+                stops.append({'failure': job.failure})
+        if failed:
+            self.log(f"  {failed} of {len(jobs)} runs failed and were excluded", level="WARNING")
+        if any(record.get('stop_reason') != STOP_COMPLETED for record in stops):
+            self.log(f"  Stop reasons: {format_stop_reasons(stops)}")
+        return results
+
+    def _pilot_warmup(self, protocol, params):
+        """Pilot run with application vectors -> warm-up period (MSER-5); None if the pilot fails."""
+        if self.omnet_manager is None:
+            self.log("  Auto warm-up needs a local OMNeT++ installation for the pilot run; skipped",
+                     level="WARNING")
+            return None
+        if self.pilot_manager is None:
+            # Own ini file and result directory: the job queue may be running
+            self.pilot_manager = self.omnet_manager.worker_copy("pilot")
+        self.log(f"  Pilot run for {protocol} ({DEFAULT_PILOT_TIME}) to detect the warm-up period...")
+        try:
+            result = run_pilot(self.pilot_manager, self._params_config(protocol, params['start_seed'], params))
+        except Exception as e:
+            self.log(f"  Pilot run failed, no warm-up period applied: {e}", level="WARNING")
+            return None
+        for line in format_warmup(result).splitlines():
+            self.log(f"  {line}", level="INFO" if result.converged else "WARNING")
+        return result.warmup_period
+
+    def _job_config(self, job):
+        """create_config arguments for a job (called by the SimulationRunner)."""
+        return self._params_config(job.protocol, job.seed, job.params)
+
+    def _early_stop_spec(self, params):
+        """Early-stop settings of a job submitted to the service (see service.py)."""
+        if not params.get('early_stop'):
+            return None
+        return {'rules': list(DEFAULT_RULES), 'converge': True}
+
+    def _params_config(self, protocol, seed, params):
+        """create_config arguments from GUI parameters."""
+        return dict(
+            protocol=protocol,
+            num_nodes=params['num_nodes'],
+            sim_time_limit=params['sim_time'],
+            aodv_timeout=params['aodv_timeout'],
+            aodv_hello_interval=params['aodv_hello'],
+            aodv_hello_loss=params['aodv_hello_loss'],
+            seed=seed,
+            num_traffic_pairs=params['traffic_pairs'],
+            area_size=f"{params['area_size']}m",
+            radio_range=params['radio_range'],
+            min_speed=params['min_speed'],
+            max_speed=params['max_speed'],
+            pause_time=params['pause_time'],
+            common_random_numbers=params.get('common_random_numbers', False),
+            antithetic=params.get('antithetic', False),
+            warmup_period=params.get('warmup_period'),
+            recording=params.get('recording', DEFAULT_PROFILE),
+            partitions=params.get('partitions', 1),
+            network_name=params.get('network_name')
+        )
+
+    def _on_job_update(self, job):
+        """Job status listener (worker thread)."""
+        if job.status == JobStatus.DONE:
+            pdr = job.result.get('pdr', 0.0)
+            if self.dashboard:
+                self.dashboard.submit(job.protocol, job.result)
+            self.root.after(0, lambda: self.graph_btn.config(state=tk.NORMAL))
+            self.log(f"  {job.protocol} Seed {job.seed}: PDR = {pdr:.2f}%")
+        elif job.status == JobStatus.FAILED:
+            self.log(f"  {job.protocol} Seed {job.seed}: FAILED ({job.error})", level="WARNING")
+        elif job.status == JobStatus.QUEUED and job.attempts:
+            self.log(f"  {job.protocol} Seed {job.seed}: {job.failure or 'failed'}, retrying "
+                     f"(attempt {job.attempts + 1})", level="WARNING")
+        elif job.status == JobStatus.CANCELLED:
+            self.log(f"  {job.protocol} Seed {job.seed}: CANCELLED", level="WARNING")
+
+    def _analyze_results(self):
+        """Bootstrap intervals and pairwise tests of the stored results (paired in CRN mode)."""
+        records = [record for results in self.monte_carlo_results.values() for record in results]
+        return analyze(ResultTable.from_records(records), paired=bool(self.results_paired))
+
+    def _display_statistics(self, protocol, results, compact=False):
+        """Display statistics for a protocol's results (zero PDR is a result, failed runs are not)."""
+        report = analyze(ResultTable.from_records(results))
+        pdr = [r.get('pdr', 0.0) for r in results]
+        mean, low, high = report.mean[0, 0], report.ci_low[0, 0], report.ci_high[0, 0]
+        std = report.std[0, 0, 0] if report.count[0, 0, 0] > 1 else 0.0
 
-    def _display_statistics(self, protocol, pdr_results, compact=False):
-        """Display statistics for a protocol's results."""
-        import statistics
-        
-        valid_results = [p for p in pdr_results if p > 0]
-        
-        if not valid_results:
-            self.log(f"  No valid results for {protocol}")
-            return
-        
-        avg = statistics.mean(valid_results)
-        std = statistics.stdev(valid_results) if len(valid_results) > 1 else 0
-        min_val = min(valid_results)
-        max_val = max(valid_results)
-        
         if compact:
-            self.log(f"  → {protocol}: Avg={avg:.1f}% ±{std:.1f}% (Min={min_val:.1f}%, Max={max_val:.1f}%)")
+            self.log(f"  → {protocol}: Avg={format_ci(mean[0], low[0], high[0])}% ±{std:.1f}% "
+                     f"(Min={min(pdr):.1f}%, Max={max(pdr):.1f}%)")
         else:
-            self.log(f"\n📊 {protocol} Statistics:")
-            self.log(f"   Average PDR : {avg:.2f}%")
+            self.log(f"\n📊 {protocol} Statistics ({len(pdr)} runs, 95% bootstrap CI):")
+            self.log(f"   Average PDR : {format_ci(mean[0], low[0], high[0])} %")
             self.log(f"   Std Dev     : {std:.2f}%")
-            self.log(f"   Min         : {min_val:.2f}%")
-            self.log(f"   Max         : {max_val:.2f}%")
-            self.log(f"   All values  : {[f'{p:.1f}%' for p in pdr_results]}")
+            self.log(f"   Min         : {min(pdr):.2f}%")
+            self.log(f"   Max         : {max(pdr):.2f}%")
+            self.log(f"   Avg Delay   : {format_ci(mean[1], low[1], high[1])} ms")
+            self.log(f"   Avg Hops    : {format_ci(mean[2], low[2], high[2])}")
+            self.log(f"   All values  : {[f'{p:.1f}%' for p in pdr]}")
 
     def _display_final_summary(self):
         """Display final comparison summary."""
-        import statistics
-        
         self.log(f"\n{'='*60}")
         self.log("📊 FINAL COMPARISON SUMMARY")
         self.log(f"{'='*60}")
-        
-        # Calculate stats and sort by average PDR
-        summary = []
-        for protocol, results in self.monte_carlo_results.items():
-            valid = [p for p in results if p > 0]
-            if valid:
-                avg = statistics.mean(valid)
-                std = statistics.stdev(valid) if len(valid) > 1 else 0
-                summary.append((protocol, avg, std))
-        
-        # Sort by average PDR (descending)
-        summary.sort(key=lambda x: x[1], reverse=True)
-        
-        # Display ranking
+
+        if not self.monte_carlo_results:
+            self.log("  No completed runs", level="WARNING")
+            return
+        report = self._analyze_results()
+        protocols = report.table.protocols
+
+        # Display ranking (by average PDR, with its 95% bootstrap CI)
         medals = ["🥇", "🥈", "🥉", "4.", "5.", "6."]
-        self.log(f"\n{'Rank':<6}{'Protocol':<10}{'Avg PDR':<12}{'Std Dev':<10}")
-        self.log("-" * 40)
+        self.log(f"\n{'Rank':<6}{'Protocol':<10}{'Avg PDR':<10}{'95% CI':<18}{'Std Dev':<10}")
+        self.log("-" * 54)
         
-        for i, (protocol, avg, std) in enumerate(summary):
+        for i, p in enumerate(report.ranking()):
             medal = medals[i] if i < len(medals) else f"{i+1}."
-            self.log(f"{medal:<6}{protocol:<10}{avg:>6.2f}%{std:>10.2f}%")
+            std = report.std[0, p, 0] if report.count[0, p, 0] > 1 else 0.0
+            ci = (f"[{report.ci_low[0, p, 0]:.2f}, {report.ci_high[0, p, 0]:.2f}]"
+                  if report.count[0, p, 0] > 1 else "-")
+            self.log(f"{medal:<6}{protocols[p]:<10}{report.mean[0, p, 0]:>6.2f}%   {ci:<18}{std:>6.2f}%")
+
+        tests = format_tests(report)
+        if tests:
+            self.log(f"\n🔬 PDR differences ({'paired' if report.paired else 'unpaired'} permutation tests, "
+                     f"{report.correction}-adjusted; g: Hedges' g, delta: Cliff's delta):")
+            for line in tests:
+                self.log(f"   {line}")
+
+        if self.results_paired:
+            self._display_paired_summary()
         
         self.log(f"\n{'='*60}")
-        self.log("💡 Click 'Show Graph' to visualize the results!")
+        self.log("💡 Click 'Show Graph' to open the dashboard!")
 
-    def show_graph(self):
-        """Display comparison graph using matplotlib."""
-        if not self.monte_carlo_results:
-            messagebox.showwarning("No Data", "No simulation results to display. Run a simulation first.")
+    def _display_paired_summary(self):
+        """Paired differences between adjacent protocols of the ranking (CRN mode)."""
+        _, comparisons = rank_paired(self.paired_results)
+        if not comparisons:
             return
-        
-        try:
-            import matplotlib.pyplot as plt
-            import statistics
-            import numpy as np
-        except ImportError:
+        self.log("\n🔗 Paired comparison (95% CI of PDR difference, same seeds):")
+        for comparison in comparisons:
+            self.log(f"   {format_comparison(comparison)}")
+
+    def show_graph(self):
+        """Switch to the embedded live dashboard."""
+        if not self.dashboard:
             messagebox.showerror("Error", "matplotlib is required.\nInstall with: pip install matplotlib")
             return
         
-        # Prepare data
-        protocols = []
-        averages = []
-        std_devs = []
-        all_values = []
-        
-        for protocol, results in self.monte_carlo_results.items():
-            valid = [p for p in results if p > 0]
-            if valid:
-                protocols.append(protocol)
-                averages.append(statistics.mean(valid))
-                std_devs.append(statistics.stdev(valid) if len(valid) > 1 else 0)
-                all_values.append(valid)
-        
-        if not protocols:
-            messagebox.showwarning("No Data", "No valid results to display.")
-            return
-        
-        # Sort by average (descending)
-        sorted_data = sorted(zip(protocols, averages, std_devs, all_values), 
-                           key=lambda x: x[1], reverse=True)
-        protocols, averages, std_devs, all_values = zip(*sorted_data)
-        
-        # Create figure with 2 subplots
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-        fig.suptitle('MANET Protocol Performance Comparison (Monte Carlo)', fontsize=14, fontweight='bold')
-        
-        # Colors for protocols
-        colors = ['#2ecc71', '#3498db', '#e74c3c', '#f39c12', '#9b59b6', '#1abc9c']
-        
-        # --- Graph 1: Bar Chart with Error Bars ---
-        x = np.arange(len(protocols))
-        bars = ax1.bar(x, averages, yerr=std_devs, capsize=5, color=colors[:len(protocols)], 
-                       edgecolor='black', linewidth=1.2, alpha=0.8)
-        
-        ax1.set_xlabel('Protocol', fontsize=12)
-        ax1.set_ylabel('Average PDR (%)', fontsize=12)
-        ax1.set_title('Average PDR with Standard Deviation', fontsize=12)
-        ax1.set_xticks(x)
-        ax1.set_xticklabels(protocols, fontsize=11)
-        ax1.set_ylim(0, 100)
-        ax1.axhline(y=50, color='gray', linestyle='--', alpha=0.5, label='50% threshold')
-        ax1.legend()
-        ax1.grid(axis='y', alpha=0.3)
-        
-        # Add value labels on bars
-        for bar, avg, std in zip(bars, averages, std_devs):
-            height = bar.get_height()
-            ax1.annotate(f'{avg:.1f}%\n±{std:.1f}',
-                        xy=(bar.get_x() + bar.get_width() / 2, height),
-                        xytext=(0, 3),
-                        textcoords="offset points",
-                        ha='center', va='bottom', fontsize=9)
-        
-        # --- Graph 2: Box Plot ---
-        bp = ax2.boxplot(all_values, labels=protocols, patch_artist=True)
-        
-        for patch, color in zip(bp['boxes'], colors[:len(protocols)]):
-            patch.set_facecolor(color)
-            patch.set_alpha(0.7)
-        
-        ax2.set_xlabel('Protocol', fontsize=12)
-        ax2.set_ylabel('PDR (%)', fontsize=12)
-        ax2.set_title('PDR Distribution (Box Plot)', fontsize=12)
-        ax2.set_ylim(0, 100)
-        ax2.axhline(y=50, color='gray', linestyle='--', alpha=0.5)
-        ax2.grid(axis='y', alpha=0.3)
-        
-        plt.tight_layout()
-        plt.show()
-        
-        self.log("\n📈 Graph displayed in separate window.")
-
+        self.results_notebook.select(self.dashboard_frame)
+        if self.monte_carlo_results:
+            # Whiskers: 95% bootstrap CI of the mean instead of ±1 std dev
+            self.dashboard.show_intervals(self._analyze_results())
+        self.dashboard.refresh()
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,276 @@
+"""
+Per-run instrumentation for OmnetManager
+
+Every create_config -> run_simulation -> parse_results cycle produces one
+RunMetrics record:
+
+    phases        wall time per phase: config (ini rendering), spawn (fork/exec
+                  of opp_run), setup (library + NED load and network setup, up
+                  to Cmdenv's "Running simulation..." line), simulate (until
+                  the process exits) and parse (.sca parsing)
+    cpu / rss     child user/system CPU seconds and peak RSS from wait4()
+                  (None where wait4 is unavailable, e.g. Windows)
+    result files  sizes of the result files the run wrote
+    failure       why a run failed (FailureKind), from exit status and output
+
+RunRecorder keeps recent records in memory and optionally appends each one
+to a JSON-lines file and rewrites a Prometheus textfile-collector file
+(node_exporter --collector.textfile.directory) with cumulative counters.
+"""
+import json
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+PHASES = ("config", "spawn", "setup", "simulate", "parse")
+RESULT_SUFFIXES = (".sca", ".vec", ".vci", ".elog")
+RUN_HISTORY = 1000  # records kept in memory
+OUTPUT_TAIL_LINES = 20  # stdout/stderr lines kept for failure classification
+
+
+class FailureKind:
+    TIMEOUT = "timeout"  # wall-clock timeout, CPU limit (RLIMIT_CPU or cpu-time-limit)
+    OOM = "oom"  # bad_alloc, RLIMIT_AS, OOM killer
+    CONFIG_ERROR = "config_error"  # failed before "Running simulation..." (ini, NED, library)
+    CRASH = "crash"  # model error or abnormal exit during the run
+    SPAWN_ERROR = "spawn_error"  # opp_run could not be started (EAGAIN, ENOMEM)
+    NO_RESULTS = "no_results"  # exited normally without a result file
+    ABORTED = "aborted"  # stopped by an early-stop failure rule (early_stop.py)
+    CANCELLED = "cancelled"
+
+    TRANSIENT = (TIMEOUT, OOM, SPAWN_ERROR)  # worth retrying
+
+    OOM_PATTERNS = ("bad_alloc", "out of memory", "cannot allocate memory")
+    CPU_LIMIT_PATTERNS = ("cpu time limit reached",)
+
+
+@dataclass
+class RunMetrics:
+    """Instrumentation of one simulation run"""
+    protocol: str = ""
+    seed: int = 0
+    num_nodes: int = 0
+    sim_time_limit: str = ""
+    num_traffic_pairs: int = 0
+    area_size: str = ""
+    radio_range: float = 0.0
+    warmup_period: float = 0.0
+    partitions: int = 1  # opp_run processes of a parallel (PDES) run
+    started_at: float = field(default_factory=time.time)
+    phases: Dict[str, float] = field(default_factory=dict)  # phase -> seconds
+    status: str = "pending"  # ok, failed, cancelled, timeout, aborted
+    returncode: Optional[int] = None
+    cpu_user: Optional[float] = None
+    cpu_system: Optional[float] = None
+    peak_rss_bytes: Optional[int] = None
+    result_files: Dict[str, int] = field(default_factory=dict)  # file name -> bytes
+    setup_done: bool = False  # Cmdenv reached "Running simulation..."
+    failure: str = ""  # FailureKind, empty for successful runs
+    stop_reason: str = ""  # completed, converged, "rule: ..." (early_stop)
+    sim_time_reached: Optional[float] = None  # simulated seconds when an early stop fired
+    output_tail: List[str] = field(default_factory=list)
+    host: str = field(default_factory=socket.gethostname)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + max(0.0, seconds)
+
+    @property
+    def wall_time(self) -> float:
+        return sum(self.phases.values())
+
+    @property
+    def result_bytes(self) -> int:
+        return sum(self.result_files.values())
+
+    def record_rusage(self, usage):
+        """Fill CPU/RSS from a resource.struct_rusage (ru_maxrss is KiB on Linux, bytes on macOS)"""
+        import sys
+
+        self.cpu_user = usage.ru_utime
+        self.cpu_system = usage.ru_stime
+        self.peak_rss_bytes = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+    def record_result_files(self, results_dir: str, prefix: str = ""):
+        """Sizes of result files written since the run started"""
+        directory = Path(results_dir)
+        if not directory.is_dir():
+            return
+        for path in directory.iterdir():
+            if path.suffix in RESULT_SUFFIXES:
+                stat = path.stat()
+                if stat.st_mtime >= self.started_at - 1.0:
+                    self.result_files[prefix + path.name] = stat.st_size
+
+    def hit_cpu_limit(self) -> bool:
+        text = "\n".join(self.output_tail).lower()
+        return any(p in text for p in FailureKind.CPU_LIMIT_PATTERNS)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['wall_time'] = round(self.wall_time, 6)
+        data['result_bytes'] = self.result_bytes
+        return data
+
+
+def classify_failure(run: RunMetrics) -> str:
+    """FailureKind of a run that did not succeed"""
+    if run.status == "cancelled":
+        return FailureKind.CANCELLED
+    if run.status == "aborted":
+        return FailureKind.ABORTED
+    if run.status == "timeout" or run.hit_cpu_limit():
+        return FailureKind.TIMEOUT
+    if run.status == "spawn_error":
+        return FailureKind.SPAWN_ERROR
+    rc = run.returncode
+    if rc is not None and rc == -getattr(signal, "SIGXCPU", -1):
+        return FailureKind.TIMEOUT
+    text = "\n".join(run.output_tail).lower()
+    if any(p in text for p in FailureKind.OOM_PATTERNS):
+        return FailureKind.OOM
+    if rc is not None and rc == -getattr(signal, "SIGKILL", -1):
+        return FailureKind.OOM  # not cancelled by us: almost always the kernel OOM killer
+    if not run.setup_done:
+        return FailureKind.CONFIG_ERROR
+    if rc == 0:
+        return FailureKind.NO_RESULTS
+    return FailureKind.CRASH
+
+
+class RunRecorder:
+    """In-memory history plus optional JSON-lines / Prometheus export"""
+
+    def __init__(self, jsonl_path: Optional[str] = None, prometheus_path: Optional[str] = None,
+                 history: int = RUN_HISTORY):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.runs = deque(maxlen=history)
+        self._lock = threading.Lock()
+        # Cumulative counters for the Prometheus export (survive history trimming)
+        self._runs_total: Dict[tuple, int] = {}
+        self._failures: Dict[str, int] = {}
+        self._phase_seconds: Dict[str, float] = {}
+        self._phase_count: Dict[str, int] = {}
+        self._cpu_seconds = {"user": 0.0, "system": 0.0}
+        self._result_bytes: Dict[str, int] = {}
+        self._max_rss = 0
+        self._last: Optional[RunMetrics] = None
+
+    def record(self, run: RunMetrics):
+        with self._lock:
+            self.runs.append(run)
+            self._last = run
+            key = (run.protocol, run.status)
+            self._runs_total[key] = self._runs_total.get(key, 0) + 1
+            if run.failure:
+                self._failures[run.failure] = self._failures.get(run.failure, 0) + 1
+            for phase, seconds in run.phases.items():
+                self._phase_seconds[phase] = self._phase_seconds.get(phase, 0.0) + seconds
+                self._phase_count[phase] = self._phase_count.get(phase, 0) + 1
+            if run.cpu_user is not None:
+                self._cpu_seconds["user"] += run.cpu_user
+                self._cpu_seconds["system"] += run.cpu_system
+            if run.peak_rss_bytes:
+                self._max_rss = max(self._max_rss, run.peak_rss_bytes)
+            for name, size in run.result_files.items():
+                kind = os.path.splitext(name)[1].lstrip(".")
+                self._result_bytes[kind] = self._result_bytes.get(kind, 0) + size
+
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(run.to_dict()) + "\n")
+            if self.prometheus_path:
+                self.write_prometheus(self.prometheus_path)
+
+    def last(self) -> Optional[RunMetrics]:
+        return self._last
+
+    def history(self) -> List[RunMetrics]:
+        with self._lock:
+            return list(self.runs)
+
+    def phase_summary(self) -> Dict[str, Dict[str, float]]:
+        """Cumulative seconds, count and mean per phase"""
+        with self._lock:
+            return {
+                phase: {
+                    'seconds': self._phase_seconds[phase],
+                    'count': self._phase_count[phase],
+                    'mean': self._phase_seconds[phase] / self._phase_count[phase],
+                }
+                for phase in self._phase_seconds
+            }
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP manet_sim_runs_total Simulation runs by protocol and final status.",
+            "# TYPE manet_sim_runs_total counter",
+        ]
+        for (protocol, status), count in sorted(self._runs_total.items()):
+            lines.append(f'manet_sim_runs_total{{protocol="{protocol}",status="{status}"}} {count}')
+        lines += [
+            "# HELP manet_sim_failures_total Failed runs by failure class.",
+            "# TYPE manet_sim_failures_total counter",
+        ]
+        for kind, count in sorted(self._failures.items()):
+            lines.append(f'manet_sim_failures_total{{kind="{kind}"}} {count}')
+        lines += [
+            "# HELP manet_sim_phase_seconds Wall time spent per run phase.",
+            "# TYPE manet_sim_phase_seconds summary",
+        ]
+        for phase in sorted(self._phase_seconds):
+            lines.append(f'manet_sim_phase_seconds_sum{{phase="{phase}"}} {self._phase_seconds[phase]:.6f}')
+            lines.append(f'manet_sim_phase_seconds_count{{phase="{phase}"}} {self._phase_count[phase]}')
+        lines += [
+            "# HELP manet_sim_child_cpu_seconds_total CPU time of opp_run processes.",
+            "# TYPE manet_sim_child_cpu_seconds_total counter",
+        ]
+        for mode, seconds in self._cpu_seconds.items():
+            lines.append(f'manet_sim_child_cpu_seconds_total{{mode="{mode}"}} {seconds:.6f}')
+        lines += [
+            "# HELP manet_sim_result_bytes_total Bytes of result files written, by file type.",
+            "# TYPE manet_sim_result_bytes_total counter",
+        ]
+        for kind, size in sorted(self._result_bytes.items()):
+            lines.append(f'manet_sim_result_bytes_total{{kind="{kind}"}} {size}')
+        lines += [
+            "# HELP manet_sim_peak_rss_bytes Largest peak RSS of any opp_run process.",
+            "# TYPE manet_sim_peak_rss_bytes gauge",
+            f"manet_sim_peak_rss_bytes {self._max_rss}",
+        ]
+        if self._last is not None:
+            lines += [
+                "# HELP manet_sim_last_run_timestamp_seconds Start time of the most recent run.",
+                "# TYPE manet_sim_last_run_timestamp_seconds gauge",
+                f"manet_sim_last_run_timestamp_seconds {self._last.started_at:.3f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Atomic rewrite (the textfile collector must never see a partial file)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".manet_metrics_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,380 @@
+"""
+Simulation job queue
+
+Jobs (one OMNeT++ run each) are executed by up to max_workers worker
+threads, lowest priority value first. Within a priority jobs run FIFO, or
+longest-first when an estimator predicts their runtime (long jobs started
+last would otherwise leave the other workers idle at the end of a sweep);
+the same estimates give the sweep's ETA. An optional
+admission controller (scheduler.ResourceAdmission) decides whether a job's
+memory reservation fits before it is started; smaller jobs may start ahead
+of one that does not fit yet. Transient failures are retried with backoff
+by an optional RetryPolicy. The queue can be paused and resumed, queued
+jobs can be reprioritized or cancelled, and a running job is cancelled
+through the runner's cancel hook (OmnetManager terminates the opp_run
+process, then kills it after a grace period). Completed results are kept
+on the job objects, so stopping a sweep never loses them. Jobs carry an
+owner; with a fair-share policy (scheduler.FairShare) the dispatch order
+interleaves owners instead of running one user's sweep to completion first.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from instrumentation import FailureKind
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class SimulationJob:
+    """One simulation run of a sweep"""
+    job_id: int
+    protocol: str
+    seed: int
+    params: Dict
+    priority: int = 0  # Lower number = runs earlier
+    status: str = JobStatus.QUEUED
+    result: Optional[Dict] = None
+    error: str = ""
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_requested: bool = False
+    order: int = 0  # FIFO tie-breaker within a priority
+    attempts: int = 0  # runs started so far (retries included)
+    oom_retries: int = 0  # doubles the memory reservation
+    timeout_retries: int = 0  # doubles cpu-time-limit and the wall timeout
+    estimated_seconds: Optional[float] = None  # predicted runtime (longest-first order, ETA)
+    failure: str = ""  # FailureKind of the last failed attempt
+    not_before: float = 0.0  # retry backoff: not dispatched before this time
+    owner: str = ""  # submitting user (fair share)
+    done: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+
+class JobQueue:
+    """
+    Priority job queue with a pool of worker threads.
+
+    runner(job) must return the parsed stats dict or raise; cancel_running(job)
+    must make that job's runner return promptly (e.g. SimulationRunner.cancel).
+    admission needs try_admit(job) -> bool and release(job); retry_policy
+    needs should_retry(error, attempts) and delay(attempts); estimator needs
+    estimate(job) -> Optional[float] seconds (e.g. SimulationRunner with a
+    RuntimePredictor) and is re-asked for queued jobs after every run.
+    fair_share needs order(queued, running, key) -> queued jobs in dispatch
+    order and charge(owner, seconds) (e.g. scheduler.FairShare).
+    Listeners are called as listener(job) from a worker thread on every
+    status change.
+    """
+
+    ADMISSION_POLL = 1.0  # seconds between admission re-checks (memory frees up externally)
+
+    def __init__(self, runner: Callable[[SimulationJob], Dict],
+                 cancel_running: Optional[Callable[[SimulationJob], None]] = None,
+                 max_workers: int = 1, admission=None, retry_policy=None, estimator=None,
+                 fair_share=None):
+        self.runner = runner
+        self.cancel_running = cancel_running
+        self.admission = admission
+        self.retry_policy = retry_policy
+        self.estimator = estimator
+        self.fair_share = fair_share
+        self.listeners: List[Callable[[SimulationJob], None]] = []
+        self._jobs: Dict[int, SimulationJob] = {}
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._paused = False
+        self._stopping = False
+        self._running: Dict[int, SimulationJob] = {}
+        self._workers: List[threading.Thread] = []
+        self.max_workers = 0
+        self.set_max_workers(max_workers)
+
+    def set_max_workers(self, count: int):
+        """Change concurrency; extra idle workers simply stop being dispatched to"""
+        with self._condition:
+            self.max_workers = max(1, count)
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"JobQueueWorker-{len(self._workers)}",
+                                          daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify_all()
+
+    # --- Submission and inspection ---
+
+    def submit(self, protocol: str, seed: int, params: Dict, priority: int = 0, owner: str = "") -> SimulationJob:
+        with self._condition:
+            job = SimulationJob(next(self._ids), protocol, seed, dict(params), priority,
+                                order=next(self._order), owner=owner)
+            job.estimated_seconds = self._estimate(job)
+            self._jobs[job.job_id] = job
+            self._condition.notify_all()
+        self._notify(job)
+        return job
+
+    def add_result(self, protocol: str, seed: int, params: Dict, result: Dict, owner: str = "") -> SimulationJob:
+        """Record an already known result (e.g. from a result cache) as a finished job"""
+        with self._condition:
+            job = SimulationJob(next(self._ids), protocol, seed, dict(params), order=next(self._order),
+                                owner=owner, result=result)
+            self._finish(job, JobStatus.DONE)
+            self._jobs[job.job_id] = job
+        self._notify(job)
+        return job
+
+    def jobs(self) -> List[SimulationJob]:
+        """All jobs in display order: running, queued by priority, then finished"""
+        with self._condition:
+            jobs = list(self._jobs.values())
+        rank = {JobStatus.RUNNING: 0, JobStatus.QUEUED: 1}
+
+        def key(j):
+            order = self._dispatch_key(j) if j.status == JobStatus.QUEUED else (0, 0.0, j.order)
+            return (rank.get(j.status, 2),) + order
+
+        return sorted(jobs, key=key)
+
+    def get(self, job_id: int) -> Optional[SimulationJob]:
+        return self._jobs.get(job_id)
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return sum(1 for j in self._jobs.values() if not j.finished)
+
+    def clear_finished(self):
+        with self._condition:
+            self._jobs = {i: j for i, j in self._jobs.items() if not j.finished}
+
+    def eta(self) -> Optional[float]:
+        """
+        Seconds until all unfinished jobs are done: queued jobs are list-scheduled
+        in dispatch order onto max_workers workers, running jobs occupy theirs
+        for their predicted remainder. None while no runtime is known.
+        """
+        now = time.time()
+        with self._condition:
+            running = list(self._running.values())
+            queued = self._dispatch_order([j for j in self._jobs.values() if j.status == JobStatus.QUEUED])
+            workers = self.max_workers
+            finished = [j.finished_at - j.started_at for j in self._jobs.values()
+                        if j.status == JobStatus.DONE and j.started_at and j.finished_at]
+        known = [j.estimated_seconds for j in running + queued if j.estimated_seconds]
+        fallback = (sum(known) / len(known) if known
+                    else sum(finished) / len(finished) if finished else None)
+        if not running and not queued:
+            return 0.0
+        if fallback is None:
+            return None
+        free_at = [max(0.0, (j.estimated_seconds or fallback) - (now - j.started_at)) for j in running]
+        free_at += [0.0] * max(0, workers - len(free_at))
+        heapq.heapify(free_at)
+        for job in queued:
+            start = max(heapq.heappop(free_at), job.not_before - now)
+            heapq.heappush(free_at, start + (job.estimated_seconds or fallback))
+        return max(free_at)
+
+    # --- Control ---
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def pause(self):
+        """Stop dispatching new jobs; a running job continues to completion"""
+        with self._condition:
+            self._paused = True
+
+    def resume(self):
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                return False
+            job.priority = priority
+        self._notify(job)
+        return True
+
+    def move(self, job_id: int, delta: int) -> bool:
+        """Raise (delta < 0) or lower (delta > 0) a queued job's priority"""
+        job = self._jobs.get(job_id)
+        return job is not None and self.set_priority(job_id, job.priority + delta)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job, or terminate it if it is running"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.cancel_requested = True
+            running = job.job_id in self._running
+            if not running:
+                self._finish(job, JobStatus.CANCELLED)
+        if running and self.cancel_running:
+            # Outside the lock: terminating the process may take a grace period
+            self.cancel_running(job)
+        elif not running:
+            self._notify(job)
+        return True
+
+    def cancel_all(self):
+        for job in self.jobs():
+            if not job.finished:
+                self.cancel(job.job_id)
+
+    def stop(self):
+        """Cancel everything and stop the worker thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self.cancel_all()
+
+    # --- Worker ---
+
+    @staticmethod
+    def _dispatch_key(job: SimulationJob):
+        """Priority, then longest predicted runtime, then FIFO"""
+        return job.priority, -(job.estimated_seconds or 0.0), job.order
+
+    def _dispatch_order(self, queued: List[SimulationJob]) -> List[SimulationJob]:
+        """Queued jobs in the order they would be started"""
+        if self.fair_share is None:
+            return sorted(queued, key=self._dispatch_key)
+        return self.fair_share.order(queued, list(self._running.values()), self._dispatch_key)
+
+    def _estimate(self, job: SimulationJob) -> Optional[float]:
+        if self.estimator is None:
+            return None
+        try:
+            return self.estimator.estimate(job)
+        except Exception as e:
+            logger.error(f"Runtime estimate failed for job {job.job_id}: {e}")
+            return None
+
+    def _refresh_estimates(self):
+        """Re-predict queued jobs (the model learns from every finished run)"""
+        if self.estimator is None:
+            return
+        with self._condition:
+            queued = [j for j in self._jobs.values() if j.status == JobStatus.QUEUED]
+        for job in queued:
+            job.estimated_seconds = self._estimate(job)
+
+    def _next_job(self) -> Optional[SimulationJob]:
+        """Best queued job that is due and admitted (reserves its resources)"""
+        now = time.time()
+        queued = self._dispatch_order([j for j in self._jobs.values()
+                                       if j.status == JobStatus.QUEUED and j.not_before <= now])
+        for job in queued:
+            if self.admission is None or self.admission.try_admit(job):
+                return job
+        return None
+
+    def _wait_timeout(self) -> Optional[float]:
+        """How long an idle worker may sleep before something could become runnable"""
+        queued = [j for j in self._jobs.values() if j.status == JobStatus.QUEUED]
+        if not queued:
+            return None
+        delays = [j.not_before - time.time() for j in queued if j.not_before > time.time()]
+        if len(delays) < len(queued) and self.admission is not None:
+            delays.append(self.ADMISSION_POLL)  # due jobs waiting for admission
+        return max(0.01, min(delays)) if delays else None
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping:
+                        return
+                    job = None
+                    if not self._paused and len(self._running) < self.max_workers:
+                        job = self._next_job()
+                    if job is not None:
+                        break
+                    self._condition.wait(self._wait_timeout())
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+                job.attempts += 1
+                self._running[job.job_id] = job
+            self._notify(job)
+
+            retry_delay = None
+            try:
+                result = self.runner(job)
+                status, error = JobStatus.DONE, ""
+            except Exception as e:
+                result, status, error = None, JobStatus.FAILED, str(e)
+                job.failure = getattr(e, "kind", "")
+                if not job.cancel_requested and self.retry_policy is not None \
+                        and self.retry_policy.should_retry(e, job.attempts):
+                    retry_delay = self.retry_policy.delay(job.attempts)
+                    logger.warning(f"Job {job.job_id} failed ({e}), retry {job.attempts} in {retry_delay:.1f}s")
+                elif not job.cancel_requested:
+                    logger.error(f"Job {job.job_id} failed: {e}")
+            finally:
+                if self.admission is not None:
+                    self.admission.release(job)
+                if self.fair_share is not None:
+                    self.fair_share.charge(job.owner, time.time() - job.started_at)
+
+            with self._condition:
+                self._running.pop(job.job_id, None)
+                if retry_delay is not None and not job.cancel_requested:
+                    job.status = JobStatus.QUEUED
+                    job.error = error
+                    job.not_before = time.time() + retry_delay
+                    if job.failure == FailureKind.OOM:
+                        job.oom_retries += 1
+                    elif job.failure == FailureKind.TIMEOUT:
+                        job.timeout_retries += 1
+                    self._condition.notify_all()
+                else:
+                    if job.cancel_requested:
+                        status = JobStatus.CANCELLED
+                    job.result = result if status == JobStatus.DONE else None
+                    job.error = error
+                    self._finish(job, status)
+                    self._condition.notify_all()
+            if status == JobStatus.DONE:
+                self._refresh_estimates()
+            self._notify(job)
+
+    def _finish(self, job: SimulationJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+
+    def _notify(self, job: SimulationJob):
+        for listener in list(self.listeners):
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Job listener error: {e}")
+        if job.finished:
+            job.done.set()  # after the listeners: wait() returns once they have seen the result
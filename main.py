@@ -2,18 +2,29 @@
 MANET Simulator - OMNeT++ / INETMANET-3.x Controller
 
 Main entry point for the OMNeT++ controller GUI.
+With arguments (run|sweep|compare|parse|serve|submit|worker, see --help) it runs headless via cli.py;
+tkinter and the GUI are only imported when the GUI is started.
 """
 
-import tkinter as tk
 import sys
-from gui import MANETSimulatorGUI
 
-def main():
-    """Main function to run the MANET simulator GUI"""
+def main(argv=None):
+    """Run the CLI when arguments are given, the MANET simulator GUI otherwise"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        from cli import run_cli
+        return run_cli(argv)
+    return run_gui()
+
+def run_gui(service=None, user=None):
+    """Main function to run the MANET simulator GUI (as a client of a simulation service if given)"""
     try:
+        import tkinter as tk
+        from gui import MANETSimulatorGUI
+
         # Run GUI application
         root = tk.Tk()
-        app = MANETSimulatorGUI(root)
+        app = MANETSimulatorGUI(root, service=service, user=user)
         
         try:
             root.mainloop()
@@ -0,0 +1,365 @@
+"""
+Streaming metric primitives for MANET simulator
+
+Bounded-memory accumulators used by PerformanceMetrics (only the duplicate
+filter grows, with the number of distinct packets). Every structure has
+O(1) (amortized) updates and a merge() method, so metrics collected by
+separate runs or worker processes can be combined into one summary.
+"""
+import copy
+import hashlib
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RunningStats:
+    """Welford mean/variance accumulator (mergeable with Chan's formula)"""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def total(self) -> float:
+        return self.mean * self.count
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n-1), 0.0 with fewer than two samples"""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) for streaming quantile estimates.
+
+    Centroid count is bounded by roughly compression * pi / 2, independent of
+    the number of samples; tails (p95/p99) are kept at high resolution.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means: List[float] = []
+        self._weights: List[float] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self._buffer_limit = max(int(compression * 5), 50)
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        self.count += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        other._compress()
+        for mean, weight in zip(other._means, other._weights):
+            self._buffer.append((mean, weight))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q: float) -> float:
+        # k1 scale function: fine resolution near q=0 and q=1
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self._means, self._weights)) + self._buffer)
+        self._buffer = []
+        total = self.count
+
+        means = []
+        weights = []
+        cumulative = 0.0
+        q_limit = self._k_inverse(self._k(0.0) + 1)
+        cur_mean, cur_weight = points[0]
+        for mean, weight in points[1:]:
+            if (cumulative + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                cumulative += cur_weight
+                q_limit = self._k_inverse(self._k(cumulative / total) + 1)
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self._means, self._weights = means, weights
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile (0 <= q <= 1); 0.0 when empty"""
+        self._compress()
+        if not self._means:
+            return 0.0
+        if len(self._means) == 1:
+            return self._means[0]
+        q = min(max(q, 0.0), 1.0)
+        target = q * self.count
+        means, weights = self._means, self._weights
+
+        # Centroid i covers cumulative weight [c_i, c_i + w_i], centered in the middle
+        if target <= weights[0] / 2:
+            return self.min + (means[0] - self.min) * target / (weights[0] / 2)
+        cumulative = 0.0
+        for i in range(len(means) - 1):
+            left = cumulative + weights[i] / 2
+            right = cumulative + weights[i] + weights[i + 1] / 2
+            if target <= right:
+                frac = (target - left) / (right - left)
+                return means[i] + frac * (means[i + 1] - means[i])
+            cumulative += weights[i]
+        tail = weights[-1] / 2
+        frac = (target - (self.count - tail)) / tail
+        return means[-1] + min(max(frac, 0.0), 1.0) * (self.max - means[-1])
+
+    def centroid_count(self) -> int:
+        self._compress()
+        return len(self._means)
+
+
+class HopHistogram:
+    """Fixed-bucket histogram for integer hop counts (last bucket = overflow)"""
+
+    def __init__(self, max_hops: int = 64):
+        self.max_hops = max_hops
+        self.buckets = [0] * (max_hops + 2)
+        self.count = 0
+        self._sum = 0
+
+    def add(self, hops: int):
+        hops = max(int(hops), 0)
+        self.buckets[min(hops, self.max_hops + 1)] += 1
+        self.count += 1
+        self._sum += hops
+
+    def merge(self, other: "HopHistogram") -> "HopHistogram":
+        if other.max_hops != self.max_hops:
+            raise ValueError("Cannot merge hop histograms with different bucket counts")
+        for i, value in enumerate(other.buckets):
+            self.buckets[i] += value
+        self.count += other.count
+        self._sum += other._sum
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> int:
+        """Smallest hop bucket covering fraction q of samples"""
+        if not self.count:
+            return 0
+        target = q * self.count
+        cumulative = 0
+        for hops, value in enumerate(self.buckets):
+            cumulative += value
+            if cumulative >= target and value:
+                return hops
+        return self.max_hops + 1
+
+    def as_dict(self) -> Dict[int, int]:
+        return {hops: value for hops, value in enumerate(self.buckets) if value}
+
+
+class BloomFilter:
+    """
+    Fixed-size duplicate detector for packet IDs.
+
+    Memory is set once from capacity/error_rate. add() returns False when the
+    item was (probably) seen already; with the default error rate a unique
+    packet is misreported as a duplicate roughly once per million deliveries.
+    Past capacity the error rate climbs quickly (a warning is logged once);
+    use ScalableBloomFilter when the packet count is not known up front.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-6):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self._warned = False
+
+    def _positions(self, item) -> Iterable[int]:
+        # Enhanced double hashing (Dillinger & Manolios): plain h1 + i*h2 probes
+        # correlate and give a far higher false-positive rate than designed
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+        m = self.num_bits
+        h1 = int.from_bytes(digest[:8], "little") % m
+        h2 = int.from_bytes(digest[8:], "little") % m
+        for i in range(self.num_hashes):
+            yield h1
+            h1 = (h1 + h2) % m
+            h2 = (h2 + i + 1) % m
+
+    def add(self, item) -> bool:
+        """Insert item; returns True if it was not present before"""
+        new = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                new = True
+        if new:
+            self.count += 1
+            if self.count > self.capacity and not self._warned:
+                self._warned = True
+                logger.warning(f"Bloom filter holds more than {self.capacity} items; "
+                               f"unique items may be reported as duplicates")
+        return new
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def __contains__(self, item) -> bool:
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    def merge(self, other: "BloomFilter") -> "BloomFilter":
+        """OR other into this filter; both together must fit the capacity"""
+        if (other.num_bits, other.num_hashes) != (self.num_bits, self.num_hashes):
+            raise ValueError("Cannot merge Bloom filters with different parameters")
+        if self.count + other.count > self.capacity:
+            raise ValueError(f"Cannot merge Bloom filters holding {self.count} + {other.count} items "
+                             f"into a capacity of {self.capacity}")
+        self._bits = bytearray(a | b for a, b in zip(self._bits, other._bits))
+        # Union size is unknown exactly; use the upper bound
+        self.count += other.count
+        return self
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows with its contents (Almeida et al.).
+
+    Starts as one small BloomFilter; when the newest one is full a filter
+    with GROWTH times the capacity and a TIGHTENING times lower error rate is
+    added, so the overall error rate stays below error_rate however many
+    items arrive and memory follows the actual item count.
+    """
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int = 4096, error_rate: float = 1e-6):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters: List[BloomFilter] = []
+        self._grow()
+
+    def _slice(self, index: int) -> BloomFilter:
+        # Error rates e0 * r^i sum to at most e0 / (1 - r) = error_rate
+        return BloomFilter(self.initial_capacity * self.GROWTH ** index,
+                           self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** index)
+
+    def _grow(self):
+        self.filters.append(self._slice(len(self.filters)))
+
+    def add(self, item) -> bool:
+        """Insert item; returns True if it was not present before"""
+        if item in self:
+            return False
+        if self.filters[-1].full:
+            self._grow()
+        return self.filters[-1].add(item)
+
+    def __contains__(self, item) -> bool:
+        return any(item in bloom for bloom in self.filters)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    @property
+    def count(self) -> int:
+        return len(self)
+
+    @property
+    def capacity(self) -> int:
+        return sum(bloom.capacity for bloom in self.filters)
+
+    def merge(self, other: "ScalableBloomFilter") -> "ScalableBloomFilter":
+        """
+        Each of other's filters is ORed into the same-sized filter here if
+        both fit its capacity, else kept as a filter of its own. Kept filters
+        add their error rate, so the union's error rate is at most twice
+        error_rate.
+        """
+        if (other.initial_capacity, other.error_rate) != (self.initial_capacity, self.error_rate):
+            raise ValueError("Cannot merge Bloom filters with different parameters")
+        for bloom in other.filters:
+            target = next((mine for mine in self.filters
+                           if (mine.num_bits, mine.num_hashes) == (bloom.num_bits, bloom.num_hashes)
+                           and mine.count + bloom.count <= mine.capacity), None)
+            if target is not None:
+                target.merge(bloom)
+            else:
+                self.filters.insert(len(self.filters) - 1, copy.deepcopy(bloom))  # the newest keeps taking items
+        return self
+
+
+def summarize_quantiles(digest: TDigest, quantiles: Optional[Iterable[float]] = None) -> Dict[str, float]:
+    """Return {'p50': ..., 'p95': ..., 'p99': ...} style dictionary"""
+    quantiles = quantiles or (0.5, 0.95, 0.99)
+    return {f"p{int(round(q * 100))}": digest.quantile(q) for q in quantiles}
@@ -1,10 +1,14 @@
 """
 Data models and structures for MANET simulator
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from typing import Dict, List, Set, Optional, TYPE_CHECKING
 import math
 
+from metrics import RunningStats, TDigest, HopHistogram, ScalableBloomFilter, summarize_quantiles
+from nodeset import NodeSet
+from route_path import RoutePath
+
 if TYPE_CHECKING:
     from simulator import MANETSimulator
 
@@ -15,12 +19,17 @@ class RouteEntry:
     hop_count: int
     sequence_number: int
     expiry_time: float
+    valid: bool = True
+    precursors: Set[str] = field(default_factory=set)
 
 @dataclass
 class HelloMessage:
     sender: str
-    neighbors: Set[str]
+    neighbors: NodeSet
     timestamp: float
+    
+    def __post_init__(self):
+        self.neighbors = NodeSet.coerce(self.neighbors)
 
 @dataclass
 class RREQMessage:
@@ -28,8 +37,15 @@ class RREQMessage:
     destination: str
     sequence_number: int
     hop_count: int
-    path: List[str]
+    path: RoutePath
     broadcast_id: int
+    
+    def __post_init__(self):
+        self.path = RoutePath.coerce(self.path)
+    
+    def forwarded_by(self, node: str) -> 'RREQMessage':
+        """Rebroadcast copy; shares the accumulated path instead of copying it"""
+        return replace(self, hop_count=self.hop_count + 1, path=self.path.add_hop(node))
 
 @dataclass
 class RREPMessage:
@@ -37,14 +53,24 @@ class RREPMessage:
     destination: str
     sequence_number: int
     hop_count: int
-    path: List[str]
+    path: RoutePath
+    
+    def __post_init__(self):
+        self.path = RoutePath.coerce(self.path)
+    
+    def forwarded_by(self, node: str) -> 'RREPMessage':
+        """Forwarded copy; shares the accumulated path instead of copying it"""
+        return replace(self, hop_count=self.hop_count + 1, path=self.path.add_hop(node))
 
 @dataclass
 class LSAMessage:
     originator: str
     sequence_number: int
-    neighbors: Set[str]
+    neighbors: NodeSet
     timestamp: float
+    
+    def __post_init__(self):
+        self.neighbors = NodeSet.coerce(self.neighbors)
 
 @dataclass
 class MobilityParameters:
@@ -60,9 +86,12 @@ class MobilityParameters:
 class LSAEntry:
     """Link State Advertisement entry for OLSR"""
     originator: str
-    neighbors: Set[str]
+    neighbors: NodeSet
     sequence_number: int
     timestamp: float
+    
+    def __post_init__(self):
+        self.neighbors = NodeSet.coerce(self.neighbors)
 
 @dataclass
 class RERRMessage:
@@ -115,7 +144,7 @@ class EnergyModel:
 @dataclass
 class Event:
     """Discrete event for simulation"""
-    event_type: str  # PACKET_SEND, PACKET_RECEIVE, ROUTE_UPDATE, HELLO_BROADCAST, TC_BROADCAST, LINK_BREAK
+    event_type: str  # PACKET_SEND, PACKET_RECEIVE, ROUTE_UPDATE, HELLO_BROADCAST, TC_BROADCAST, LINK_BREAK, NODE_DEATH
     timestamp: float
     source_node: str
     target_node: Optional[str] = None
@@ -138,7 +167,17 @@ class Event:
         return str(self.source_node) < str(other.source_node)
 
 class PerformanceMetrics:
-    def __init__(self):
+    """
+    Streaming performance metrics.
+
+    Memory stays constant regardless of traffic volume: delays feed a Welford
+    accumulator and a t-digest, hop counts a fixed-bucket histogram and
+    delivered packet IDs a Bloom filter that starts at expected_packets and
+    grows as deliveries arrive. Use merge() to combine runs/workers.
+    """
+    def __init__(self, expected_packets: int = 4096, max_hops: int = 64):
+        self.expected_packets = expected_packets
+        self.max_hops = max_hops
         self.reset()
     
     def reset(self):
@@ -147,10 +186,36 @@ class PerformanceMetrics:
         self.total_packets_dropped = 0
         self.total_delay = 0.0
         self.total_routing_overhead = 0
-        self.packet_delivery_times = []
         self.routing_messages_sent = 0
-        self.hop_counts = []
-        self.delivered_packet_ids = set()  # Track unique delivered packets
+        self.delay_stats = RunningStats()
+        self.delay_digest = TDigest()
+        self.hop_histogram = HopHistogram(self.max_hops)
+        self.delivered_packet_ids = ScalableBloomFilter(self.expected_packets)  # Track unique delivered packets
+    
+    def record_delivery(self, packet_id, delay: float, hop_count: int) -> bool:
+        """Record a delivered packet; returns False for duplicates"""
+        if not self.delivered_packet_ids.add(packet_id):
+            return False
+        self.total_packets_delivered += 1
+        self.total_delay += delay
+        self.delay_stats.add(delay)
+        self.delay_digest.add(delay)
+        self.hop_histogram.add(hop_count)
+        return True
+    
+    def merge(self, other: 'PerformanceMetrics') -> 'PerformanceMetrics':
+        """Combine metrics from another run or worker into this one"""
+        self.total_packets_sent += other.total_packets_sent
+        self.total_packets_delivered += other.total_packets_delivered
+        self.total_packets_dropped += other.total_packets_dropped
+        self.total_delay += other.total_delay
+        self.total_routing_overhead += other.total_routing_overhead
+        self.routing_messages_sent += other.routing_messages_sent
+        self.delay_stats.merge(other.delay_stats)
+        self.delay_digest.merge(other.delay_digest)
+        self.hop_histogram.merge(other.hop_histogram)
+        self.delivered_packet_ids.merge(other.delivered_packet_ids)
+        return self
         
     def calculate_delivery_ratio(self) -> float:
         if self.total_packets_sent == 0:
@@ -158,9 +223,14 @@ class PerformanceMetrics:
         return (self.total_packets_delivered / self.total_packets_sent) * 100
     
     def calculate_average_delay(self) -> float:
-        if not self.packet_delivery_times:
-            return 0.0
-        return sum(self.packet_delivery_times) / len(self.packet_delivery_times)
+        return self.delay_stats.mean
+    
+    def calculate_delay_stdev(self) -> float:
+        return self.delay_stats.stdev
+    
+    def calculate_delay_percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99 end-to-end delay estimates"""
+        return summarize_quantiles(self.delay_digest)
     
     def calculate_routing_overhead(self) -> float:
         if self.total_packets_delivered == 0:
@@ -168,9 +238,7 @@ class PerformanceMetrics:
         return self.routing_messages_sent / self.total_packets_delivered
     
     def calculate_average_hop_count(self) -> float:
-        if not self.hop_counts:
-            return 0.0
-        return sum(self.hop_counts) / len(self.hop_counts)
+        return self.hop_histogram.mean
 
 class DataPacket:
     """Data packet with metrics tracking"""
@@ -189,7 +257,7 @@ class Packet:
         self.original_destination = destination  # Immutable: the true final destination
         self.data = data
         self.packet_type = packet_type
-        self.path = [source]
+        self.path = RoutePath(source)  # Shared prefix; use add_hop() to extend
         self.hop_count = 0
         self.timestamp = 0  # Will be set by simulator
         self.packet_id = f"{source}_{destination}_{int(self.timestamp * 1000000)}"  # Will be updated when timestamp is set
@@ -204,6 +272,10 @@ class Packet:
         self.next_hop = None  # Next forwarding neighbor
         self.current_target = None  # ZRP only: temporary border/IERP target (NOT the final destination)
     
+    def add_hop(self, node):
+        """Extend the path by one hop in O(1) without copying earlier hops"""
+        self.path = self.path.add_hop(node)
+    
     def update_packet_id(self):
         """DEPRECATED: Paket kimliğini runtime'da yenileme. 
         Kimlik yalnızca send_packet() sırasında verilmelidir.
@@ -0,0 +1,188 @@
+"""
+Bitset node sets for neighbor and topology computations
+
+Node IDs are interned once into a NodeIndex (string -> bit position) and a
+NodeSet stores membership as a Python int bitmask, so union, intersection,
+difference and popcount over hundreds of nodes are a few word operations
+instead of per-element string hashing. NodeSet behaves like a Set[str].
+"""
+from collections.abc import MutableSet
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class NodeIndex:
+    """Interned node-ID <-> bit-position mapping"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, node_id: str) -> int:
+        index = self._ids.get(node_id)
+        if index is None:
+            index = len(self._names)
+            self._ids[node_id] = index
+            self._names.append(node_id)
+        return index
+
+    def lookup(self, node_id: str) -> Optional[int]:
+        return self._ids.get(node_id)
+
+    def name(self, index: int) -> str:
+        return self._names[index]
+
+    def mask(self, node_ids: Iterable[str]) -> int:
+        mask = 0
+        for node_id in node_ids:
+            mask |= 1 << self.intern(node_id)
+        return mask
+
+
+DEFAULT_INDEX = NodeIndex()
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+class NodeSet(MutableSet):
+    """Set of node IDs backed by an int bitmask over a NodeIndex"""
+
+    __slots__ = ("mask", "index")
+    __hash__ = None
+
+    def __init__(self, node_ids: Iterable[str] = (), index: Optional[NodeIndex] = None):
+        self.index = index or DEFAULT_INDEX
+        if isinstance(node_ids, NodeSet):
+            self.mask = self._mask_of(node_ids)
+        else:
+            self.mask = self.index.mask(node_ids)
+
+    @classmethod
+    def from_mask(cls, mask: int, index: Optional[NodeIndex] = None) -> "NodeSet":
+        result = cls.__new__(cls)
+        result.index = index or DEFAULT_INDEX
+        result.mask = mask
+        return result
+
+    @classmethod
+    def coerce(cls, value: Iterable[str], index: Optional[NodeIndex] = None) -> "NodeSet":
+        """Return value unchanged if already a NodeSet, otherwise convert"""
+        if isinstance(value, NodeSet):
+            return value
+        return cls(value or (), index)
+
+    def _mask_of(self, other) -> int:
+        if isinstance(other, NodeSet):
+            if other.index is self.index:
+                return other.mask
+            other = iter(other)
+        return self.index.mask(other)
+
+    # --- Set protocol ---
+
+    def __contains__(self, node_id) -> bool:
+        bit = self.index.lookup(node_id)
+        return bit is not None and bool(self.mask >> bit & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        mask = self.mask
+        names = self.index._names
+        while mask:
+            low = mask & -mask
+            yield names[low.bit_length() - 1]
+            mask ^= low
+
+    def __len__(self) -> int:
+        return popcount(self.mask)
+
+    def __bool__(self) -> bool:
+        return self.mask != 0
+
+    def add(self, node_id: str):
+        self.mask |= 1 << self.index.intern(node_id)
+
+    def discard(self, node_id: str):
+        bit = self.index.lookup(node_id)
+        if bit is not None:
+            self.mask &= ~(1 << bit)
+
+    def clear(self):
+        self.mask = 0
+
+    def copy(self) -> "NodeSet":
+        return NodeSet.from_mask(self.mask, self.index)
+
+    def __reduce__(self):
+        # Re-intern on unpickle so sets keep sharing the process-wide index
+        index = None if self.index is DEFAULT_INDEX else self.index
+        return (NodeSet, (list(self), index))
+
+    def __repr__(self) -> str:
+        return f"NodeSet({sorted(self)!r})"
+
+    # --- Fast bitwise operations ---
+
+    def __or__(self, other) -> "NodeSet":
+        return NodeSet.from_mask(self.mask | self._mask_of(other), self.index)
+
+    def __and__(self, other) -> "NodeSet":
+        return NodeSet.from_mask(self.mask & self._mask_of(other), self.index)
+
+    def __sub__(self, other) -> "NodeSet":
+        return NodeSet.from_mask(self.mask & ~self._mask_of(other), self.index)
+
+    def __xor__(self, other) -> "NodeSet":
+        return NodeSet.from_mask(self.mask ^ self._mask_of(other), self.index)
+
+    __ror__ = __or__
+    __rand__ = __and__
+    __rxor__ = __xor__
+
+    def __rsub__(self, other) -> "NodeSet":
+        return NodeSet.from_mask(self._mask_of(other) & ~self.mask, self.index)
+
+    def __ior__(self, other) -> "NodeSet":
+        self.mask |= self._mask_of(other)
+        return self
+
+    def __iand__(self, other) -> "NodeSet":
+        self.mask &= self._mask_of(other)
+        return self
+
+    def __isub__(self, other) -> "NodeSet":
+        self.mask &= ~self._mask_of(other)
+        return self
+
+    def __ixor__(self, other) -> "NodeSet":
+        self.mask ^= self._mask_of(other)
+        return self
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, NodeSet):
+            return self.mask == self._mask_of(other)
+        if isinstance(other, (set, frozenset)):
+            return len(self) == len(other) and all(n in self for n in other)
+        return NotImplemented
+
+    def __le__(self, other) -> bool:
+        return self.mask & ~self._mask_of(other) == 0
+
+    def __ge__(self, other) -> bool:
+        return self._mask_of(other) & ~self.mask == 0
+
+    def isdisjoint(self, other) -> bool:
+        return self.mask & self._mask_of(other) == 0
+
+    def intersection_count(self, other) -> int:
+        """|self & other| without allocating a new set"""
+        return popcount(self.mask & self._mask_of(other))
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+    issubset = __le__
+    issuperset = __ge__
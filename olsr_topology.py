@@ -0,0 +1,313 @@
+"""
+Incremental OLSR topology engine
+
+Maintains the local MPR set and the shortest-path (hop count) tree rooted at
+the owning node as HELLO and TC (LSA) messages arrive:
+
+- MPR selection is repaired locally when a neighbor's HELLO changes, and
+  falls back to the full RFC 3626 greedy heuristic after too much drift;
+  two-hop coverage is computed with NodeSet bitmask operations.
+- The shortest-path tree is updated with dynamic SSSP: edge insertions
+  propagate distance decreases, edge deletions only re-settle the subtree
+  below the removed tree edge (Ramalingam-Reps for unit weights).
+- Large batches of changes trigger a full BFS recomputation instead.
+"""
+import heapq
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from models import HelloMessage, LSAEntry, LSAMessage, RouteEntry
+from nodeset import NodeSet
+
+INF = float("inf")
+
+
+class OLSRTopology:
+    """Topology, MPR and routing state of a single OLSR node"""
+
+    def __init__(self, owner: str, full_recompute_ratio: float = 0.2, mpr_drift_limit: int = 8):
+        self.owner = owner
+        self.full_recompute_ratio = full_recompute_ratio
+        self.mpr_drift_limit = mpr_drift_limit
+
+        # Advertised neighbor sets per originator (HELLO and TC tracked separately)
+        self.hello_neighbors: Dict[str, NodeSet] = {}
+        self.tc_neighbors: Dict[str, NodeSet] = {}
+        self.tc_sequence: Dict[str, int] = {}
+
+        # Directed link graph
+        self.succ: Dict[str, Set[str]] = {owner: set()}
+        self.pred: Dict[str, Set[str]] = {owner: set()}
+
+        # Shortest-path tree
+        self.dist: Dict[str, float] = {owner: 0}
+        self.parent: Dict[str, Optional[str]] = {owner: None}
+        self.children: Dict[str, Set[str]] = {owner: set()}
+
+        # MPR state (two-hop coverage is computed on NodeSet bitmasks)
+        self.mprs: Set[str] = set()
+        self._mpr_drift = 0
+
+        self.full_recomputations = 0
+        self.incremental_updates = 0
+
+    # ------------------------------------------------------------------
+    # Message processing
+    # ------------------------------------------------------------------
+
+    def process_hello(self, hello: HelloMessage) -> bool:
+        """Apply a neighbor's HELLO; returns True if the MPR set changed"""
+        sender = hello.sender
+        is_new_neighbor = sender not in self.hello_neighbors
+        old = self.hello_neighbors.get(sender, NodeSet())
+        new = hello.neighbors.copy()
+        self.hello_neighbors[sender] = new
+
+        changes = []
+        if is_new_neighbor:
+            changes.append((self.owner, sender, True))
+        tc = self.tc_neighbors.get(sender, NodeSet())
+        changes.extend(self._advertised_changes(sender, old | tc, new | tc))
+        self.apply_link_changes(changes)
+
+        before = set(self.mprs)
+        self._two_hop_changed(old | new)
+        return self.mprs != before
+
+    def process_lsa(self, lsa: Union[LSAMessage, LSAEntry]) -> bool:
+        """Apply a TC message (LSAMessage or LSAEntry); returns True if accepted"""
+        originator = lsa.originator
+        if originator == self.owner:
+            return False
+        last = self.tc_sequence.get(originator)
+        if last is not None and lsa.sequence_number <= last:
+            return False
+        self.tc_sequence[originator] = lsa.sequence_number
+
+        hello = self.hello_neighbors.get(originator, NodeSet())
+        old = self.tc_neighbors.get(originator, NodeSet())
+        new = lsa.neighbors.copy()
+        self.tc_neighbors[originator] = new
+        self.apply_link_changes(self._advertised_changes(originator, old | hello, new | hello))
+        return True
+
+    def remove_neighbor(self, neighbor: str) -> bool:
+        """Symmetric link to neighbor lost; returns True if the MPR set changed"""
+        if neighbor not in self.hello_neighbors:
+            return False
+        old = self.hello_neighbors.pop(neighbor)
+        tc = self.tc_neighbors.get(neighbor, NodeSet())
+        changes = [(self.owner, neighbor, False)]
+        changes.extend(self._advertised_changes(neighbor, old | tc, tc))
+        self.apply_link_changes(changes)
+
+        before = set(self.mprs)
+        # The lost neighbor may itself now be a two-hop node needing coverage
+        candidates = old | {neighbor}
+        if neighbor in self.mprs:
+            self.mprs.discard(neighbor)
+            candidates = self.two_hop_neighbors()
+        self._two_hop_changed(candidates)
+        return self.mprs != before
+
+    def _advertised_changes(self, originator: str, old: NodeSet, new: NodeSet) -> List[Tuple[str, str, bool]]:
+        changes = [(originator, n, False) for n in old - new]
+        changes.extend((originator, n, True) for n in new - old)
+        return changes
+
+    # ------------------------------------------------------------------
+    # Shortest-path tree maintenance
+    # ------------------------------------------------------------------
+
+    def apply_link_changes(self, changes: Iterable[Tuple[str, str, bool]]):
+        """Apply (u, v, added) link changes, incrementally or by full rebuild"""
+        changes = [(u, v, added) for u, v, added in changes if u != v]
+        if not changes:
+            return
+        for u, v, added in changes:
+            if added:
+                self._add_vertex(u)
+                self._add_vertex(v)
+                self.succ[u].add(v)
+                self.pred[v].add(u)
+            elif v in self.succ.get(u, ()):
+                self.succ[u].discard(v)
+                self.pred[v].discard(u)
+
+        if len(changes) > self.full_recompute_ratio * max(len(self.dist), 1):
+            self.recompute_tree()
+            return
+
+        self.incremental_updates += 1
+        for u, v, added in changes:
+            if added:
+                self._edge_inserted(u, v)
+            elif self.parent.get(v) == u:
+                self._tree_edge_deleted(v)
+
+    def _add_vertex(self, node: str):
+        if node not in self.succ:
+            self.succ[node] = set()
+            self.pred[node] = set()
+            self.dist[node] = INF
+            self.parent[node] = None
+            self.children[node] = set()
+
+    def _set_parent(self, node: str, parent: Optional[str]):
+        old = self.parent.get(node)
+        if old is not None:
+            self.children[old].discard(node)
+        self.parent[node] = parent
+        if parent is not None:
+            self.children[parent].add(node)
+
+    def _edge_inserted(self, u: str, v: str):
+        if self.dist[u] + 1 >= self.dist[v]:
+            return
+        self.dist[v] = self.dist[u] + 1
+        self._set_parent(v, u)
+        queue = deque([v])
+        while queue:
+            x = queue.popleft()
+            for y in self.succ[x]:
+                if self.dist[x] + 1 < self.dist[y]:
+                    self.dist[y] = self.dist[x] + 1
+                    self._set_parent(y, x)
+                    queue.append(y)
+
+    def _tree_edge_deleted(self, v: str):
+        # 1. Collect the subtree hanging below the removed edge
+        affected = []
+        stack = [v]
+        while stack:
+            x = stack.pop()
+            affected.append(x)
+            stack.extend(self.children[x])
+        affected_set = set(affected)
+        for x in affected:
+            self._set_parent(x, None)
+            self.dist[x] = INF
+
+        # 2. Best distance into each affected node from the unaffected part
+        heap = []
+        for x in affected:
+            best, best_parent = INF, None
+            for p in self.pred[x]:
+                if p not in affected_set and self.dist[p] + 1 < best:
+                    best, best_parent = self.dist[p] + 1, p
+            if best_parent is not None:
+                self.dist[x] = best
+                self._set_parent(x, best_parent)
+                heapq.heappush(heap, (best, x))
+
+        # 3. Re-settle the affected region (Dijkstra restricted to it)
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d != self.dist[x]:
+                continue
+            for y in self.succ[x]:
+                if y in affected_set and d + 1 < self.dist[y]:
+                    self.dist[y] = d + 1
+                    self._set_parent(y, x)
+                    heapq.heappush(heap, (d + 1, y))
+
+    def recompute_tree(self):
+        """Full BFS rebuild of the shortest-path tree"""
+        self.full_recomputations += 1
+        for node in self.succ:
+            self.dist[node] = INF
+            self.parent[node] = None
+            self.children[node] = set()
+        self.dist[self.owner] = 0
+        queue = deque([self.owner])
+        while queue:
+            x = queue.popleft()
+            for y in self.succ[x]:
+                if self.dist[y] == INF:
+                    self.dist[y] = self.dist[x] + 1
+                    self._set_parent(y, x)
+                    queue.append(y)
+
+    # ------------------------------------------------------------------
+    # Routing output
+    # ------------------------------------------------------------------
+
+    def next_hop(self, destination: str) -> Optional[str]:
+        if self.dist.get(destination, INF) == INF or destination == self.owner:
+            return None
+        node = destination
+        while self.parent[node] != self.owner:
+            node = self.parent[node]
+        return node
+
+    def routes(self) -> Dict[str, Tuple[str, int]]:
+        """{destination: (next_hop, hop_count)} for all reachable nodes"""
+        first_hop = {}
+        order = sorted((d, n) for n, d in self.dist.items() if d != INF and n != self.owner)
+        for d, node in order:
+            parent = self.parent[node]
+            first_hop[node] = node if parent == self.owner else first_hop[parent]
+        return {node: (first_hop[node], int(self.dist[node])) for node in first_hop}
+
+    def export_routes(self, table, expiry_time: float, sequence_number: int = 0):
+        """Write current routes into a RoutingTable (OLSR overrides seq rules)"""
+        reachable = self.routes()
+        for entry in list(table):
+            if entry.destination not in reachable:
+                table.remove(entry.destination)
+        for destination, (next_hop, hops) in reachable.items():
+            table.update(RouteEntry(destination, next_hop, hops, sequence_number, expiry_time), force=True)
+
+    # ------------------------------------------------------------------
+    # MPR selection
+    # ------------------------------------------------------------------
+
+    def two_hop_neighbors(self) -> NodeSet:
+        reachable = NodeSet()
+        for advertised in self.hello_neighbors.values():
+            reachable |= advertised
+        return reachable - self.hello_neighbors.keys() - {self.owner}
+
+    def _covered(self) -> NodeSet:
+        covered = NodeSet()
+        for mpr in self.mprs:
+            covered |= self.hello_neighbors[mpr]
+        return covered
+
+    def _two_hop_changed(self, candidates: NodeSet):
+        if self._mpr_drift >= self.mpr_drift_limit:
+            self.select_mprs()
+        else:
+            self._repair_mprs(candidates)
+
+    def _repair_mprs(self, candidates: NodeSet):
+        uncovered = candidates & self.two_hop_neighbors()
+        uncovered -= self._covered()
+        if uncovered:
+            self._mpr_drift += 1
+            self._greedy_cover(uncovered)
+
+    def _greedy_cover(self, uncovered: NodeSet):
+        # RFC 3626 8.3.1: sole providers first, then maximum remaining coverage
+        neighbors = self.hello_neighbors
+        once, twice = NodeSet(), NodeSet()
+        for advertised in neighbors.values():
+            twice |= once & advertised
+            once |= advertised
+        sole = uncovered - twice
+        if sole:
+            for neighbor, advertised in neighbors.items():
+                if not sole.isdisjoint(advertised):
+                    self.mprs.add(neighbor)
+                    uncovered -= advertised
+        while uncovered:
+            best = max(neighbors, key=lambda n: (neighbors[n].intersection_count(uncovered), n))
+            self.mprs.add(best)
+            uncovered -= neighbors[best]
+
+    def select_mprs(self) -> Set[str]:
+        """Full greedy MPR computation from scratch"""
+        self.mprs = set()
+        self._mpr_drift = 0
+        self._greedy_cover(self.two_hop_neighbors())
+        return set(self.mprs)
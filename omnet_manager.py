@@ -4,17 +4,46 @@ OMNeT++ Manager - Python controller for OMNeT++ and INETMANET simulation engine
 
 """
 
+import errno
 import os
 import subprocess
 import re
+import signal
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 import logging
 
+from early_stop import STOP_COMPLETED, EarlyStopPolicy, RunMonitor
+from instrumentation import OUTPUT_TAIL_LINES, RunMetrics, RunRecorder, classify_failure
+from parsim import (COMM_DIR, DEFAULT_COMMUNICATIONS, DEFAULT_LOOKAHEAD_CLASS, ParallelConfig,
+                    PartitionProcesses, check_partitionable, partition_args, partition_result_dir,
+                    prepare_comm_dir)
+from recording import DEFAULT_PROFILE, recording_config
+from runtime_model import DEFAULT_CPU_TIME_LIMIT, DEFAULT_RUN_TIMEOUT, parse_quantity
+from scheduler import ResourceLimits, apply_limits, limited_command
+
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Trafik uygulaması zamanlaması (UDPBasicApp)
+TRAFFIC_START_TIME = 2.0
+TRAFFIC_SEND_INTERVAL = 0.5
+
+# Cmdenv bu satırı kütüphane/NED yükleme ve ağ kurulumu bittikten sonra yazar
+SIM_START_MARKER = "Running simulation..."
+
+# Yakınsayan koşu SIGTERM ile durdurulunca finish() ve sonuç yazımı için süre
+FINISH_GRACE_PERIOD = 60.0
+
+# create_config'in tüm protokoller için kullandığı network (IdealRadioMedium, kablosuz)
+GENERIC_NETWORK = "inet.examples.aodv.GenericManetNetwork"
+
+# "Tüm protokolleri karşılaştır" ile çalıştırılan protokoller
+COMPARE_PROTOCOLS = ["AODV", "DSR", "OLSR", "DYMO", "BATMAN"]
+
 
 class OmnetManager:
     """
@@ -41,8 +70,57 @@ class OmnetManager:
         # Config dosyası yolu
         self.config_file = os.path.join(self.working_dir, "omnetpp.ini")
         
+        # Çalışan opp_run süreci (iptal için)
+        self._process = None
+        self._process_lock = threading.Lock()
+        self._cancel_requested = False
+        
+        # Koşu başına ölçümler (faz süreleri, CPU, RSS, sonuç dosyaları)
+        self.recorder = RunRecorder()
+        self.current_run: Optional[RunMetrics] = None
+        
+        # opp_run sürecine uygulanacak kaynak limitleri (scheduler ayarlar)
+        self.resource_limits: Optional[ResourceLimits] = None
+        # Duvar saati zaman aşımı (saniye); scheduler tahmini çalışma süresine göre ayarlar
+        self.run_timeout: float = DEFAULT_RUN_TIMEOUT
+        
+        # Erken durdurma kuralları (bkz. early_stop.py); None = her koşu sonuna kadar
+        self.early_stop: Optional[EarlyStopPolicy] = None
+        self._early_stop_decision = None  # (sebep, abort) - monitör thread'i yazar
+        
+        # Paralel simülasyon (PDES) ayarları; create_config belirler, None = tek süreç
+        self.parallel: Optional[ParallelConfig] = None
+        
         logger.info(f"OMNeT++ Manager initialized: {self.omnet_executable}")
 
+    def worker_copy(self, name: str) -> "OmnetManager":
+        """
+        Paralel koşular için kopya: aynı kurulum, ayrı ini dosyası ve sonuç klasörü
+        (omnetpp-<name>.ini, results/<name>/) - eşzamanlı işler birbirinin
+        dosyalarını ezmez.
+        """
+        worker = OmnetManager(self.omnet_executable, self.working_dir, self.library_path, self.ned_path)
+        worker.results_dir = os.path.join(self.results_dir, name)
+        os.makedirs(worker.results_dir, exist_ok=True)
+        worker.config_file = os.path.join(self.working_dir, f"omnetpp-{name}.ini")
+        worker.recorder = self.recorder
+        worker.early_stop = self.early_stop
+        return worker
+
+    def configure_metrics_export(self, jsonl_path: str = None, prometheus_path: str = None):
+        """Her koşunun ölçümlerini JSON lines dosyasına ekle / Prometheus textfile'ı güncelle"""
+        self.recorder.jsonl_path = jsonl_path
+        self.recorder.prometheus_path = prometheus_path
+
+    def last_run_metrics(self) -> Optional[RunMetrics]:
+        """Tamamlanan son koşunun ölçümleri"""
+        return self.recorder.last()
+
+    def _finish_run(self, run: RunMetrics):
+        if self.current_run is run:
+            self.current_run = None
+        self.recorder.record(run)
+
     def ensure_config_exists(self):
         """Config dosyası kontrolü - create_config ile sıfırdan yapılıyor"""
         pass
@@ -52,33 +130,64 @@ class OmnetManager:
                      min_speed=1.0, max_speed=5.0, pause_time=2.0, area_size="500m",
                      radio_power=20.0, radio_range=250.0, bitrate="2Mbps",
                      aodv_timeout=3.0, aodv_hello_interval=1.0, aodv_hello_loss=2,
-                     seed=0, num_traffic_pairs=3):
+                     seed=0, num_traffic_pairs=3, common_random_numbers=False, antithetic=False,
+                     cpu_time_limit=DEFAULT_CPU_TIME_LIMIT, warmup_period=None, record_vectors=False,
+                     recording=DEFAULT_PROFILE, partitions=1,
+                     parsim_communications=DEFAULT_COMMUNICATIONS, parsim_lookahead=DEFAULT_LOOKAHEAD_CLASS):
         """
         OMNeT++ için .ini dosyasını sıfırdan, garantili ayarlarla oluşturur.
         Kesin Çözüm: Her protokol için özel host tipi kullanılıyor (Altın Anahtar Stratejisi)
+        
+        common_random_numbers: mobilite, trafik ve geri kalan her şey ayrı RNG
+            akışı kullanır; aynı seed ile tüm protokoller aynı hareketi ve
+            trafiği görür (eşleştirilmiş karşılaştırma, bkz. variance_reduction.py)
+        antithetic: ini seviyesindeki rastgele çekilişleri (başlangıç konumu,
+            hız) aynalar; aynı seed'in normal koşusuyla birlikte ortalanır
+        cpu_time_limit: OMNeT++ cpu-time-limit (saniye); scheduler tahmini
+            çalışma süresinden pay bırakarak hesaplar (bkz. runtime_model.py)
+        warmup_period: saniye; bu andan önceki istatistikler atılır (geçici
+            rejim, bkz. warmup.py - pilot koşu ile otomatik belirlenir)
+        record_vectors: uygulama vektörlerini (udpApp sentPk/rcvdPk/
+            endToEndDelay) kaydet - pilot ve izlenen koşular için
+        recording: kayıt profili ("results", "pdr", "full") ya da metrik
+            listesi; yalnızca gereken istatistikler kaydedilir (bkz. recording.py)
+        network_name: NED ağı (varsayılan GenericManetNetwork); numHosts ve
+            hostType parametreleri ile host[] dizisi olmalı. Yalnızca
+            bölümleri gecikmeli bağlantılarla bağlı ağlar (kablolu ya da
+            link-delay modelleri) bölünebilir, kablosuz INET ağları bölünemez
+        partitions: >1 ise paralel simülasyon (PDES): host[*] bu kadar bölüme
+            ayrılır, her bölüm ayrı opp_run sürecinde koşar (bkz. parsim.py)
+        parsim_communications: "named_pipes" ya da "file" (yerel iletişim)
+        parsim_lookahead: null message protokolünün lookahead sınıfı
         """
+        config_start = time.perf_counter()
+        if self.current_run is not None and self.current_run.status != "pending":
+            # Önceki koşu parse edilmeden yeni config: ölçümlerini yine kaydet
+            self._finish_run(self.current_run)
+        run = RunMetrics(protocol=protocol, seed=seed, num_nodes=num_nodes, sim_time_limit=str(sim_time_limit),
+                         num_traffic_pairs=num_traffic_pairs, area_size=str(area_size), radio_range=radio_range,
+                         warmup_period=float(warmup_period or 0.0), partitions=int(partitions))
+        parallel = ParallelConfig(int(partitions), parsim_communications, parsim_lookahead)
+        
         # 1. PROTOKOL VE NETWORK STRATEJİSİ
         # GenericManetNetwork: Tüm protokoller için ortak network
         # IdealRadioMedium kullanıyor, hostType parametrik
         protocol_upper = protocol.upper()
         use_custom_radio = True  # GenericManetNetwork IdealRadioMedium kullanıyor
-        generic_network = "inet.examples.aodv.GenericManetNetwork"
+        generic_network = GENERIC_NETWORK
         
         if protocol_upper == "AODV":
             # AODV - Reaktif protokol
-            network_name = generic_network
             host_type = "inet.node.aodv.AODVRouter"
             routing_conf = ""
         
         elif protocol_upper == "GPSR":
             # GPSR - Konum tabanlı routing
-            network_name = generic_network
             host_type = "inet.node.gpsr.GPSRRouter"
             routing_conf = ""
         
         elif protocol_upper == "DSDV":
             # DSDV - Proaktif (table-driven) protokol
-            network_name = generic_network
             host_type = "inet.node.inet.AdhocHost"
             routing_conf = """
 # DSDV Routing Protocol Activation
@@ -91,7 +200,6 @@ class OmnetManager:
             
         elif protocol_upper == "DSR":
             # DSR - Reaktif kaynak yönlendirme
-            network_name = generic_network
             host_type = "inet.node.inet.AdhocHost"
             routing_conf = """
 # DSR Routing Protocol Activation
@@ -103,7 +211,6 @@ class OmnetManager:
             
         elif protocol_upper == "OLSR":
             # OLSR - Proaktif link-state
-            network_name = generic_network
             host_type = "inet.node.inet.AdhocHost"
             routing_conf = """
 # OLSR Routing Protocol Activation
@@ -117,14 +224,16 @@ class OmnetManager:
             
         else:
             # Varsayılan: AODV
-            network_name = generic_network
             host_type = "inet.node.aodv.AODVRouter"
             routing_conf = ""
         
+        # Çağıranın NED ağı (ör. PDES için kablolu bir model), yoksa ortak network
         if network_name and network_name.strip():
             network_name = network_name.strip()
         else:
-            network_name = "inet.examples.adhoc.ieee80211.Net80211"
+            network_name = generic_network
+        # Kablosuz INET ağları bölünemez: bölümler kurulumda duracağı için hiç başlatılmaz
+        check_partitionable(network_name, parallel.partitions)
 
         # 2. RADYO AYARLARI (Protokole Özel)
         if use_custom_radio:
@@ -168,22 +277,47 @@ class OmnetManager:
         
         # Dinamik trafik çiftleri oluştur (daha fazla kaynak-hedef çifti = daha stabil sonuçlar)
         traffic_config = self._generate_traffic_config(num_nodes, num_traffic_pairs)
+        rng_config = self._generate_rng_config(common_random_numbers)
+        
+        # Antitetik koşu: uniform(a, b) yerine a + b - uniform(a, b) (aynı U, ayna değer)
+        if antithetic:
+            speed_expr = f"{min_speed}mps + {max_speed}mps - uniform({min_speed}mps, {max_speed}mps)"
+            position_expr = f"{area_size} - uniform(0m, {area_size})"
+        else:
+            speed_expr = f"uniform({min_speed}mps, {max_speed}mps)"
+            position_expr = f"uniform(0m, {area_size})"
+        
+        # Geçici rejim: warmup-period öncesi kayıtlar istatistiklere girmez
+        warmup_line = ""
+        if warmup_period:
+            if float(warmup_period) >= parse_quantity(sim_time_limit, 0.0):
+                raise ValueError(f"warmup-period ({warmup_period}s) sim-time-limit'ten ({sim_time_limit}) kısa olmalı")
+            warmup_line = f"warmup-period = {float(warmup_period):g}s\n"
+        
+        # Kayıt profili: yalnızca istenen metriklerin istatistikleri (+ pilot/izleme vektörleri)
+        stats_config = recording_config(recording, vectors=record_vectors)
+        
+        # PDES: bölüm ataması ve parsim ayarları (tek bölümde boş)
+        parsim_config = ""
+        if parallel.enabled:
+            parsim_config = parallel.ini_lines(num_nodes, Path(self._comm_dir()).as_posix() + "/")
         
         config_content = f"""[General]
 network = {network_name}
 sim-time-limit = {sim_time_limit}
-cpu-time-limit = 300s
+{warmup_line}cpu-time-limit = {int(cpu_time_limit)}s
 record-eventlog = false
 cmdenv-express-mode = true
+result-dir = {Path(self.results_dir).as_posix()}
 
+{parsim_config}
 # --- DETERMINISTIK SIMÜLASYON İÇİN KRİTİK ---
 # Aynı seed = aynı sonuçlar (tekrarlanabilirlik)
 seed-set = {seed}
 repeat = 1
 
 # RNG (Random Number Generator) Kontrolü
-# seed-set zaten tüm RNG'leri kontrol ediyor, ekstra ayar gereksiz
-num-rngs = 1
+{rng_config}
 
 # --- NETWORK VE HOST AYARLARI ---
 *.numHosts = {num_nodes}
@@ -202,12 +336,12 @@ num-rngs = 1
 *.host[*].mobility.startTime = 0s
 
 # Hız ve Bekleme
-*.host[*].mobility.speed = uniform({min_speed}mps, {max_speed}mps)
+*.host[*].mobility.speed = {speed_expr}
 *.host[*].mobility.waitTime = uniform({pause_time}s, {pause_time}s)
 
 # Başlangıç Pozisyonları
-*.host[*].mobility.x = uniform(0m, {area_size})
-*.host[*].mobility.y = uniform(0m, {area_size})
+*.host[*].mobility.x = {position_expr}
+*.host[*].mobility.y = {position_expr}
 *.host[*].mobility.z = 0m
 
 # HAREKET SINIRLARI (BU EKSİKTİ - KRİTİK!)
@@ -237,9 +371,7 @@ num-rngs = 1
 {radio_config}
 
 # İstatistik kayıt ayarları (sonuç parse için gerekli)
-**.scalar-recording = true
-**.vector-recording = false
-**.cmdenv-log-level = info
+{stats_config}**.cmdenv-log-level = info
 """
 
         # Dosyayı UTF-8 olarak kaydet
@@ -247,6 +379,9 @@ num-rngs = 1
             with open(self.config_file, "w", encoding="utf-8") as f:
                 f.write(config_content)
             
+            run.add_phase("config", time.perf_counter() - config_start)
+            self.current_run = run
+            self.parallel = parallel if parallel.enabled else None
             logger.info(f"[PYTHON] Konfigürasyon oluşturuldu: {protocol} -> {host_type} (Network: {network_name})")
             return self.config_file
             
@@ -254,6 +389,57 @@ num-rngs = 1
             logger.error(f"Config oluşturma hatası: {e}")
             raise
 
+    def _comm_dir(self) -> str:
+        """PDES iletişim klasörü (isimli boru / mesaj dosyaları); her ini dosyasının kendi klasörü"""
+        return os.path.join(self.working_dir, COMM_DIR, Path(self.config_file).stem)
+
+    def result_dirs(self) -> List[str]:
+        """Son konfigürasyonun sonuç klasörleri: tek süreçte results_dir, PDES'te bölüm başına bir klasör"""
+        if self.parallel is None:
+            return [self.results_dir]
+        return [partition_result_dir(self.results_dir, i) for i in range(self.parallel.partitions)]
+
+    @staticmethod
+    def _generate_rng_config(common_random_numbers: bool) -> str:
+        """
+        RNG akışları. Tek akışta protokolün kendi çekilişleri (jitter, backoff)
+        mobilite dizisini kaydırır; CRN modunda her alt sistemin kendi akışı var.
+        İlk eşleşen satır geçerli olduğundan genel '**' eşlemesi en sonda.
+        """
+        if not common_random_numbers:
+            return ("# seed-set zaten tüm RNG'leri kontrol ediyor, ekstra ayar gereksiz\n"
+                    "num-rngs = 1")
+        return "\n".join([
+            "# Common random numbers: 0 = mobilite, 1 = trafik, 2 = diğer her şey",
+            "num-rngs = 3",
+            "*.host[*].mobility.rng-0 = 0",
+            "*.host[*].udpApp[*].rng-0 = 1",
+            "**.rng-0 = 2",
+        ])
+
+    @staticmethod
+    def traffic_pairs(num_nodes: int, num_pairs: int) -> List[Tuple[int, int]]:
+        """
+        Trafik çiftlerinin host indeksleri: [(0, 1), (2, 3), ...]
+        
+        _generate_traffic_config ve analitik tahminciler aynı eşleştirmeyi kullanır.
+        """
+        # En az 4 node gerekli (2 çift için)
+        if num_nodes < 4:
+            num_pairs = 1
+        
+        # Maksimum çift sayısı = num_nodes / 2
+        max_pairs = num_nodes // 2
+        num_pairs = min(num_pairs, max_pairs)
+        
+        # Kaynak: 0, 2, 4, ...  Hedef: 1, 3, 5, ...
+        return [(i * 2, i * 2 + 1) for i in range(num_pairs)]
+
+    @staticmethod
+    def traffic_start_time(pair_index: int) -> float:
+        """Trafik çiftinin UDP uygulama başlangıç zamanı (saniye)"""
+        return round(TRAFFIC_START_TIME + pair_index * 0.1, 6)
+
     def _generate_traffic_config(self, num_nodes: int, num_pairs: int) -> str:
         """
         Çoklu kaynak-hedef çiftleri için trafik konfigürasyonu oluşturur.
@@ -270,13 +456,8 @@ num-rngs = 1
         Returns:
             OMNeT++ config formatında trafik ayarları string'i
         """
-        # En az 4 node gerekli (2 çift için)
-        if num_nodes < 4:
-            num_pairs = 1
-        
-        # Maksimum çift sayısı = num_nodes / 2
-        max_pairs = num_nodes // 2
-        num_pairs = min(num_pairs, max_pairs)
+        pairs = self.traffic_pairs(num_nodes, num_pairs)
+        num_pairs = len(pairs)
         
         config_lines = []
         config_lines.append(f"# {num_pairs} adet kaynak-hedef çifti oluşturuluyor")
@@ -285,9 +466,7 @@ num-rngs = 1
         
         base_port = 5000
         
-        for i in range(num_pairs):
-            src_idx = i * 2        # 0, 2, 4, ...
-            dst_idx = i * 2 + 1    # 1, 3, 5, ...
+        for i, (src_idx, dst_idx) in enumerate(pairs):
             port = base_port + i
             
             # Gönderen node ayarları
@@ -297,8 +476,8 @@ num-rngs = 1
             config_lines.append(f'*.host[{src_idx}].udpApp[0].destAddresses = "host[{dst_idx}]"')
             config_lines.append(f"*.host[{src_idx}].udpApp[0].destPort = {port}")
             config_lines.append(f"*.host[{src_idx}].udpApp[0].messageLength = 512B")
-            config_lines.append(f"*.host[{src_idx}].udpApp[0].sendInterval = 0.5s")
-            config_lines.append(f"*.host[{src_idx}].udpApp[0].startTime = {2 + i * 0.1}s")
+            config_lines.append(f"*.host[{src_idx}].udpApp[0].sendInterval = {TRAFFIC_SEND_INTERVAL}s")
+            config_lines.append(f"*.host[{src_idx}].udpApp[0].startTime = {self.traffic_start_time(i)}s")
             config_lines.append("")
             
             # Alıcı node ayarları
@@ -345,7 +524,7 @@ num-rngs = 1
             "-u", "Cmdenv",
             "-l", library_path_full,
             "-n", self.ned_path,
-            "-f", "omnetpp.ini",
+            "-f", os.path.basename(self.config_file),
             "-c", "General",
             "-r", "0"  # KRİTİK: Run numarasını sabitleyerek seed'in çalışmasını garanti et
         ]
@@ -353,42 +532,283 @@ num-rngs = 1
         logger.info(f"[PYTHON] Simülasyon Başlıyor... (Komut: {' '.join(cmd)})")
         logger.info(f"Working directory: {self.working_dir}")
         
+        run = self.current_run if self.current_run is not None else RunMetrics()
+        self.current_run = run
+        run.started_at = time.time()
+        
+        with self._process_lock:
+            self._cancel_requested = False
+            self._early_stop_decision = None
+        
+        # PDES: bölüm başına bir süreç, her biri kendi sonuç klasörüne yazar
+        result_dirs = self.result_dirs()
+        if self.parallel is not None:
+            prepare_comm_dir(self._comm_dir())
+            for result_dir in result_dirs:
+                os.makedirs(result_dir, exist_ok=True)
+            cmds = [cmd + partition_args(i, len(result_dirs), result_dir)
+                    for i, result_dir in enumerate(result_dirs)]
+        else:
+            cmds = [cmd]
+        
+        vector_files = []
+        if self.early_stop is not None and self.early_stop.needs_vectors:
+            # Eski koşunun vektör dosyası monitörü yanıltmasın
+            vector_files = [os.path.join(result_dir, "General-#0.vec") for result_dir in result_dirs]
+            for vector_file in vector_files:
+                if os.path.exists(vector_file):
+                    os.remove(vector_file)
+        
+        # Kaynak limitleri exec'ten önce çocukta kurulur; olmuyorsa (Windows) başlatıldıktan sonra prlimit
+        limited_cmds = [limited_command(partition_cmd, self.resource_limits) for partition_cmd in cmds]
+        
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=self.working_dir,
-                env=env,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=600  # 10 dakika timeout
-            )
+            spawn_start = time.perf_counter()
+            processes = []
+            try:
+                for partition_cmd, limited_cmd in zip(cmds, limited_cmds):
+                    processes.append(subprocess.Popen(
+                        limited_cmd or partition_cmd,
+                        cwd=self.working_dir,
+                        env=env,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                        encoding='utf-8',
+                        errors='replace',
+                        start_new_session=(os.name == "posix")  # iptal ederken tüm süreç grubunu sonlandırmak için
+                    ))
+            except OSError:
+                # Başlatılamayan bölüm: diğerleri onun mesajlarını sonsuza dek bekler
+                for started in processes:
+                    self._terminate(started, grace_period=0.0)
+                raise
+            process = processes[0] if len(processes) == 1 else PartitionProcesses(processes)
+            spawned = time.perf_counter()
+            run.add_phase("spawn", spawned - spawn_start)
+            for started, limited_cmd in zip(processes, limited_cmds):
+                if limited_cmd is None:
+                    apply_limits(started.pid, self.resource_limits)
+            with self._process_lock:
+                self._process = process
+                cancelled_early = self._cancel_requested
+            if cancelled_early:
+                self._terminate(process)
+            
+            # Çıktıyı thread'lerle oku: kurulum bitişini (SIM_START_MARKER) zamanla.
+            # PDES'te ilerleme bölüm 0'dan; diğer bölümlerin stdout'u yalnızca boşaltılır.
+            stdout_lines, stderr_lines, marker, other_lines = [], [], [], []
+            readers = []
+            for i, started in enumerate(processes):
+                readers.append(threading.Thread(target=self._read_output, daemon=True,
+                                                 args=(started.stdout, stdout_lines if i == 0 else other_lines,
+                                                       marker if i == 0 else None)))
+                readers.append(threading.Thread(target=self._read_output, args=(started.stderr, stderr_lines, None),
+                                                daemon=True))
+            for reader in readers:
+                reader.start()
+            monitor = None
+            if self.early_stop is not None:
+                monitor = RunMonitor(self.early_stop, vector_files, stdout_lines, self._stop_early,
+                                     warmup=run.warmup_period)
+                monitor.start()
+            
+            try:
+                if isinstance(process, PartitionProcesses):
+                    returncode, usage = process.wait_all(self.run_timeout, self._wait_process, self._terminate)
+                else:
+                    returncode, usage = self._wait_process(process, timeout=self.run_timeout)
+            except subprocess.TimeoutExpired:
+                self._terminate(process, grace_period=0.0)
+                process.wait()
+                run.status = "timeout"
+                raise
+            finally:
+                exited = time.perf_counter()
+                setup_end = marker[0] if marker else spawned
+                run.add_phase("setup", setup_end - spawned)
+                run.add_phase("simulate", exited - setup_end)
+                with self._process_lock:
+                    self._process = None
+                for reader in readers:
+                    reader.join(timeout=5.0)
+                if monitor is not None:
+                    monitor.finish()
+            
+            run.returncode = returncode
+            run.setup_done = bool(marker)
+            run.output_tail = [line.rstrip() for line in
+                               stdout_lines[-OUTPUT_TAIL_LINES:] + stderr_lines[-OUTPUT_TAIL_LINES:]]
+            if usage is not None:
+                run.record_rusage(usage)
+            stdout, stderr = "".join(stdout_lines), "".join(stderr_lines)
+            
+            if self._cancel_requested:
+                logger.warning("[PYTHON] Simülasyon kullanıcı tarafından iptal edildi.")
+                run.status = "cancelled"
+                run.failure = classify_failure(run)
+                self._finish_run(run)
+                return False
+            
+            decision = self._early_stop_decision
+            if decision is not None:
+                reason, abort = decision
+                run.stop_reason = reason
+                run.sim_time_reached = monitor.state.t if monitor is not None else None
+                if abort:
+                    logger.warning(f"[PYTHON] Koşu erken durduruldu ({reason}) - başarısız sayılıyor.")
+                    run.status = "aborted"
+                    run.failure = classify_failure(run)
+                    self._finish_run(run)
+                    return False
+                # Yakınsama: SIGTERM sonrası finish() sonuçları yazdı, çıkış kodu önemsiz
+                logger.info(f"[PYTHON] Koşu yakınsadı, t={run.sim_time_reached}s'de durduruldu.")
+                run.status = "ok"
+                return True
             
             # STDOUT ve STDERR'i konsola yazdır
-            if result.stdout:
-                logger.info(f"STDOUT:\n{result.stdout}")
-            if result.stderr:
-                logger.error(f"STDERR:\n{result.stderr}")
+            if stdout:
+                logger.info(f"STDOUT:\n{stdout}")
+            if stderr:
+                logger.error(f"STDERR:\n{stderr}")
             
-            if result.returncode != 0:
-                logger.error(f"[PYTHON] SİMÜLASYON HATASI! Return code: {result.returncode}")
-                if result.returncode == 3221225781:
+            if returncode != 0:
+                logger.error(f"[PYTHON] SİMÜLASYON HATASI! Return code: {returncode}")
+                if returncode == 3221225781:
                     logger.error("HATA: Access Violation (0xC0000005) - DLL eksik veya path yanlış!")
                     logger.error("Kontrol edin: MinGW bin klasörü PATH'e eklendi mi?")
+                run.status = "failed"
+                run.failure = classify_failure(run)
+                logger.error(f"[PYTHON] Hata sınıfı: {run.failure}")
+                self._finish_run(run)
                 return False
-                
+            
+            if run.hit_cpu_limit():
+                # cpu-time-limit: OMNeT++ normal çıkar ama sonuçlar yarım kalmıştır
+                logger.error("[PYTHON] CPU süre limiti doldu, sonuçlar eksik - koşu geçersiz sayılıyor.")
+                run.status = "failed"
+                run.failure = classify_failure(run)
+                self._finish_run(run)
+                return False
+            
+            # Ölçümler parse_results sonunda kaydedilir
+            run.status = "ok"
+            run.stop_reason = STOP_COMPLETED
             logger.info("[PYTHON] Simülasyon Başarıyla Tamamlandı.")
             return True
             
         except subprocess.TimeoutExpired:
-            logger.error("[PYTHON] Simülasyon zaman aşımına uğradı (10 dakika)")
+            logger.error(f"[PYTHON] Simülasyon zaman aşımına uğradı ({self.run_timeout:.0f} s)")
+            run.failure = classify_failure(run)
+            self._finish_run(run)
             return False
         except Exception as e:
             logger.error(f"[PYTHON] Beklenmeyen Hata: {e}")
             import traceback
             logger.error(traceback.format_exc())
+            # Kaynak yetersizliğinden başlatılamadıysa tekrar denenebilir
+            transient = isinstance(e, OSError) and e.errno in (errno.EAGAIN, errno.ENOMEM)
+            run.status = "spawn_error" if transient else "failed"
+            run.output_tail.append(str(e))
+            run.failure = classify_failure(run)
+            self._finish_run(run)
+            return False
+
+    @staticmethod
+    def _read_output(stream, lines: List[str], marker: Optional[List[float]]):
+        """Süreç çıktısını satır satır topla; marker verilmişse kurulum bitiş zamanını yaz"""
+        for line in stream:
+            if marker is not None and not marker and SIM_START_MARKER in line:
+                marker.append(time.perf_counter())
+            lines.append(line)
+        stream.close()
+
+    @staticmethod
+    def _wait_process(process: subprocess.Popen, timeout: float):
+        """
+        Süreci bekle; (returncode, rusage) döner.
+        
+        POSIX'te os.wait4 çocuk sürecin CPU süresini ve tepe RSS'ini de verir;
+        diğer platformlarda rusage None'dır.
+        """
+        if not hasattr(os, "wait4"):
+            return process.wait(timeout), None
+        
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while True:
+            try:
+                pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+            except ChildProcessError:
+                # Başka bir thread (ör. poll()) süreci zaten topladı
+                return process.wait(), None
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(status)
+                return process.returncode, usage
+            if time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def _stop_early(self, reason: str, abort: bool):
+        """
+        RunMonitor çağırır: kural tetiklendi (abort) ya da metrikler yakınsadı.
+        Yakınsamada SIGTERM'den sonra Cmdenv koşuyu bitirip finish() çağırır;
+        bunun için uzun bekleme süresi tanınır. Windows'ta terminate sert
+        sonlandırma olduğundan yakınsama durdurması yapılmaz.
+        """
+        if not abort and os.name != "posix":
+            logger.info("[PYTHON] Yakınsama durdurması yalnızca POSIX'te destekleniyor, koşu devam ediyor.")
+            return
+        with self._process_lock:
+            process = self._process
+            if process is None or self._cancel_requested or self._early_stop_decision is not None:
+                return
+            self._early_stop_decision = (reason, abort)
+        self._terminate(process, grace_period=5.0 if abort else FINISH_GRACE_PERIOD)
+
+    def cancel_simulation(self, grace_period: float = 5.0) -> bool:
+        """
+        Çalışan simülasyonu iptal eder (başka bir thread'den çağrılabilir).
+        
+        Önce nazikçe sonlandırır (terminate), grace_period saniye içinde
+        kapanmazsa zorla öldürür (kill). Bloklamaz; GUI thread'inden
+        güvenle çağrılabilir. Çalışan süreç yoksa False döner.
+        """
+        with self._process_lock:
+            self._cancel_requested = True
+            process = self._process
+        if process is None or process.poll() is not None:
             return False
+        logger.warning("[PYTHON] Simülasyon iptal ediliyor...")
+        self._terminate(process, grace_period)
+        return True
+
+    @staticmethod
+    def _terminate(process: subprocess.Popen, grace_period: float = 5.0):
+        """terminate -> grace_period sonra hâlâ çalışıyorsa kill (PDES'te tüm bölümler)"""
+        def send(sig):
+            for target in getattr(process, "processes", (process,)):
+                try:
+                    if os.name == "posix":
+                        os.killpg(target.pid, sig)
+                    elif sig == signal.SIGTERM:
+                        target.terminate()
+                    else:
+                        target.kill()
+                except (ProcessLookupError, PermissionError):
+                    pass
+        
+        send(signal.SIGTERM)
+        
+        def force_kill():
+            if process.poll() is None:
+                logger.warning("[PYTHON] Süreç kapanmadı, zorla sonlandırılıyor (kill).")
+                send(getattr(signal, "SIGKILL", signal.SIGTERM))
+        
+        timer = threading.Timer(grace_period, force_kill)
+        timer.daemon = True
+        timer.start()
 
     def parse_results(self):
         """
@@ -398,10 +818,35 @@ num-rngs = 1
         Eski parser tüm ağ trafiğini (routing, hello, ack paketleri) sayıyordu.
         Bu parser sadece uygulama katmanı (UDP/Ping) trafiğini filtreler.
         """
-        # En yeni .sca dosyasını bul
-        sca_files = list(Path(self.results_dir).glob("*.sca"))
+        run = self.current_run
+        parse_start = time.perf_counter()
+        try:
+            stats = self._parse_latest_sca()
+            if run is not None and run.stop_reason:
+                stats['stop_reason'] = run.stop_reason
+                if run.sim_time_reached is not None:
+                    stats['sim_time_reached'] = run.sim_time_reached
+            return stats
+        finally:
+            if run is not None and run.status != "pending":
+                run.add_phase("parse", time.perf_counter() - parse_start)
+                dirs = self.result_dirs()
+                for result_dir in dirs:
+                    prefix = f"{os.path.basename(result_dir)}/" if len(dirs) > 1 else ""
+                    run.record_result_files(result_dir, prefix)
+                self._finish_run(run)
+
+    def _parse_latest_sca(self):
+        """parse_results'ın asıl işi: en yeni .sca dosyasından istatistikler"""
+        # En yeni .sca dosyasını bul (PDES: her bölüm klasöründe bir tane, sayaçlar toplanır)
+        latest_files = []
+        for result_dir in self.result_dirs():
+            sca_files = list(Path(result_dir).glob("*.sca"))
+            if sca_files:
+                latest_files.append(max(sca_files, key=os.path.getmtime))
         
-        if not sca_files:
+        if len(latest_files) < len(self.result_dirs()):
+            # Eksik bölüm: toplamlar yanlış olur, sonuç yok sayılır
             logger.warning("[PYTHON] Sonuç dosyası bulunamadı.")
             return {
                 'sent': 0,
@@ -409,89 +854,89 @@ num-rngs = 1
                 'pdr': 0.0,
                 'avg_delay': 0.0,
                 'avg_hops': 0.0,
-                'avg_throughput': 0.0
+                'avg_throughput': 0.0,
+                'result_file': None  # gerçek %0 sonuçtan ayırt etmek için
             }
         
-        # En yeni dosyayı al
-        latest_sca = max(sca_files, key=os.path.getmtime)
-        
         stats = {
             'sent': 0,
             'received': 0,
             'pdr': 0.0,
             'avg_delay': 0.0,
             'avg_hops': 0.0,
-            'avg_throughput': 0.0
+            'avg_throughput': 0.0,
+            'result_file': str(latest_files[0])
         }
         
         try:
-            with open(latest_sca, 'r', encoding="utf-8", errors='ignore') as f:
-                for line in f:
-                    line = line.strip()
+            for latest_sca in latest_files:
+                with open(latest_sca, 'r', encoding="utf-8", errors='ignore') as f:
+                    for line in f:
+                        line = line.strip()
                     
-                    # Sadece scalar satırlarına bak
-                    if not line.startswith("scalar"):
-                        continue
+                        # Sadece scalar satırlarına bak
+                        if not line.startswith("scalar"):
+                            continue
                     
-                    parts = line.split()
-                    if len(parts) < 4:
-                        continue
+                        parts = line.split()
+                        if len(parts) < 4:
+                            continue
                     
-                    # Format: scalar <module_path> <stat_name> <value>
-                    module_path = parts[1] if len(parts) > 1 else ""
-                    stat_name = parts[2] if len(parts) > 2 else ""
-                    value = parts[3] if len(parts) > 3 else "0"
+                        # Format: scalar <module_path> <stat_name> <value>
+                        module_path = parts[1] if len(parts) > 1 else ""
+                        stat_name = parts[2] if len(parts) > 2 else ""
+                        value = parts[3] if len(parts) > 3 else "0"
                     
-                    # ÇOKLU TRAFİK ÇİFTLERİ DESTEĞİ
-                    # Tüm host'ların udpApp istatistiklerini topla
-                    # Eski: sadece host[0] ve host[1]
-                    # Yeni: tüm host'lar (host[0], host[2], host[4]... gönderir; host[1], host[3], host[5]... alır)
+                        # ÇOKLU TRAFİK ÇİFTLERİ DESTEĞİ
+                        # Tüm host'ların udpApp istatistiklerini topla
+                        # Eski: sadece host[0] ve host[1]
+                        # Yeni: tüm host'lar (host[0], host[2], host[4]... gönderir; host[1], host[3], host[5]... alır)
                     
-                    if "udpApp" in module_path:
-                        # Gönderilen paketler (çift indeksli host'lar: 0, 2, 4, ...)
-                        if "sentPk:count" in stat_name or "packetSent:count" in stat_name:
-                            try:
-                                stats['sent'] += int(value)
-                            except (ValueError, IndexError):
-                                pass
+                        if "udpApp" in module_path:
+                            # Gönderilen paketler (çift indeksli host'lar: 0, 2, 4, ...)
+                            if "sentPk:count" in stat_name or "packetSent:count" in stat_name:
+                                try:
+                                    stats['sent'] += int(value)
+                                except (ValueError, IndexError):
+                                    pass
                         
-                        # Alınan paketler (tek indeksli host'lar: 1, 3, 5, ...)
-                        if "rcvdPk:count" in stat_name or "packetReceived:count" in stat_name:
-                            try:
-                                stats['received'] += int(value)
-                            except (ValueError, IndexError):
-                                pass
+                            # Alınan paketler (tek indeksli host'lar: 1, 3, 5, ...)
+                            if "rcvdPk:count" in stat_name or "packetReceived:count" in stat_name:
+                                try:
+                                    stats['received'] += int(value)
+                                except (ValueError, IndexError):
+                                    pass
                         
-                        # DELAY - Alınan paketlerin gecikmesi
-                        if "endToEndDelay:mean" in stat_name or "delay:mean" in stat_name or "pingRtt:mean" in stat_name:
+                            # DELAY - Alınan paketlerin gecikmesi
+                            if "endToEndDelay:mean" in stat_name or "delay:mean" in stat_name or "pingRtt:mean" in stat_name:
+                                try:
+                                    delay_val = float(value)
+                                    if stats['avg_delay'] == 0.0:
+                                        stats['avg_delay'] = delay_val * 1000  # Saniyeden ms'ye
+                                except (ValueError, IndexError):
+                                    pass
+                    
+                        # 4. HOPS - Ortalama hop sayısı (genel metrik)
+                        if "hopCount:mean" in stat_name or "numHops:mean" in stat_name:
                             try:
-                                delay_val = float(value)
-                                if stats['avg_delay'] == 0.0:
-                                    stats['avg_delay'] = delay_val * 1000  # Saniyeden ms'ye
+                                hops_val = float(value)
+                                if stats['avg_hops'] == 0.0:
+                                    stats['avg_hops'] = hops_val
                             except (ValueError, IndexError):
                                 pass
-                    
-                    # 4. HOPS - Ortalama hop sayısı (genel metrik)
-                    if "hopCount:mean" in stat_name or "numHops:mean" in stat_name:
-                        try:
-                            hops_val = float(value)
-                            if stats['avg_hops'] == 0.0:
-                                stats['avg_hops'] = hops_val
-                        except (ValueError, IndexError):
-                            pass
                 
-                # PDR hesapla
-                if stats['sent'] > 0:
-                    stats['pdr'] = round((stats['received'] / stats['sent']) * 100.0, 2)
-                    
-                    # PDR %100'ü aşarsa uyarı ver
-                    if stats['pdr'] > 100.0:
-                        logger.warning(f"[UYARI] PDR %100'ü aşıyor ({stats['pdr']}%). Parsing kontrol edilmeli!")
+            # PDR hesapla
+            if stats['sent'] > 0:
+                stats['pdr'] = round((stats['received'] / stats['sent']) * 100.0, 2)
+                
+                # PDR %100'ü aşarsa uyarı ver
+                if stats['pdr'] > 100.0:
+                    logger.warning(f"[UYARI] PDR %100'ü aşıyor ({stats['pdr']}%). Parsing kontrol edilmeli!")
+            
+            # Delay ve Hops'u yuvarla
+            stats['avg_delay'] = round(stats['avg_delay'], 2)
+            stats['avg_hops'] = round(stats['avg_hops'], 2)
                 
-                # Delay ve Hops'u yuvarla
-                stats['avg_delay'] = round(stats['avg_delay'], 2)
-                stats['avg_hops'] = round(stats['avg_hops'], 2)
-                    
         except Exception as e:
             logger.error(f"[PYTHON] Sonuç okuma hatası: {e}")
             import traceback
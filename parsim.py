@@ -0,0 +1,197 @@
+"""
+Parallel distributed simulation (PDES) of one large scenario
+
+OMNeT++ can split a network into partitions that run in separate opp_run
+processes and exchange events through a communications backend, keeping
+their clocks consistent with the null message protocol. For a single
+machine the local backends are enough:
+
+    named_pipes    cNamedPipeCommunications (FIFOs on POSIX, named pipes on Windows)
+    file           cFileCommunications (message files in a directory; slow, but portable)
+
+ParallelConfig.ini_lines() adds the parsim-* options and the partition-id
+assignment to create_config's ini: host[*] is split into contiguous,
+equally sized blocks on traffic-pair boundaries (pair i is host 2i ->
+host 2i+1, so both ends of a UDP flow share a partition), and global
+modules (radio medium, configurator, visualizer) go to partition 0.
+run_simulation then launches one process per partition
+(--parsim-procid / --parsim-num-partitions), each with its own result
+directory (results/partition-<i>/), and parse_results sums the per-partition
+.sca files.
+
+Lookahead: the null message protocol can only let a partition run ahead of
+its neighbours by the lookahead, which cLinkDelayLookahead takes from the
+delays of the links crossing partition boundaries. Laziness trades null
+messages against waiting (parsim-nullmessageprotocol-laziness).
+
+Limitation: OMNeT++ partitions may only communicate through connected
+gates. INET's radio medium delivers frames with sendDirect and the network
+configurator reads every host's interfaces, so a stock INET wireless
+scenario stops during setup when split ("sendDirect ... across partitions"
+and similar). check_partitionable() refuses to split the WIRELESS_NETWORKS,
+including create_config's default GenericManetNetwork, before any process
+is started. PDES runs need a network_name whose hosts (host[], with the
+numHosts and hostType parameters) are connected by links with a
+propagation delay, i.e. a wired or link-delay model of the scenario.
+"""
+import os
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple
+
+from defaults import DEFAULT_PARSIM_COMMUNICATIONS as DEFAULT_COMMUNICATIONS, PARSIM_COMMUNICATIONS as COMMUNICATIONS
+
+SYNCHRONIZATION_CLASS = "cNullMessageProtocol"
+DEFAULT_LOOKAHEAD_CLASS = "cLinkDelayLookahead"
+DEFAULT_LAZINESS = 0.5
+COMM_DIR = "parsim-comm"  # in the working directory, one subdirectory per manager
+PARTITION_DIR = "partition-{}"  # result directory of a partition, inside results_dir
+# INET wireless networks (radio medium + configurator): they stop during setup when split
+WIRELESS_NETWORKS = ("inet.examples.aodv.GenericManetNetwork", "inet.examples.adhoc.ieee80211.Net80211")
+
+
+@dataclass
+class ParallelConfig:
+    """How one run is split across opp_run processes"""
+    partitions: int = 1
+    communications: str = DEFAULT_COMMUNICATIONS
+    lookahead_class: str = DEFAULT_LOOKAHEAD_CLASS
+    laziness: float = DEFAULT_LAZINESS
+
+    def __post_init__(self):
+        if self.partitions < 1:
+            raise ValueError(f"partitions must be at least 1, not {self.partitions}")
+        if self.communications not in COMMUNICATIONS:
+            raise ValueError(f"Unknown parsim communications '{self.communications}' "
+                             f"(expected one of {', '.join(COMMUNICATIONS)})")
+
+    @property
+    def enabled(self) -> bool:
+        return self.partitions > 1
+
+    def ini_lines(self, num_nodes: int, comm_prefix: str) -> str:
+        """parsim-* options and partition-id assignment for create_config"""
+        comm_class, prefix_option = COMMUNICATIONS[self.communications]
+        lines = [
+            "# --- PARALEL SİMÜLASYON (PDES) ---",
+            "parallel-simulation = true",
+            f"parsim-num-partitions = {self.partitions}",
+            f'parsim-communications-class = "{comm_class}"',
+            f'{prefix_option} = "{comm_prefix}"',
+            f'parsim-synchronization-class = "{SYNCHRONIZATION_CLASS}"',
+            f'parsim-nullmessageprotocol-lookahead-class = "{self.lookahead_class}"',
+            f"parsim-nullmessageprotocol-laziness = {self.laziness:g}",
+        ]
+        for partition, (first, last) in enumerate(partition_hosts(num_nodes, self.partitions)):
+            lines.append(f"*.host[{first}..{last}]**.partition-id = {partition}")
+        lines.append("# Global modules (radio medium, configurator) run in partition 0")
+        lines.append("**.partition-id = 0")
+        return "\n".join(lines) + "\n"
+
+
+def check_partitionable(network_name: str, partitions: int):
+    """ValueError if network_name cannot run as `partitions` partitions"""
+    if partitions > 1 and network_name in WIRELESS_NETWORKS:
+        raise ValueError(f"{network_name} is an INET wireless network and cannot be split into partitions "
+                         f"(the radio medium uses sendDirect across hosts); run it with partitions=1 or "
+                         f"use a wired or link-delay model of the scenario")
+
+
+def partition_hosts(num_nodes: int, partitions: int) -> List[Tuple[int, int]]:
+    """
+    Inclusive host index ranges per partition: contiguous, sizes differing by
+    at most one traffic pair, boundaries on even indices (pair i = hosts 2i, 2i+1).
+    """
+    pairs, odd = divmod(num_nodes, 2)
+    if partitions > pairs:
+        raise ValueError(f"{num_nodes} hosts cannot be split into {partitions} partitions "
+                         f"(at most {max(pairs, 1)}, one traffic pair each)")
+    ranges = []
+    first = 0
+    for partition in range(partitions):
+        size = 2 * (pairs // partitions + (1 if partition >= partitions - pairs % partitions else 0))
+        if partition == partitions - 1:
+            size += odd
+        ranges.append((first, first + size - 1))
+        first += size
+    return ranges
+
+
+def partition_result_dir(results_dir: str, partition: int) -> str:
+    return os.path.join(results_dir, PARTITION_DIR.format(partition))
+
+
+def prepare_comm_dir(path: str):
+    """Empty communications directory: stale pipes/files of an aborted run would be read as messages"""
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def partition_args(partition: int, partitions: int, result_dir: str) -> List[str]:
+    """opp_run options of one partition process (command-line options override the ini)"""
+    return [f"--parsim-procid={partition}", f"--parsim-num-partitions={partitions}",
+            f"--result-dir={result_dir}"]
+
+
+class PartitionProcesses:
+    """
+    The opp_run processes of one parallel run, used where run_simulation
+    handles a single subprocess.Popen: poll() is None while any partition
+    runs, OmnetManager._terminate signals every partition, and wait_all() fails
+    fast - a partition that exits with an error takes the others down
+    instead of leaving them blocked on its messages.
+    """
+
+    def __init__(self, processes: List[subprocess.Popen]):
+        self.processes = processes
+        self.pid = processes[0].pid
+        self.args = processes[0].args
+        self.returncode: Optional[int] = None
+
+    def poll(self) -> Optional[int]:
+        codes = [p.poll() for p in self.processes]
+        if any(code is None for code in codes):
+            return None
+        self.returncode = next((code for code in codes if code), 0)
+        return self.returncode
+
+    def wait(self):
+        for process in self.processes:
+            process.wait()
+        return self.poll()
+
+    def wait_all(self, timeout: float, wait_one: Callable, terminate: Callable):
+        """
+        (returncode, combined rusage or None); wait_one is OmnetManager._wait_process.
+        The first non-zero exit code wins; CPU time and peak RSS are summed
+        (the partitions run at the same time, memory admission needs the total).
+        """
+        deadline = time.monotonic() + timeout
+        pending = list(self.processes)
+        returncode, usages = 0, []
+        while pending:
+            for process in list(pending):
+                try:
+                    code, usage = wait_one(process, timeout=0.0)
+                except subprocess.TimeoutExpired:
+                    continue
+                pending.remove(process)
+                if usage is not None:
+                    usages.append(usage)
+                if code and not returncode:
+                    returncode = code
+                    for other in pending:  # the rest would wait for it forever
+                        terminate(other, grace_period=2.0)
+            if pending:
+                if time.monotonic() >= deadline:
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+                time.sleep(0.05)
+        self.returncode = returncode
+        if not usages:
+            return returncode, None
+        return returncode, SimpleNamespace(ru_utime=sum(u.ru_utime for u in usages),
+                                           ru_stime=sum(u.ru_stime for u in usages),
+                                           ru_maxrss=sum(u.ru_maxrss for u in usages))
@@ -0,0 +1,129 @@
+"""
+Result recording profiles
+
+create_config used to record every scalar of every module (MAC, radio, IP,
+routing of every host), while parse_results only reads a few udpApp
+statistics. A recording profile names the metrics a run is for; the ini
+then enables exactly the statistics and recording modes those metrics need
+and switches everything else off:
+
+    **.udpApp[*].sentPk.result-recording-modes = count
+    ...
+    **.result-recording-modes = -          (no result recorders elsewhere)
+    **.udpApp[*].sentPk:count.scalar-recording = true
+    ...
+    **.scalar-recording = false            (also finish()-time recordScalar)
+    **.vector-recording = false
+
+Restricting result-recording-modes removes the recorders themselves, so the
+cost of recording inside OMNeT++ shrinks along with the .sca file and
+parse time. The first matching ini line wins, hence the catch-alls last.
+
+Profiles: "results" (everything parse_results reports, the default), "pdr",
+and "full" (the old record-everything behaviour, for debugging). A list of
+metric names ("pdr", "delay", "hops") works as an ad-hoc profile. With
+vectors=True the application vectors used by warm-up detection and
+early stopping (warmup.py, early_stop.py) are recorded as well.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+APP_MODULE = "**.udpApp[*]"
+VECTOR_MEMORY_LIMIT = "64KiB"  # small buffers: monitors see vector data while the run is going
+
+
+@dataclass(frozen=True)
+class Statistic:
+    """A @statistic whose scalar recording modes parse_results reads"""
+    name: str  # e.g. sentPk
+    modes: Tuple[str, ...]  # scalar modes, recorded as <name>:<mode>
+    module: str = APP_MODULE
+
+
+# INET 3 names first, INET 4 names (packetSent / packetReceived) as well
+METRIC_STATISTICS: Dict[str, Tuple[Statistic, ...]] = {
+    "pdr": (Statistic("sentPk", ("count",)), Statistic("rcvdPk", ("count",)),
+            Statistic("packetSent", ("count",)), Statistic("packetReceived", ("count",))),
+    "delay": (Statistic("endToEndDelay", ("mean",)),),
+    "hops": (Statistic("hopCount", ("mean",), "**"), Statistic("numHops", ("mean",), "**")),
+}
+METRICS = tuple(METRIC_STATISTICS)
+
+# Application vectors (warmup.SENT_VECTORS etc.) and their recording mode
+VECTOR_STATISTICS: Dict[str, str] = {
+    "sentPk": "vector(packetBytes)",
+    "rcvdPk": "vector(packetBytes)",
+    "packetSent": "vector(packetBytes)",
+    "packetReceived": "vector(packetBytes)",
+    "endToEndDelay": "vector",
+}
+
+FULL_PROFILE = "full"
+DEFAULT_PROFILE = "results"
+PROFILES: Dict[str, Optional[Tuple[str, ...]]] = {
+    "results": METRICS,
+    "pdr": ("pdr",),
+    FULL_PROFILE: None,  # every scalar of every module
+}
+
+RecordingSpec = Union[str, Iterable[str], None]
+
+
+def resolve_metrics(recording: RecordingSpec = DEFAULT_PROFILE) -> Optional[Tuple[str, ...]]:
+    """
+    Metric names of a profile name, 'pdr,delay' or a list of metrics;
+    None means the full profile.
+    """
+    if recording is None:
+        recording = DEFAULT_PROFILE
+    if isinstance(recording, str):
+        if recording in PROFILES:
+            return PROFILES[recording]
+        recording = [m for m in recording.split(",") if m.strip()]
+    metrics = tuple(dict.fromkeys(m.strip() for m in recording))
+    unknown = [m for m in metrics if m not in METRIC_STATISTICS]
+    if unknown or not metrics:
+        raise ValueError(f"Unknown recording profile or metric {', '.join(unknown) or repr(recording)} "
+                         f"(profiles: {', '.join(PROFILES)}; metrics: {', '.join(METRICS)})")
+    return metrics
+
+
+def _vector_lines() -> List[str]:
+    return [f"{APP_MODULE}.{name}:vector*.vector-recording = true" for name in VECTOR_STATISTICS]
+
+
+def recording_config(recording: RecordingSpec = DEFAULT_PROFILE, vectors: bool = False) -> str:
+    """ini lines for a recording profile (see the module docstring)"""
+    metrics = resolve_metrics(recording)
+    lines = []
+    if vectors:
+        lines.append(f"output-vectors-memory-limit = {VECTOR_MEMORY_LIMIT}")
+
+    if metrics is None:
+        lines.append(f"# Recording profile: {FULL_PROFILE}")
+        lines.append("**.scalar-recording = true")
+        if vectors:
+            lines.extend(_vector_lines())
+        lines.append("**.vector-recording = false")
+        return "\n".join(lines) + "\n"
+
+    # (module, statistic) -> recording modes, in metric order
+    modes: Dict[Tuple[str, str], List[str]] = {}
+    for metric in metrics:
+        for stat in METRIC_STATISTICS[metric]:
+            modes.setdefault((stat.module, stat.name), []).extend(stat.modes)
+    if vectors:
+        for name, mode in VECTOR_STATISTICS.items():
+            modes.setdefault((APP_MODULE, name), []).append(mode)
+
+    lines.append(f"# Recording profile: {', '.join(metrics)}")
+    lines.extend(f"{module}.{name}.result-recording-modes = {','.join(stat_modes)}"
+                 for (module, name), stat_modes in modes.items())
+    lines.append("**.result-recording-modes = -")
+    lines.extend(f"{stat.module}.{stat.name}:{mode}.scalar-recording = true"
+                 for metric in metrics for stat in METRIC_STATISTICS[metric] for mode in stat.modes)
+    lines.append("**.scalar-recording = false")
+    if vectors:
+        lines.extend(_vector_lines())
+    lines.append("**.vector-recording = false")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,126 @@
+"""
+Persistent route paths for flooded routing messages
+
+A RoutePath is an immutable parent-pointer chain: adding a hop creates one
+new link that shares the whole prefix with the path it extends. Every node
+that rebroadcasts an RREQ therefore allocates O(1) memory instead of copying
+the accumulated path list. Materialize with to_list() only when needed.
+
+The empty path is the EMPTY_PATH singleton, so an empty hop list behaves
+like the list it replaces:
+
+    >>> path = RoutePath.coerce([])
+    >>> len(path), path.to_list(), path.add_hop("n1").to_list()
+    (0, [], ['n1'])
+"""
+from typing import Iterable, Iterator, List, Optional
+
+
+class RoutePath:
+    """Immutable hop sequence with O(1) add_hop, len, first and last"""
+
+    __slots__ = ("node", "parent", "length", "first")
+
+    def __init__(self, node: str, parent: Optional["RoutePath"] = None):
+        self.node = node
+        self.parent = parent
+        self.length = parent.length + 1 if parent is not None else 1
+        self.first = parent.first if parent is not None else node
+
+    @classmethod
+    def from_iterable(cls, nodes: Iterable[str]) -> "RoutePath":
+        path = EMPTY_PATH
+        for node in nodes:
+            path = path.add_hop(node)
+        return path
+
+    @classmethod
+    def coerce(cls, value) -> Optional["RoutePath"]:
+        """Return value unchanged if already a RoutePath, otherwise convert"""
+        if value is None or isinstance(value, RoutePath):
+            return value
+        return cls.from_iterable(value)
+
+    def add_hop(self, node: str) -> "RoutePath":
+        """New path with node appended; self is left untouched"""
+        return RoutePath(node, self)
+
+    @property
+    def last(self) -> str:
+        return self.node
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _reversed_nodes(self) -> Iterator[str]:
+        link = self
+        while link is not None and link.length:
+            yield link.node
+            link = link.parent
+
+    def to_list(self) -> List[str]:
+        nodes = list(self._reversed_nodes())
+        nodes.reverse()
+        return nodes
+
+    def reversed_list(self) -> List[str]:
+        """Path from last hop back to the source (e.g. for RREP)"""
+        return list(self._reversed_nodes())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_list())
+
+    def __reversed__(self) -> Iterator[str]:
+        return self._reversed_nodes()
+
+    def __contains__(self, node: str) -> bool:
+        # Walks the chain; used for loop detection without materializing
+        return any(n == node for n in self._reversed_nodes())
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            if index == -1 or index == self.length - 1:
+                return self.node
+            if index == 0 or index == -self.length:
+                return self.first
+        return self.to_list()[index]
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, (RoutePath, list, tuple)):
+            return len(other) == self.length and list(other) == self.to_list()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.to_list()))
+
+    def __repr__(self) -> str:
+        return f"RoutePath({self.to_list()!r})"
+
+
+class _EmptyPath(RoutePath):
+    """The path without hops; add_hop() starts a new chain"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        self.node = None
+        self.parent = None
+        self.length = 0
+        self.first = None
+
+    def add_hop(self, node: str) -> RoutePath:
+        return RoutePath(node)
+
+    @property
+    def last(self) -> str:
+        raise IndexError("empty route path has no last hop")
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            raise IndexError("route path index out of range")
+        return []
+
+
+EMPTY_PATH = _EmptyPath()
@@ -0,0 +1,161 @@
+"""
+Indexed routing table for MANET routing protocols
+
+Per-destination O(1) lookup, a min-heap of expiry times with lazy deletion
+(O(log n) purge per expired route instead of a full scan), per-route
+precursor lists and AODV/DSDV sequence-number update rules. OLSR, which
+recomputes routes from topology, can bypass the sequence check with force=True.
+"""
+import heapq
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from models import RouteEntry
+
+
+class RoutingTable:
+    """Routing table keyed by destination with expiry heap"""
+
+    def __init__(self, owner: Optional[str] = None):
+        self.owner = owner
+        self._routes: Dict[str, RouteEntry] = {}
+        self._by_next_hop: Dict[str, Set[str]] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+
+    # --- Lookup ---
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, destination: str) -> bool:
+        return destination in self._routes
+
+    def __iter__(self) -> Iterator[RouteEntry]:
+        return iter(list(self._routes.values()))
+
+    def get(self, destination: str) -> Optional[RouteEntry]:
+        """Entry for destination regardless of validity/expiry"""
+        return self._routes.get(destination)
+
+    def lookup(self, destination: str, now: Optional[float] = None) -> Optional[RouteEntry]:
+        """Valid, unexpired route to destination or None"""
+        entry = self._routes.get(destination)
+        if entry is None or not entry.valid:
+            return None
+        if now is not None and entry.expiry_time <= now:
+            return None
+        return entry
+
+    def destinations_via(self, next_hop: str) -> Set[str]:
+        """Destinations currently routed through next_hop (for RERR on link break)"""
+        return set(self._by_next_hop.get(next_hop, ()))
+
+    # --- Update rules ---
+
+    @staticmethod
+    def is_better(new: RouteEntry, old: RouteEntry) -> bool:
+        """
+        Sequence-number-aware freshness rule (RFC 3561 6.2 / DSDV):
+        newer sequence number wins; equal sequence number wins with fewer
+        hops or when the existing route is invalid.
+        """
+        if not old.valid:
+            return new.sequence_number >= old.sequence_number
+        if new.sequence_number != old.sequence_number:
+            return new.sequence_number > old.sequence_number
+        return new.hop_count < old.hop_count
+
+    def update(self, entry: RouteEntry, force: bool = False) -> bool:
+        """Insert or replace a route; returns True if the table changed"""
+        old = self._routes.get(entry.destination)
+        if old is not None and not force and not self.is_better(entry, old):
+            return False
+        if old is not None:
+            # Precursors belong to the destination, not to a particular path
+            entry.precursors |= old.precursors
+            self._unlink_next_hop(old)
+        self._routes[entry.destination] = entry
+        self._by_next_hop.setdefault(entry.next_hop, set()).add(entry.destination)
+        self._push_expiry(entry)
+        return True
+
+    def refresh(self, destination: str, expiry_time: float) -> bool:
+        """Extend lifetime of an active route (AODV activeRouteTimeout)"""
+        entry = self._routes.get(destination)
+        if entry is None or not entry.valid:
+            return False
+        if expiry_time > entry.expiry_time:
+            entry.expiry_time = expiry_time
+            self._push_expiry(entry)
+        return True
+
+    def invalidate(self, destination: str, expiry_time: Optional[float] = None) -> Optional[RouteEntry]:
+        """Mark route invalid (kept until expiry for its sequence number)"""
+        entry = self._routes.get(destination)
+        if entry is None or not entry.valid:
+            return None
+        entry.valid = False
+        entry.sequence_number += 1
+        if expiry_time is not None:
+            entry.expiry_time = expiry_time
+            self._push_expiry(entry)
+        return entry
+
+    def remove(self, destination: str) -> Optional[RouteEntry]:
+        entry = self._routes.pop(destination, None)
+        if entry is not None:
+            self._unlink_next_hop(entry)
+        return entry
+
+    def add_precursor(self, destination: str, node: str):
+        entry = self._routes.get(destination)
+        if entry is not None:
+            entry.precursors.add(node)
+
+    def precursors(self, destination: str) -> Set[str]:
+        entry = self._routes.get(destination)
+        return set(entry.precursors) if entry is not None else set()
+
+    # --- Expiry ---
+
+    def purge(self, now: float) -> List[RouteEntry]:
+        """Remove all routes with expiry_time <= now and return them"""
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expiry, _, destination = heapq.heappop(heap)
+            entry = self._routes.get(destination)
+            # Lazy deletion: skip heap items superseded by a later update/refresh
+            if entry is None or entry.expiry_time != expiry:
+                continue
+            expired.append(self.remove(destination))
+        return expired
+
+    def next_expiry(self) -> Optional[float]:
+        """Earliest live expiry time, for scheduling the next purge"""
+        heap = self._heap
+        while heap:
+            expiry, _, destination = heap[0]
+            entry = self._routes.get(destination)
+            if entry is not None and entry.expiry_time == expiry:
+                return expiry
+            heapq.heappop(heap)
+        return None
+
+    def _push_expiry(self, entry: RouteEntry):
+        self._counter += 1
+        heapq.heappush(self._heap, (entry.expiry_time, self._counter, entry.destination))
+        # Keep stale items bounded by rebuilding when the heap gets too sparse
+        if len(self._heap) > 4 * len(self._routes) + 64:
+            self._heap = [
+                (e.expiry_time, i, e.destination) for i, e in enumerate(self._routes.values())
+            ]
+            heapq.heapify(self._heap)
+            self._counter = len(self._heap)
+
+    def _unlink_next_hop(self, entry: RouteEntry):
+        dests = self._by_next_hop.get(entry.next_hop)
+        if dests is not None:
+            dests.discard(entry.destination)
+            if not dests:
+                del self._by_next_hop[entry.next_hop]
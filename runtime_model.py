@@ -0,0 +1,258 @@
+"""
+Runtime prediction for simulation jobs
+
+RuntimePredictor learns the wall time of opp_run (spawn + setup + simulate)
+from recorded runs and predicts it for new create_config parameter sets.
+The model is a log-linear regression
+
+    log(seconds) = b0 + b1 log(nodes) + b2 log(sim time) + b3 log(traffic pairs + 1)
+                   + b4 log(area) + b5 log(radio range) + b6 log(partitions) + protocol offset
+
+fitted by ridge regression that shrinks towards prior scaling exponents
+(PRIOR_EXPONENTS), so a parameter the history never varied (e.g. every run
+so far had 10 nodes) still extrapolates sensibly. The residual spread gives
+an upper bound used for per-job limits: cpu-time-limit and the wall-clock
+timeout get headroom over that bound instead of the fixed 300 s / 600 s.
+
+Training data are successful runs: RunMetrics records (the --metrics-jsonl
+file has the same fields) and the predictor's own history file, which it
+appends to as runs finish. Stdlib only.
+"""
+import json
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CPU_TIME_LIMIT = 300  # seconds, used while there is no history
+DEFAULT_RUN_TIMEOUT = 600
+RUNTIME_HISTORY_FILE = "runtime_history.jsonl"  # in the results directory
+
+FEATURES = ("nodes", "sim_time", "traffic_pairs", "area", "radio_range", "partitions")
+PRIOR_EXPONENTS = {"nodes": 1.5, "sim_time": 1.0, "traffic_pairs": 0.3, "area": 0.0, "radio_range": 0.0,
+                   "partitions": -0.8}  # PDES: sublinear speed-up (synchronisation overhead)
+RIDGE = 2.0  # pull towards the prior; weaker as samples accumulate
+MIN_SAMPLES = 3  # fewer: wide uncertainty
+MAX_SAMPLES = 5000  # most recent runs kept for fitting
+MIN_SIGMA = 0.15  # log-space spread floor (run-to-run noise of identical configs)
+UPPER_Z = 2.33  # one-sided 99% bound
+CPU_HEADROOM = 1.5  # cpu-time-limit = upper bound * headroom
+WALL_HEADROOM = 2.0  # wall timeout = cpu-time-limit * headroom + WALL_SLACK
+WALL_SLACK = 60.0  # library/NED loading, a loaded machine
+MIN_CPU_TIME_LIMIT = 30
+
+RUN_PHASES = ("spawn", "setup", "simulate")
+
+_UNITS = {"s": 1.0, "ms": 1e-3, "us": 1e-6, "min": 60.0, "h": 3600.0, "m": 1.0, "km": 1000.0}
+
+
+def parse_quantity(value, default: float) -> float:
+    """'100s' -> 100.0, '2min' -> 120.0, '500m' -> 500.0, numbers pass through"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"\s*([0-9.eE+-]+)\s*([a-z]*)\s*", str(value or ""))
+    if not match:
+        return default
+    return float(match.group(1)) * _UNITS.get(match.group(2), 1.0)
+
+
+def features(params: Dict) -> Dict[str, float]:
+    """Log features of create_config kwargs (or a RunMetrics dict) - defaults follow create_config"""
+    raw = {
+        "nodes": parse_quantity(params.get("num_nodes"), 10.0),
+        "sim_time": parse_quantity(params.get("sim_time_limit"), 100.0),
+        "traffic_pairs": parse_quantity(params.get("num_traffic_pairs"), 3.0) + 1.0,
+        "area": parse_quantity(params.get("area_size"), 500.0),
+        "radio_range": parse_quantity(params.get("radio_range"), 250.0),
+        "partitions": parse_quantity(params.get("partitions"), 1.0),
+    }
+    return {name: math.log(max(value, 1e-3)) for name, value in raw.items()}
+
+
+def run_seconds(record: Dict) -> Optional[float]:
+    """Wall time of the opp_run process from a RunMetrics dict / history line"""
+    if record.get("run_seconds"):
+        return float(record["run_seconds"])
+    phases = record.get("phases") or {}
+    seconds = sum(phases.get(p, 0.0) for p in RUN_PHASES)
+    return seconds if seconds > 0 else None
+
+
+@dataclass
+class RuntimeEstimate:
+    seconds: float  # median prediction
+    upper: float  # UPPER_Z bound
+    samples: int  # training runs behind the estimate
+
+    def limits(self, retries: int = 0) -> Tuple[int, float]:
+        return run_limits(self, retries)
+
+
+def run_limits(estimate: Optional[RuntimeEstimate], retries: int = 0) -> Tuple[int, float]:
+    """(cpu-time-limit seconds, wall timeout seconds); doubled per timeout retry"""
+    scale = 2 ** retries
+    if estimate is None:
+        return DEFAULT_CPU_TIME_LIMIT * scale, DEFAULT_RUN_TIMEOUT * scale
+    cpu = max(MIN_CPU_TIME_LIMIT, math.ceil(estimate.upper * CPU_HEADROOM)) * scale
+    return cpu, cpu * WALL_HEADROOM + WALL_SLACK
+
+
+def _solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Gaussian elimination with partial pivoting (small dense systems)"""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            continue
+        for r in range(col + 1, n):
+            factor = m[r][col] / m[col][col]
+            if factor:
+                for c in range(col, n + 1):
+                    m[r][c] -= factor * m[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        if abs(m[r][r]) < 1e-12:
+            continue
+        x[r] = (m[r][n] - sum(m[r][c] * x[c] for c in range(r + 1, n))) / m[r][r]
+    return x
+
+
+class RuntimePredictor:
+    """Log-linear runtime model over recorded runs, refitted lazily after new observations"""
+
+    def __init__(self, history_path: Optional[str] = None):
+        self.history_path = history_path
+        self.samples: List[Tuple[str, Dict[str, float], float]] = []  # (protocol, features, log seconds)
+        self._lock = threading.Lock()
+        self._fit: Optional[Dict] = None
+        if history_path:
+            self.load(history_path)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    # --- Training data ---
+
+    def load(self, path: str) -> int:
+        """Add successful runs from a JSON-lines file (history or --metrics-jsonl); returns count"""
+        if not os.path.exists(path):
+            return 0
+        added = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if self._add(record):
+                    added += 1
+        return added
+
+    def _add(self, record: Dict) -> bool:
+        seconds = run_seconds(record)
+        if record.get("status", "ok") != "ok" or not seconds:
+            return False
+        with self._lock:
+            self.samples.append((str(record.get("protocol", "")).upper(), features(record), math.log(seconds)))
+            del self.samples[:-MAX_SAMPLES]
+            self._fit = None
+        return True
+
+    def observe(self, params: Dict, seconds: float):
+        """Record a finished run and append it to the history file"""
+        record = {key: params.get(key) for key in
+                  ("protocol", "num_nodes", "sim_time_limit", "num_traffic_pairs", "area_size", "radio_range",
+                   "partitions")}
+        record["run_seconds"] = round(seconds, 6)
+        if self._add(record) and self.history_path:
+            with self._lock, open(self.history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def observe_run(self, run):
+        """Record a successful RunMetrics"""
+        if run is not None and run.status == "ok":
+            seconds = run_seconds({"phases": run.phases})
+            if seconds:
+                self.observe(run.__dict__, seconds)
+
+    # --- Model ---
+
+    def _fitted(self) -> Optional[Dict]:
+        with self._lock:
+            if self._fit is None and self.samples:
+                self._fit = self._train(list(self.samples))
+            return self._fit
+
+    @staticmethod
+    def _train(samples) -> Dict:
+        protocols = sorted({p for p, _, _ in samples})
+        names = list(FEATURES) + [f"protocol:{p}" for p in protocols]
+        prior = [PRIOR_EXPONENTS[f] for f in FEATURES] + [0.0] * len(protocols)
+
+        def row(protocol, feats):
+            return [feats[f] for f in FEATURES] + [1.0 if protocol == p else 0.0 for p in protocols]
+
+        rows = [row(p, f) for p, f, _ in samples]
+        n, k = len(rows), len(names)
+        means = [sum(r[j] for r in rows) / n for j in range(k)]
+        # Residual against the prior, centred: the intercept absorbs the means
+        targets = [y - sum(w * x for w, x in zip(prior, r)) for r, (_, _, y) in zip(rows, samples)]
+        target_mean = sum(targets) / n
+        centred = [[r[j] - means[j] for j in range(k)] for r in rows]
+        gram = [[sum(c[i] * c[j] for c in centred) + (RIDGE if i == j else 0.0) for j in range(k)]
+                for i in range(k)]
+        rhs = [sum(c[i] * (t - target_mean) for c, t in zip(centred, targets)) for i in range(k)]
+        delta = _solve(gram, rhs)
+        weights = [w + d for w, d in zip(prior, delta)]
+        intercept = target_mean - sum(d * m for d, m in zip(delta, means))
+
+        residuals = [y - intercept - sum(w * x for w, x in zip(weights, r)) for r, (_, _, y) in zip(rows, samples)]
+        dof = max(1, n - min(k, n - 1) - 1)
+        sigma = math.sqrt(sum(e * e for e in residuals) / dof)
+        if n < MIN_SAMPLES:
+            sigma = max(sigma, 1.0)
+        return {"protocols": protocols, "weights": weights, "intercept": intercept,
+                "sigma": max(MIN_SIGMA, sigma), "samples": n}
+
+    def predict(self, params: Dict) -> Optional[RuntimeEstimate]:
+        """Estimate for create_config kwargs; None before any run was recorded"""
+        fit = self._fitted()
+        if fit is None:
+            return None
+        feats = features(params)
+        protocol = str(params.get("protocol", "")).upper()
+        x = [feats[f] for f in FEATURES] + [1.0 if protocol == p else 0.0 for p in fit["protocols"]]
+        mu = fit["intercept"] + sum(w * v for w, v in zip(fit["weights"], x))
+        if protocol not in fit["protocols"] and fit["protocols"]:
+            # Unseen protocol: average offset of the known ones, wider bound
+            offsets = fit["weights"][len(FEATURES):]
+            mu += sum(offsets) / len(offsets)
+            sigma = fit["sigma"] * 2.0
+        else:
+            sigma = fit["sigma"]
+        return RuntimeEstimate(math.exp(mu), math.exp(mu + UPPER_Z * sigma), fit["samples"])
+
+    def estimate_total(self, configs: Iterable[Dict]) -> Optional[float]:
+        """Summed median prediction (serial seconds) for a list of configs"""
+        total = 0.0
+        for config in configs:
+            estimate = self.predict(config)
+            if estimate is None:
+                return None
+            total += estimate.seconds
+        return total
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "unknown"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
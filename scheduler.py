@@ -0,0 +1,403 @@
+"""
+Resource-aware execution of simulation jobs
+
+Pieces plugged into JobQueue for parallel sweeps:
+
+    ResourceAdmission  admits a job only if its estimated peak memory fits
+                       the memory budget (estimates learned from the peak RSS
+                       of finished runs, per protocol, linear in num_nodes)
+    ResourceLimits     per-job RLIMIT_AS / RLIMIT_CPU set in the opp_run child
+                       before it executes opp_run (limited_command, POSIX);
+                       prlimit on the running child only as a fallback
+    RetryPolicy        exponential backoff for transient failures
+                       (FailureKind.TRANSIENT: timeout, OOM, spawn error)
+    FairShare          dispatch order across job owners (shared service):
+                       fewest running jobs per share first, then least
+                       recently consumed run time
+    SimulationRunner   JobQueue runner: one OmnetManager (own ini file and
+                       result directory) per concurrently running job;
+                       failures raise SimulationFailure with their
+                       FailureKind instead of looking like a 0% result.
+                       With a runtime_model.RuntimePredictor it also serves
+                       as the queue's estimator and sets per-job
+                       cpu-time-limit / wall timeout from the prediction.
+                       With an early_stop.EarlyStopPolicy every run is
+                       monitored and may end early (aborted runs fail with
+                       FailureKind.ABORTED)
+"""
+import heapq
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from early_stop import STOP_COMPLETED, EarlyStopPolicy
+from instrumentation import FailureKind, RunMetrics, classify_failure
+from runtime_model import RuntimePredictor, run_limits
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+DEFAULT_JOB_MEMORY = 256 * MB  # prior before any run has been observed
+DEFAULT_MEMORY_PER_NODE = 4 * MB
+MEMORY_SAFETY_FACTOR = 1.25  # reservation = estimate * factor
+ADDRESS_SPACE_FACTOR = 4.0  # RLIMIT_AS = estimate * factor (virtual >> resident for C++ + libs)
+MIN_ADDRESS_SPACE = 2048 * MB
+FAIR_SHARE_HALF_LIFE = 3600.0  # seconds; consumed run time decays with this half-life
+
+
+@dataclass
+class ResourceLimits:
+    """Hard limits for one opp_run process (None = unlimited)"""
+    address_space: Optional[int] = None  # bytes, RLIMIT_AS
+    cpu_seconds: Optional[int] = None  # RLIMIT_CPU (SIGXCPU when exceeded)
+
+
+# Sets the limits (never above the inherited hard limit) and execs the command: same
+# PID, no unlimited window. Not preexec_fn: JobQueue spawns from several threads.
+LIMIT_WRAPPER = """import os, resource, sys
+def limit(kind, soft, hard):
+    ceiling = resource.getrlimit(kind)[1]
+    if ceiling != resource.RLIM_INFINITY:
+        soft, hard = min(soft, ceiling), min(hard, ceiling)
+    resource.setrlimit(kind, (soft, hard))
+address_space, cpu_seconds = int(sys.argv[1]), int(sys.argv[2])
+if address_space:
+    limit(resource.RLIMIT_AS, address_space, address_space)
+if cpu_seconds:
+    limit(resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 5)
+try:
+    os.execvp(sys.argv[3], sys.argv[3:])
+except OSError as e:
+    print(f"<!> Error: cannot execute {sys.argv[3]}: {e}", file=sys.stderr)
+    sys.exit(127)
+"""
+
+
+def limited_command(cmd: List[str], limits: Optional[ResourceLimits]) -> Optional[List[str]]:
+    """cmd wrapped so the limits hold from its first instruction (POSIX); None where unsupported"""
+    if limits is None:
+        return list(cmd)
+    if os.name != "posix" or not sys.executable:  # the wrapper needs the resource module
+        return None
+    # RLIMIT_CPU: soft limit sends SIGXCPU, the hard limit a few seconds later SIGKILL
+    return [sys.executable, "-c", LIMIT_WRAPPER, str(limits.address_space or 0),
+            str(limits.cpu_seconds or 0)] + list(cmd)
+
+
+def apply_limits(pid: int, limits: Optional[ResourceLimits]) -> bool:
+    """Set limits on a running child (Linux prlimit; fallback of limited_command); False where unsupported"""
+    if limits is None:
+        return True
+    try:
+        import resource
+        prlimit = resource.prlimit
+    except (ImportError, AttributeError):
+        logger.debug("prlimit unavailable, resource limits not applied")
+        return False
+    try:
+        if limits.address_space:
+            prlimit(pid, resource.RLIMIT_AS, (limits.address_space, limits.address_space))
+        if limits.cpu_seconds:
+            # Soft limit sends SIGXCPU, hard limit a few seconds later SIGKILL
+            prlimit(pid, resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 5))
+        return True
+    except (ProcessLookupError, PermissionError, ValueError, OSError) as e:
+        logger.warning(f"Could not apply resource limits to {pid}: {e}")
+        return False
+
+
+def available_memory() -> Optional[int]:
+    """MemAvailable in bytes (Linux), free physical memory elsewhere, None if unknown"""
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class SimulationFailure(RuntimeError):
+    """A run that produced no valid result; kind is a FailureKind"""
+
+    def __init__(self, kind: str, message: str = "", run: Optional[RunMetrics] = None):
+        super().__init__(f"{kind}: {message}" if message else kind)
+        self.kind = kind
+        self.run = run
+
+    @property
+    def transient(self) -> bool:
+        return self.kind in FailureKind.TRANSIENT
+
+    @classmethod
+    def from_run(cls, run: Optional[RunMetrics]) -> "SimulationFailure":
+        if run is None:
+            return cls(FailureKind.CRASH, "simulation failed")
+        kind = run.failure or classify_failure(run)
+        if kind == FailureKind.ABORTED:
+            return cls(kind, run.stop_reason, run)
+        detail = next((line.strip() for line in reversed(run.output_tail) if "error" in line.lower()), "")
+        return cls(kind, detail or f"exit status {run.returncode}", run)
+
+
+class MemoryModel:
+    """Peak-RSS estimate per protocol: least-squares line over num_nodes"""
+
+    def __init__(self, default: int = DEFAULT_JOB_MEMORY, per_node: int = DEFAULT_MEMORY_PER_NODE):
+        self.default = default
+        self.per_node = per_node
+        self.samples: Dict[str, List[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, protocol: str, num_nodes: int, peak_rss: Optional[int]):
+        if peak_rss:
+            with self._lock:
+                self.samples.setdefault(protocol.upper(), []).append((num_nodes, peak_rss))
+
+    def estimate(self, protocol: str, num_nodes: int) -> int:
+        with self._lock:
+            samples = list(self.samples.get(protocol.upper(), []))
+            if not samples:  # other protocols are still better than the prior
+                samples = [s for values in self.samples.values() for s in values]
+        if not samples:
+            return self.default + self.per_node * num_nodes
+        xs = [n for n, _ in samples]
+        ys = [m for _, m in samples]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        if var_x == 0:
+            # One size observed: scale the per-node slope prior around it
+            return int(max(ys) + self.per_node * (num_nodes - mean_x))
+        slope = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x)
+        # Conservative: fit through the largest residual
+        intercept = max(y - slope * x for x, y in samples)
+        return int(intercept + slope * num_nodes)
+
+
+class ResourceAdmission:
+    """
+    Memory admission control for JobQueue.
+
+    A job is admitted when its reservation (estimate * safety factor, doubled
+    per OOM retry) fits into the budget left by running jobs and into the
+    memory currently available. A job is always admitted when nothing else
+    is running, so an oversized job fails (and is classified) instead of
+    waiting forever.
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None, model: Optional[MemoryModel] = None,
+                 cpu_seconds: Optional[int] = None, address_space: Optional[int] = None,
+                 enforce_limits: bool = True):
+        available = available_memory()
+        self.memory_budget = memory_budget or (int(available * 0.9) if available else None)
+        self.model = model or MemoryModel()
+        self.cpu_seconds = cpu_seconds
+        self.address_space = address_space
+        self.enforce_limits = enforce_limits
+        self.reserved: Dict[int, int] = {}  # job_id -> bytes
+        self._lock = threading.Lock()
+
+    def reservation(self, job) -> int:
+        params = job.params
+        estimate = self.model.estimate(job.protocol, int(params.get('num_nodes', 10)))
+        return int(estimate * MEMORY_SAFETY_FACTOR * (2 ** job.oom_retries))
+
+    def try_admit(self, job) -> bool:
+        need = self.reservation(job)
+        with self._lock:
+            if self.reserved and self.memory_budget is not None:
+                if sum(self.reserved.values()) + need > self.memory_budget:
+                    return False
+                live = available_memory()
+                if live is not None and need > live:
+                    return False
+            self.reserved[job.job_id] = need
+        return True
+
+    def release(self, job):
+        with self._lock:
+            self.reserved.pop(job.job_id, None)
+
+    def limits_for(self, job) -> Optional[ResourceLimits]:
+        if not self.enforce_limits:
+            return None
+        with self._lock:
+            reserved = self.reserved.get(job.job_id) or self.reservation(job)
+        address_space = self.address_space or max(int(reserved * ADDRESS_SPACE_FACTOR), MIN_ADDRESS_SPACE)
+        return ResourceLimits(address_space=address_space, cpu_seconds=self.cpu_seconds)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter for transient failures"""
+    max_attempts: int = 3
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+    jitter: float = 0.2
+
+    def should_retry(self, error: Exception, attempts: int) -> bool:
+        return isinstance(error, SimulationFailure) and error.transient and attempts < self.max_attempts
+
+    def delay(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+
+class FairShare:
+    """
+    Fair-share dispatch order for JobQueue.
+
+    The next job goes to the owner with the fewest running jobs per share;
+    ties go to the owner who consumed the least run time recently
+    (exponentially decayed). Within an owner the queue's own order applies
+    (priority, longest-first, FIFO), so priorities only reorder an owner's
+    own jobs. Owners without an entry in shares get one share.
+    """
+
+    def __init__(self, shares: Optional[Dict[str, float]] = None, half_life: float = FAIR_SHARE_HALF_LIFE):
+        self.shares = dict(shares or {})
+        self.half_life = half_life
+        self._usage: Dict[str, Tuple[float, float]] = {}  # owner -> (seconds, as of time)
+        self._lock = threading.Lock()
+
+    def share(self, owner: str) -> float:
+        return max(self.shares.get(owner, 1.0), 1e-9)
+
+    def usage(self, owner: str, now: Optional[float] = None) -> float:
+        """Decayed run seconds consumed by owner"""
+        with self._lock:
+            seconds, at = self._usage.get(owner, (0.0, 0.0))
+        return seconds * 0.5 ** (((now or time.time()) - at) / self.half_life)
+
+    def charge(self, owner: str, seconds: float):
+        now = time.time()
+        used = self.usage(owner, now)
+        with self._lock:
+            self._usage[owner] = (used + max(0.0, seconds), now)
+
+    def order(self, queued: List, running: List, key: Callable) -> List:
+        """queued in dispatch order: owners interleaved as if each pick started a job"""
+        by_owner: Dict[str, List] = {}
+        for job in sorted(queued, key=key):
+            by_owner.setdefault(job.owner, []).append(job)
+        active: Dict[str, int] = {}
+        for job in running:
+            active[job.owner] = active.get(job.owner, 0) + 1
+        now = time.time()
+        heap = []
+        for owner, jobs in by_owner.items():
+            share = self.share(owner)
+            heap.append((active.get(owner, 0) / share, self.usage(owner, now) / share, key(jobs[0]), owner, 0))
+        heapq.heapify(heap)
+        ordered = []
+        while heap:
+            load, used, _, owner, index = heapq.heappop(heap)
+            jobs = by_owner[owner]
+            ordered.append(jobs[index])
+            if index + 1 < len(jobs):
+                heapq.heappush(heap, (load + 1.0 / self.share(owner), used, key(jobs[index + 1]), owner, index + 1))
+        return ordered
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        now = time.time()
+        with self._lock:
+            owners = list(self._usage)
+        return {owner: {'share': self.share(owner), 'usage_seconds': round(self.usage(owner, now), 1)}
+                for owner in owners}
+
+
+def default_job_config(job) -> Dict:
+    """create_config kwargs of a job whose params already use create_config names"""
+    return dict(job.params, protocol=job.protocol, seed=job.seed)
+
+
+class SimulationRunner:
+    """
+    JobQueue runner/canceller backed by a pool of OmnetManagers.
+
+    The base manager serves the first concurrent job; further concurrent
+    jobs get worker copies (own omnetpp-<name>.ini and results/<name>/) so
+    their configs and result files never collide. Limits double with every
+    timeout retry.
+    """
+
+    def __init__(self, manager, config_for: Callable = default_job_config,
+                 admission: Optional[ResourceAdmission] = None,
+                 predictor: Optional[RuntimePredictor] = None,
+                 early_stop: Optional[EarlyStopPolicy] = None):
+        self.config_for = config_for
+        self.admission = admission
+        self.predictor = predictor
+        self.early_stop = early_stop
+        self._base = manager
+        self._free = [manager]
+        self._created = 1
+        self._running: Dict[int, object] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self._created += 1
+            return self._base.worker_copy(f"w{self._created - 1}")
+
+    def estimate(self, job) -> Optional[float]:
+        """Predicted run seconds (JobQueue estimator hook); None without history"""
+        if self.predictor is None:
+            return None
+        estimate = self.predictor.predict(self.config_for(job))
+        return estimate.seconds if estimate else None
+
+    def policy_for(self, job) -> Optional[EarlyStopPolicy]:
+        """Early-stop policy of a job (the runner-wide one; services decide per job)"""
+        return self.early_stop
+
+    def __call__(self, job) -> Dict:
+        manager = self._acquire()
+        with self._lock:
+            self._running[job.job_id] = manager
+        try:
+            config = self.config_for(job)
+            manager.resource_limits = self.admission.limits_for(job) if self.admission else None
+            estimate = self.predictor.predict(config) if self.predictor is not None else None
+            cpu_time_limit, manager.run_timeout = run_limits(estimate, job.timeout_retries)
+            config.setdefault('cpu_time_limit', cpu_time_limit)
+            manager.early_stop = early_stop = self.policy_for(job)
+            if early_stop is not None and early_stop.needs_vectors:
+                config.setdefault('record_vectors', True)
+            manager.create_config(**config)
+            # This job's run; the recorder's last() is shared by every worker copy
+            run = manager.current_run
+            if job.cancel_requested:  # cancelled while the config was written
+                raise SimulationFailure(FailureKind.CANCELLED)
+            if not manager.run_simulation():
+                raise SimulationFailure.from_run(run)
+            stats = manager.parse_results()
+            if not stats.get('result_file'):
+                raise SimulationFailure(FailureKind.NO_RESULTS, "no .sca file written", run)
+            if self.admission and run is not None:
+                self.admission.model.observe(job.protocol, int(config.get('num_nodes', 10)), run.peak_rss_bytes)
+            # A run stopped early says nothing about how long the full run takes
+            if self.predictor is not None and run is not None and run.stop_reason == STOP_COMPLETED:
+                self.predictor.observe_run(run)
+            return stats
+        finally:
+            with self._lock:
+                self._running.pop(job.job_id, None)
+                self._free.append(manager)
+
+    def cancel(self, job):
+        with self._lock:
+            manager = self._running.get(job.job_id)
+        if manager is not None:
+            manager.cancel_simulation()
@@ -0,0 +1,910 @@
+"""
+Local simulation service: one shared job queue for every analyst on a machine
+
+    python main.py --omnet ... --working-dir ... serve --listen unix:/srv/manet/manet.sock
+    python main.py submit sweep.json --service unix:/srv/manet/manet.sock -o results.csv
+    python main.py gui --service unix:/srv/manet/manet.sock
+
+The service owns a single JobQueue (memory admission, retries, runtime
+prediction - the same machinery as `sweep -j`) with one worker per core,
+and accepts work from any number of clients. With --coordinator the runs
+go to the workers of a cluster.Coordinator instead of local opp_run processes.
+
+    fair share      jobs of different users are interleaved (scheduler.FairShare):
+                    the user with the fewest running jobs goes next, then
+                    the one who used the least run time recently
+    deduplication   a job is identified by its create_config arguments
+                    (job_key); submitting a job that is already queued,
+                    running or done returns that job, and results of
+                    finished jobs are kept in a result cache file, so they
+                    are also served after a restart without running again
+    streaming       GET /events streams job snapshots (status, and the
+                    parsed stats once done) as JSON lines
+
+API (JSON over HTTP/1.0, on a Unix socket or a loopback <host>:<port>):
+
+    POST /sweeps                  {"spec": sweep spec | "configs": [...], "priority", "early_stop"}
+    GET  /sweeps/<id>             status counts and result records (config + stats)
+    POST /sweeps/<id>/cancel
+    POST /jobs                    {"config": {...}, "priority", "early_stop"}
+    GET  /jobs[?user=<name>]
+    GET  /jobs/<id>
+    POST /jobs/<id>/cancel        owner only
+    POST /jobs/<id>/priority      {"delta": -1}, owner only
+    GET  /events?after=<seq>[&sweep=<id>]
+    GET  /status
+    POST /queue/pause, /queue/resume   the service's own user only
+
+Every config is checked before it is queued (validate_config): only
+create_config arguments in CONFIG_CHECKS are accepted, numbers must be
+numbers, quantities like "100s" must match QUANTITY and names must be known
+protocols, mobility models and recording profiles. create_config writes the
+values into omnetpp.ini verbatim, so anything else (a newline in
+sim_time_limit adds ini lines, e.g. load-libs) is rejected with 400.
+
+The user is the kernel-reported peer uid on a Unix socket. Over TCP it is
+only the X-Manet-User header (default: the client's login name), which any
+client can set to any name: owner checks and fair share are advisory there.
+TCP therefore binds to loopback only; use a Unix socket when users must
+not be able to act for each other. Connecting to a Unix socket needs write
+permission on it, so serve() sets it to SOCKET_MODE (owner and group) and
+optionally to a group all analysts share (serve --socket-group); 0666 lets
+every local user in. Pausing and resuming the queue stops or starts every
+user's jobs and is left to the user the service runs as (service.admin). "early_stop" is {"rules": [...],
+"converge": bool, "options": {...}} (EarlyStopPolicy.from_strings
+arguments).
+
+RemoteJobQueue offers JobQueue's interface on top of a ServiceClient, so
+the GUI submits to a service instead of running opp_run itself. Closing a
+client leaves its jobs running; their results land in the cache.
+"""
+import collections
+import getpass
+import hashlib
+import ipaddress
+import itertools
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import socket
+import socketserver
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from defaults import SERVICE_PORT
+from early_stop import EarlyStopPolicy
+from job_queue import JobQueue, JobStatus, SimulationJob
+from omnet_manager import COMPARE_PROTOCOLS, GENERIC_NETWORK
+from parsim import COMMUNICATIONS, check_partitionable
+from recording import resolve_metrics
+from scheduler import FairShare, ResourceAdmission, RetryPolicy, SimulationRunner
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_FILE = "service_cache.jsonl"  # in the manager's results directory
+EVENT_BACKLOG = 10000  # events kept for clients that reconnect with ?after=
+HEARTBEAT_INTERVAL = 5.0  # seconds; an empty line keeps idle event streams alive
+USER_HEADER = "X-Manet-User"
+SOCKET_MODE = 0o660  # Unix socket: owner and group may connect (needs write permission)
+SERVICE_PARAMS = ('early_stop',)  # job params that are not create_config arguments
+
+QUANTITY = re.compile(r"\d+(\.\d+)?(e[+-]?\d+)?[A-Za-z]*")  # "100s", "500m", "2Mbps" (fullmatch: no trailing newline)
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+NED_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*")  # package-qualified network
+PROTOCOLS = tuple(dict.fromkeys(["AODV", "GPSR", "DSDV", "DSR", "OLSR"] + COMPARE_PROTOCOLS))
+MOBILITY_MODELS = ("RandomWPMobility", "MassMobility", "GaussMarkovMobility", "LinearMobility",
+                   "CircleMobility", "StationaryMobility")
+
+
+def _integer(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _quantity(value) -> bool:
+    return (_number(value) and value >= 0) or (isinstance(value, str) and bool(QUANTITY.fullmatch(value)))
+
+
+def _recording(value) -> bool:
+    if isinstance(value, str) and not value.isprintable():
+        return False
+    try:
+        resolve_metrics(value)
+    except (ValueError, TypeError, AttributeError):
+        return False
+    return True
+
+
+# create_config arguments a client may set -> (check, what it expects)
+CONFIG_CHECKS: Dict[str, Tuple[Callable[[object], bool], str]] = {
+    'protocol': (lambda v: isinstance(v, str) and v.upper() in PROTOCOLS, f"one of {', '.join(PROTOCOLS)}"),
+    'seed': (lambda v: _integer(v) and v >= 0, "a non-negative integer"),
+    'num_nodes': (lambda v: _integer(v) and v >= 1, "a positive integer"),
+    'num_traffic_pairs': (lambda v: _integer(v) and v >= 0, "a non-negative integer"),
+    'aodv_hello_loss': (lambda v: _integer(v) and v >= 1, "a positive integer"),
+    'partitions': (lambda v: _integer(v) and v >= 1, "a positive integer"),
+    'sim_time_limit': (_quantity, "a number or a quantity such as 100s"),
+    'area_size': (_quantity, "a number or a quantity such as 500m"),
+    'bitrate': (_quantity, "a number or a quantity such as 2Mbps"),
+    'min_speed': (_number, "a number"),
+    'max_speed': (_number, "a number"),
+    'pause_time': (_number, "a number"),
+    'radio_power': (_number, "a number"),
+    'radio_range': (_number, "a number"),
+    'aodv_timeout': (_number, "a number"),
+    'aodv_hello_interval': (_number, "a number"),
+    'cpu_time_limit': (_number, "a number"),
+    'warmup_period': (lambda v: v is None or _number(v), "a number or null"),
+    'network_name': (lambda v: v is None or (isinstance(v, str) and bool(NED_NAME.fullmatch(v))),
+                     "a NED network name or null"),
+    'mobility_model': (lambda v: v in MOBILITY_MODELS, f"one of {', '.join(MOBILITY_MODELS)}"),
+    'common_random_numbers': (lambda v: isinstance(v, bool), "true or false"),
+    'antithetic': (lambda v: isinstance(v, bool), "true or false"),
+    'record_vectors': (lambda v: isinstance(v, bool), "true or false"),
+    'recording': (_recording, "a recording profile or metric list"),
+    'parsim_communications': (lambda v: v in COMMUNICATIONS, f"one of {', '.join(COMMUNICATIONS)}"),
+    'parsim_lookahead': (lambda v: isinstance(v, str) and bool(IDENTIFIER.fullmatch(v)), "a class name"),
+}
+
+
+def validate_config(config) -> Dict:
+    """Raise ServiceError(400) unless config holds only checked create_config arguments"""
+    if not isinstance(config, dict) or 'protocol' not in config:
+        raise ServiceError(400, "a config must be an object with a 'protocol'")
+    for name, value in config.items():
+        check = CONFIG_CHECKS.get(name)
+        if check is None:
+            raise ServiceError(400, f"unsupported config parameter '{name}'")
+        accepts, expected = check
+        if not accepts(value):
+            raise ServiceError(400, f"{name} must be {expected}, not {value!r}")
+    try:
+        check_partitionable(config.get('network_name') or GENERIC_NETWORK, config.get('partitions', 1))
+    except ValueError as e:
+        raise ServiceError(400, str(e))
+    return config
+
+
+def job_key(params: Dict) -> str:
+    """Identity of a job: hash of its canonical create_config arguments (and early-stop spec)"""
+    canonical = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def job_snapshot(job: SimulationJob, with_params: bool = False) -> Dict:
+    """JSON view of a job (what clients see)"""
+    snapshot = {
+        'job_id': job.job_id, 'protocol': job.protocol, 'seed': job.seed, 'owner': job.owner,
+        'priority': job.priority, 'status': job.status, 'attempts': job.attempts,
+        'failure': job.failure, 'error': job.error, 'estimated_seconds': job.estimated_seconds,
+        'submitted_at': job.submitted_at, 'started_at': job.started_at, 'finished_at': job.finished_at,
+        'result': job.result,
+    }
+    if with_params:
+        snapshot['params'] = job.params
+    return snapshot
+
+
+def parse_address(address: str) -> Tuple[str, object]:
+    """'unix:/path', '/path.sock', 'host:port', 'http://host:port' or a port -> (family, address)"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    if address.startswith("/") or address.endswith(".sock"):
+        return "unix", address
+    if "://" in address:
+        parts = urlsplit(address)
+        return "tcp", (parts.hostname or "127.0.0.1", parts.port or SERVICE_PORT)
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port or SERVICE_PORT))
+
+
+class ServiceError(RuntimeError):
+    """A request the service rejected (status is the HTTP status code)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class ResultCache:
+    """Parsed stats of finished jobs by job_key, appended to a JSON-lines file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.results[entry['key']] = entry['result']
+                    except (ValueError, KeyError):
+                        continue  # a line cut short by a crash
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.results.get(key)
+
+    def put(self, key: str, result: Dict, params: Optional[Dict] = None):
+        """Store a result; params (the job's configuration) make the entry usable as surrogate training data"""
+        with self._lock:
+            if key in self.results:
+                return
+            self.results[key] = result
+            if self.path:
+                entry = {'key': key, 'result': result}
+                if params is not None:
+                    entry['params'] = params
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+
+
+def service_job_config(job) -> Dict:
+    """create_config kwargs of a service job (service-level params removed)"""
+    config = {k: v for k, v in job.params.items() if k not in SERVICE_PARAMS}
+    return dict(config, protocol=job.protocol, seed=job.seed)
+
+
+class ServiceRunner(SimulationRunner):
+    """SimulationRunner whose early-stop policy comes from each job's submission"""
+
+    def policy_for(self, job) -> Optional[EarlyStopPolicy]:
+        spec = job.params.get('early_stop')
+        if not spec:
+            return self.early_stop
+        return EarlyStopPolicy.from_strings(spec.get('rules', ()), spec.get('converge', False),
+                                            **spec.get('options', {}))
+
+
+@dataclass
+class Sweep:
+    """Jobs submitted together; job_ids follow the submitted configs (shared jobs repeat)"""
+    sweep_id: int
+    owner: str
+    job_ids: List[int]
+    submitted_at: float = field(default_factory=time.time)
+
+
+class SimulationService:
+    """Shared job queue with fair share, deduplication, a result cache and an event log"""
+
+    def __init__(self, manager, workers: Optional[int] = None, cache_path: Optional[str] = None,
+                 shares: Optional[Dict[str, float]] = None, retries: int = 3, predictor=None,
+                 coordinator=None):
+        self.fair_share = FairShare(shares)
+        self.coordinator = coordinator
+        self.admin = getpass.getuser()  # may pause/resume the queue for everyone
+        if coordinator is None:
+            self.admission = ResourceAdmission()
+            self.runner = ServiceRunner(manager, service_job_config, self.admission, predictor)
+            workers = workers or os.cpu_count() or 1
+        else:
+            from cluster import ClusterRunner  # cluster.py builds on this module
+            self.admission = None  # each worker admits by its own memory
+            self.runner = ClusterRunner(coordinator, service_job_config, predictor)
+            workers = coordinator.capacity
+        self.queue = JobQueue(self.runner, self.runner.cancel, max_workers=workers,
+                              admission=self.admission, retry_policy=RetryPolicy(max_attempts=retries),
+                              estimator=self.runner, fair_share=self.fair_share)
+        if coordinator is not None:
+            coordinator.on_capacity = self.queue.set_max_workers
+        self.cache = ResultCache(cache_path if cache_path is not None
+                                 else os.path.join(manager.results_dir, RESULT_CACHE_FILE))
+        self.sweeps: Dict[int, Sweep] = {}
+        self.deduplicated = 0
+        self.cache_hits = 0
+        self._keys: Dict[str, SimulationJob] = {}  # job_key -> latest job with that key
+        self._sweep_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._events = collections.deque(maxlen=EVENT_BACKLOG)  # (seq, job snapshot)
+        self._seq = 0
+        self._event_condition = threading.Condition()
+        self.queue.listeners.append(self._on_job)
+
+    # --- Submission ---
+
+    def submit(self, config: Dict, owner: str, priority: int = 0,
+               early_stop: Optional[Dict] = None) -> SimulationJob:
+        """Queue a run, or return the identical job that is queued, running, done or cached"""
+        params = dict(validate_config(config))
+        if early_stop:
+            try:
+                EarlyStopPolicy.from_strings(early_stop.get('rules', ()), early_stop.get('converge', False),
+                                             **early_stop.get('options', {}))
+            except (ValueError, TypeError, AttributeError) as e:
+                raise ServiceError(400, f"invalid early_stop: {e}")
+            params['early_stop'] = early_stop
+        protocol = params['protocol']
+        seed = params['seed'] = int(params.get('seed', 0))
+        key = job_key(params)
+        with self._lock:
+            job = self._keys.get(key)
+            if job is not None and job.status not in (JobStatus.FAILED, JobStatus.CANCELLED):
+                self.deduplicated += 1
+                return job
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                job = self.queue.add_result(protocol, seed, params, cached, owner=owner)
+            else:
+                job = self.queue.submit(protocol, seed, params, priority, owner=owner)
+            self._keys[key] = job
+        return job
+
+    def submit_sweep(self, configs: List[Dict], owner: str, priority: int = 0,
+                     early_stop: Optional[Dict] = None) -> Sweep:
+        for config in configs:  # all or nothing: no half-queued sweep
+            validate_config(config)
+        jobs = [self.submit(config, owner, priority, early_stop) for config in configs]
+        with self._lock:
+            sweep = Sweep(next(self._sweep_ids), owner, [job.job_id for job in jobs])
+            self.sweeps[sweep.sweep_id] = sweep
+        return sweep
+
+    def sweep_status(self, sweep: Sweep) -> Dict:
+        from cli import job_record
+
+        jobs = [self.queue.get(job_id) for job_id in sweep.job_ids]
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'sweep_id': sweep.sweep_id, 'owner': sweep.owner, 'job_ids': sweep.job_ids,
+            'counts': counts, 'finished': all(job.finished for job in jobs),
+            'records': [dict(job_record(job), job_id=job.job_id) for job in jobs if job.finished],
+        }
+
+    def cancel_job(self, job_id: int, user: str) -> bool:
+        job = self._job(job_id)
+        if job.owner != user:
+            raise ServiceError(403, f"job {job_id} belongs to {job.owner}")
+        return self.queue.cancel(job_id)
+
+    def cancel_sweep(self, sweep_id: int, user: str) -> int:
+        """Cancel the sweep's unfinished jobs owned by user (jobs shared with other users keep running)"""
+        sweep = self._sweep(sweep_id)
+        cancelled = 0
+        for job_id in set(sweep.job_ids):
+            job = self.queue.get(job_id)
+            if job is not None and job.owner == user and self.queue.cancel(job_id):
+                cancelled += 1
+        return cancelled
+
+    def status(self) -> Dict:
+        jobs = self.queue.jobs()
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        with self._event_condition:
+            seq = self._seq
+        status = {
+            'workers': self.queue.max_workers, 'paused': self.queue.paused, 'jobs': counts,
+            'eta': self.queue.eta(), 'event_seq': seq, 'users': self.fair_share.to_dict(),
+            'cached_results': len(self.cache), 'cache_hits': self.cache_hits,
+            'deduplicated': self.deduplicated,
+        }
+        if self.coordinator is not None:
+            status['cluster'] = self.coordinator.status()
+        return status
+
+    # --- Events ---
+
+    def _on_job(self, job: SimulationJob):
+        if job.status == JobStatus.DONE and job.result is not None:
+            self.cache.put(job_key(job.params), job.result, service_job_config(job))
+        with self._event_condition:
+            self._seq += 1
+            self._events.append((self._seq, job_snapshot(job)))
+            self._event_condition.notify_all()
+
+    def events_after(self, seq: int, timeout: float) -> Tuple[int, List[Dict]]:
+        """(latest seq, snapshots newer than seq); waits up to timeout for the first one"""
+        with self._event_condition:
+            if self._seq <= seq:
+                self._event_condition.wait(timeout)
+            events = [snapshot for s, snapshot in self._events if s > seq]
+            return self._seq, events
+
+    # --- Helpers ---
+
+    def _job(self, job_id: int) -> SimulationJob:
+        job = self.queue.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"no job {job_id}")
+        return job
+
+    def _sweep(self, sweep_id: int) -> Sweep:
+        sweep = self.sweeps.get(sweep_id)
+        if sweep is None:
+            raise ServiceError(404, f"no sweep {sweep_id}")
+        return sweep
+
+    def stop(self):
+        self.queue.stop()
+
+
+# --- HTTP API ---
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes API requests to server.service (see the module docstring)"""
+    server_version = "ManetService/1.0"
+    protocol_version = "HTTP/1.0"  # one request per connection; event streams end with the connection
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.user(), format % args)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def user(self) -> str:
+        """Kernel-reported peer on a Unix socket, the X-Manet-User header otherwise"""
+        peer = _peer_user(self.connection)
+        return peer or self.headers.get(USER_HEADER) or "anonymous"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            body = self._body() if method == "POST" else {}
+            if method == "GET" and parts == ["events"]:
+                self._stream_events(int(query.get('after', 0)), query.get('sweep'))
+                return
+            self._reply(200, self._route(method, parts, query, body))
+        except ServiceError as e:
+            self._reply(e.status, {'error': e.message})
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'error': f"bad request: {e}"})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            logger.exception("Service request failed")
+            self._reply(500, {'error': str(e)})
+
+    def _route(self, method: str, parts: List[str], query: Dict, body: Dict):
+        service: SimulationService = self.server.service
+        user = self.user()
+        route = (method, parts[0] if parts else "", len(parts))
+        if route == ("POST", "sweeps", 1):
+            configs = body.get('configs')
+            if configs is None:
+                from cli import expand_sweep
+                configs = list(expand_sweep(body['spec']))
+            sweep = service.submit_sweep(configs, user, int(body.get('priority', 0)), body.get('early_stop'))
+            return dict(service.sweep_status(sweep), records=[])
+        if route == ("GET", "sweeps", 2):
+            return service.sweep_status(service._sweep(int(parts[1])))
+        if route == ("POST", "sweeps", 3) and parts[2] == "cancel":
+            return {'cancelled': service.cancel_sweep(int(parts[1]), user)}
+        if route == ("POST", "jobs", 1):
+            job = service.submit(body['config'], user, int(body.get('priority', 0)), body.get('early_stop'))
+            return job_snapshot(job)
+        if route == ("GET", "jobs", 1):
+            owner = query.get('user')
+            return [job_snapshot(j) for j in service.queue.jobs() if owner is None or j.owner == owner]
+        if route == ("GET", "jobs", 2):
+            return job_snapshot(service._job(int(parts[1])), with_params=True)
+        if route == ("POST", "jobs", 3) and parts[2] == "cancel":
+            return {'cancelled': service.cancel_job(int(parts[1]), user)}
+        if route == ("POST", "jobs", 3) and parts[2] == "priority":
+            job = service._job(int(parts[1]))
+            if job.owner != user:
+                raise ServiceError(403, f"job {job.job_id} belongs to {job.owner}")
+            return {'moved': service.queue.move(job.job_id, int(body.get('delta', 0)))}
+        if route == ("GET", "status", 1):
+            return service.status()
+        if route == ("POST", "queue", 2) and parts[1] in ("pause", "resume"):
+            if user != service.admin:
+                raise ServiceError(403, f"only {service.admin} (the service's user) can {parts[1]} the queue")
+            getattr(service.queue, parts[1])()
+            logger.info(f"Queue {parts[1]}d by {user}")
+            return {'paused': service.queue.paused}
+        raise ServiceError(404, f"no route {method} {self.path}")
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _reply(self, status: int, payload):
+        data = json.dumps(payload, default=str).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _stream_events(self, after: int, sweep_id: Optional[str]):
+        """Job snapshots as JSON lines (each with its seq) until the sweep is finished or the client leaves"""
+        service: SimulationService = self.server.service
+        sweep = service._sweep(int(sweep_id)) if sweep_id else None
+        wanted = set(sweep.job_ids) if sweep else None
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        seq = after
+        while not self.server.stopping:
+            seq, events = service.events_after(seq, HEARTBEAT_INTERVAL)
+            lines = [json.dumps(dict(event, seq=seq), default=str) for event in events
+                     if wanted is None or event['job_id'] in wanted]
+            self.wfile.write(("\n".join(lines) + "\n").encode("utf-8"))  # a bare newline is a heartbeat
+            self.wfile.flush()
+            if sweep is not None and all(service.queue.get(j).finished for j in wanted):
+                return
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stopping = False
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    stopping = False
+
+
+def _peer_user(connection) -> Optional[str]:
+    """Login name of a Unix-socket peer (SO_PEERCRED, Linux); None elsewhere"""
+    if getattr(connection, "family", None) != getattr(socket, "AF_UNIX", None) \
+            or not hasattr(socket, "SO_PEERCRED"):
+        return None
+    try:
+        import pwd
+        creds = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _, uid, _ = struct.unpack("3i", creds)
+        return pwd.getpwuid(uid).pw_name
+    except (OSError, KeyError, ImportError):
+        return None
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _share_socket(path: str, mode: int, group: Optional[str]):
+    """Let other users connect: chmod (and chgrp) the socket file"""
+    if group is not None:
+        shutil.chown(path, group=group)
+    os.chmod(path, mode)
+
+
+def make_server(service: SimulationService, address: str, socket_mode: int = SOCKET_MODE,
+                socket_group: Optional[str] = None):
+    """HTTP server for service on address (see parse_address); call serve_forever()"""
+    family, target = parse_address(address)
+    if family == "unix":
+        if os.path.exists(target):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(target)
+                raise ServiceError(409, f"a service is already listening on {target}")
+            except OSError:
+                os.unlink(target)  # stale socket of a crashed service
+            finally:
+                probe.close()
+        server = _UnixServer(target, ServiceHandler)
+        try:
+            _share_socket(target, socket_mode, socket_group)
+        except (OSError, LookupError) as e:
+            server.server_close()
+            os.unlink(target)
+            raise ServiceError(400, f"cannot set the permissions of {target}: {e}")
+    else:
+        if not _is_loopback(target[0]):
+            raise ServiceError(400, f"refusing to listen on {target[0]}: over TCP the user is only the "
+                                    f"{USER_HEADER} header, so bind to a loopback address or use unix:/path")
+        server = _TCPServer(target, ServiceHandler)
+    server.service = service
+    return server
+
+
+def serve(service: SimulationService, address: str, socket_mode: int = SOCKET_MODE,
+          socket_group: Optional[str] = None):
+    try:
+        server = make_server(service, address, socket_mode, socket_group)
+    except ServiceError:
+        service.stop()
+        raise
+    logger.info(f"Simulation service on {address} ({service.queue.max_workers} workers, "
+                f"{len(service.cache)} cached results)")
+    try:
+        server.serve_forever()
+    finally:
+        server.stopping = True
+        server.server_close()
+        service.stop()
+        family, target = parse_address(address)
+        if family == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+
+# --- Client ---
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class ServiceClient:
+    """Blocking client of the service API"""
+
+    def __init__(self, address: str, user: Optional[str] = None, timeout: float = 30.0):
+        self.address = address
+        self.family, self.target = parse_address(address)
+        self.user = user or getpass.getuser()
+        self.timeout = timeout
+
+    def _connect(self, timeout: Optional[float]) -> HTTPConnection:
+        if self.family == "unix":
+            return _UnixHTTPConnection(self.target, timeout)
+        host, port = self.target
+        return HTTPConnection(host, port, timeout=timeout)
+
+    def _open(self, method: str, path: str, payload=None, timeout: Optional[float] = None):
+        connection = self._connect(timeout)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {USER_HEADER: self.user, "Content-Type": "application/json"}
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        if response.status >= 400:
+            try:
+                message = json.loads(response.read()).get('error', response.reason)
+            except ValueError:
+                message = response.reason
+            connection.close()
+            raise ServiceError(response.status, message)
+        return connection, response
+
+    def request(self, method: str, path: str, payload=None):
+        connection, response = self._open(method, path, payload, self.timeout)
+        try:
+            return json.loads(response.read())
+        finally:
+            connection.close()
+
+    def submit_sweep(self, configs: Optional[List[Dict]] = None, spec: Optional[Dict] = None,
+                     priority: int = 0, early_stop: Optional[Dict] = None) -> Dict:
+        payload = {'priority': priority, 'early_stop': early_stop}
+        payload.update({'configs': configs} if configs is not None else {'spec': spec})
+        return self.request("POST", "/sweeps", payload)
+
+    def submit(self, config: Dict, priority: int = 0, early_stop: Optional[Dict] = None) -> Dict:
+        return self.request("POST", "/jobs", {'config': config, 'priority': priority, 'early_stop': early_stop})
+
+    def sweep(self, sweep_id: int) -> Dict:
+        return self.request("GET", f"/sweeps/{sweep_id}")
+
+    def cancel_sweep(self, sweep_id: int) -> Dict:
+        return self.request("POST", f"/sweeps/{sweep_id}/cancel")
+
+    def job(self, job_id: int) -> Dict:
+        return self.request("GET", f"/jobs/{job_id}")
+
+    def jobs(self, user: Optional[str] = None) -> List[Dict]:
+        return self.request("GET", "/jobs" + (f"?{urlencode({'user': user})}" if user else ""))
+
+    def cancel(self, job_id: int) -> bool:
+        return self.request("POST", f"/jobs/{job_id}/cancel")['cancelled']
+
+    def move(self, job_id: int, delta: int) -> bool:
+        return self.request("POST", f"/jobs/{job_id}/priority", {'delta': delta})['moved']
+
+    def pause(self) -> Dict:
+        return self.request("POST", "/queue/pause")
+
+    def resume(self) -> Dict:
+        return self.request("POST", "/queue/resume")
+
+    def status(self) -> Dict:
+        return self.request("GET", "/status")
+
+    def events(self, after: int = 0, sweep_id: Optional[int] = None) -> Iterator[Dict]:
+        """Job snapshots as they change (blocks; ends when the sweep is finished or the service goes away)"""
+        query = {'after': after}
+        if sweep_id is not None:
+            query['sweep'] = sweep_id
+        # Read timeout well above the heartbeat interval: silence means the service is gone
+        connection, response = self._open("GET", f"/events?{urlencode(query)}", timeout=HEARTBEAT_INTERVAL * 4)
+        try:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            connection.close()
+
+
+class RemoteJobQueue:
+    """
+    JobQueue interface backed by a service: submit() sends the job's
+    create_config arguments (config_for(protocol, seed, params)) and returns
+    a local SimulationJob that an event-stream thread keeps in sync, so
+    job.wait(), listeners and the job list work as with a local queue.
+    cancel_all() and the job list cover this client's jobs only;
+    set_max_workers() is ignored (the service uses the machine's cores).
+    """
+
+    RECONNECT_DELAY = 2.0
+
+    def __init__(self, client: ServiceClient, config_for: Callable[[str, int, Dict], Dict],
+                 early_stop_for: Optional[Callable[[Dict], Optional[Dict]]] = None):
+        self.client = client
+        self.config_for = config_for
+        self.early_stop_for = early_stop_for
+        self.listeners: List[Callable[[SimulationJob], None]] = []
+        self.max_workers = 1
+        self._jobs: Dict[int, SimulationJob] = {}
+        self._unclaimed = collections.OrderedDict()  # snapshots of jobs not submitted (yet) by this client
+        self._status: Dict = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._refresh_status()
+        self._seq = self._status.get('event_seq', 0)
+        self._thread = threading.Thread(target=self._follow, name="RemoteJobQueue", daemon=True)
+        self._thread.start()
+
+    # --- JobQueue interface ---
+
+    def submit(self, protocol: str, seed: int, params: Dict, priority: int = 0) -> SimulationJob:
+        config = self.config_for(protocol, seed, params)
+        early_stop = self.early_stop_for(params) if self.early_stop_for else None
+        snapshot = self.client.submit(config, priority, early_stop)
+        changed = False
+        with self._lock:
+            job = self._jobs.get(snapshot['job_id'])
+            if job is None:
+                job = SimulationJob(snapshot['job_id'], protocol, seed, config)
+                self._jobs[job.job_id] = job
+                # Events that arrived before the reply are newer, unless the reply already is final
+                streamed = self._unclaimed.pop(job.job_id, None)
+                if streamed is not None and (streamed['status'] in JobStatus.FINISHED
+                                             or snapshot['status'] not in JobStatus.FINISHED):
+                    snapshot = streamed
+                changed = self._update(job, snapshot)
+        if changed:
+            self._notify(job)
+        return job
+
+    def jobs(self) -> List[SimulationJob]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        rank = {JobStatus.RUNNING: 0, JobStatus.QUEUED: 1}
+        return sorted(jobs, key=lambda j: (rank.get(j.status, 2), j.priority, j.job_id))
+
+    def get(self, job_id: int) -> Optional[SimulationJob]:
+        return self._jobs.get(job_id)
+
+    def pending_count(self) -> int:
+        return sum(1 for job in self.jobs() if not job.finished)
+
+    def clear_finished(self):
+        with self._lock:
+            self._jobs = {i: j for i, j in self._jobs.items() if not j.finished}
+
+    def eta(self) -> Optional[float]:
+        """The service's ETA for its whole queue (refreshed with every heartbeat)"""
+        return self._status.get('eta')
+
+    @property
+    def paused(self) -> bool:
+        return bool(self._status.get('paused'))
+
+    def pause(self):
+        self._status.update(self.client.pause())
+
+    def resume(self):
+        self._status.update(self.client.resume())
+
+    def set_max_workers(self, count: int):
+        pass
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        job = self._jobs.get(job_id)
+        return job is not None and self.move(job_id, priority - job.priority)
+
+    def move(self, job_id: int, delta: int) -> bool:
+        try:
+            return self.client.move(job_id, delta)
+        except ServiceError as e:
+            logger.warning(f"Job {job_id}: {e}")
+            return False
+
+    def cancel(self, job_id: int) -> bool:
+        try:
+            return self.client.cancel(job_id)
+        except ServiceError as e:
+            logger.warning(f"Job {job_id}: {e}")
+            return False
+
+    def cancel_all(self):
+        for job in self.jobs():
+            if not job.finished:
+                self.cancel(job.job_id)
+
+    def stop(self):
+        """Stop following the service; the jobs keep running there"""
+        self._stopping.set()
+
+    # --- Event stream ---
+
+    def _follow(self):
+        while not self._stopping.is_set():
+            try:
+                for snapshot in self.client.events(after=self._seq):
+                    self._seq = max(self._seq, snapshot.pop('seq', self._seq))
+                    with self._lock:
+                        job = self._jobs.get(snapshot['job_id'])
+                        if job is None:
+                            self._unclaimed[snapshot['job_id']] = snapshot
+                            while len(self._unclaimed) > EVENT_BACKLOG:
+                                self._unclaimed.popitem(last=False)
+                        changed = job is not None and self._update(job, snapshot)
+                    if changed:
+                        self._notify(job)
+                    if self._stopping.is_set():
+                        return
+                    self._refresh_status()
+            except (OSError, ServiceError, ValueError) as e:
+                logger.warning(f"Lost connection to the simulation service ({e}), reconnecting")
+            self._stopping.wait(self.RECONNECT_DELAY)
+
+    def _refresh_status(self):
+        try:
+            self._status = self.client.status()
+        except (OSError, ServiceError, ValueError) as e:
+            logger.debug(f"Service status unavailable: {e}")
+
+    @staticmethod
+    def _update(job: SimulationJob, snapshot: Dict) -> bool:
+        """Copy a snapshot onto the local job (under _lock); whether listeners need to hear about it"""
+        changed = (job.status, job.attempts, job.priority) != \
+            (snapshot['status'], snapshot['attempts'], snapshot['priority'])
+        for name in ('status', 'attempts', 'priority', 'estimated_seconds', 'started_at',
+                     'finished_at', 'result', 'owner'):
+            setattr(job, name, snapshot.get(name))
+        job.error = snapshot.get('error') or ""
+        job.failure = snapshot.get('failure') or ""
+        return changed
+
+    def _notify(self, job: SimulationJob):
+        for listener in list(self.listeners):
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Job listener error: {e}")
+        if job.finished:
+            job.done.set()  # after the listeners, as in JobQueue
@@ -0,0 +1,434 @@
+"""
+Vectorized bootstrap intervals and pairwise significance tests
+
+Results of a comparison or a sweep are laid out as one array
+
+    values[scenario, protocol, metric, seed]      (NaN: no successful run)
+
+where a scenario is a combination of the non-protocol parameters (the sweep
+grid point). analyze() then computes, for every metric in one batched pass,
+
+    - percentile bootstrap confidence intervals of each protocol's mean
+    - for every pair of protocols in a scenario: the mean difference and its
+      bootstrap interval, a permutation-test p-value, the p-value adjusted
+      for multiple comparisons, Hedges' g and Cliff's delta
+
+Paired analysis (common random numbers: seed s of every protocol saw the
+same mobility and traffic) tests the per-seed differences with random sign
+flips; unpaired analysis permutes the protocol labels of the pooled
+results. Every bootstrap / permutation replicate is a weighted sum of a
+row's observations, so all rows with the same number of observations are
+resampled with one matrix product against a shared weight matrix
+(multinomial counts or +-1 signs); a sweep of thousands of scenarios x
+dozens of seeds takes seconds. Replicates are drawn from a seeded
+generator, so reports are reproducible.
+
+The family for the multiple-comparison correction is the set of protocol
+pairs of one metric in one scenario: "holm" (family-wise error rate, the
+default), "bh" (Benjamini-Hochberg false discovery rate) or "none".
+
+Zero results are real observations (a protocol that delivered nothing has
+PDR 0); only failed runs, which carry no values, are missing.
+"""
+import contextlib
+import itertools
+import math
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from defaults import CORRECTIONS, DEFAULT_CONFIDENCE, DEFAULT_CORRECTION, DEFAULT_RESAMPLES
+
+DEFAULT_METRICS = ("pdr", "avg_delay", "avg_hops")
+METRIC_LABELS = {"pdr": "PDR %", "avg_delay": "Delay ms", "avg_hops": "Hops"}
+CHUNK_ELEMENTS = 4_000_000  # replicate values held at once (float64: 32 MB)
+
+
+@dataclass
+class ResultTable:
+    """Per-seed metric values of every scenario and protocol"""
+    values: np.ndarray  # (scenarios, protocols, metrics, seeds)
+    scenarios: List[Tuple] = field(default_factory=lambda: [()])
+    protocols: List[str] = field(default_factory=list)
+    metrics: Tuple[str, ...] = DEFAULT_METRICS
+    seeds: List = field(default_factory=list)
+    scenario_keys: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], metrics: Sequence[str] = DEFAULT_METRICS,
+                     scenario_keys: Sequence[str] = ()) -> "ResultTable":
+        """
+        Result rows (cli records, GUI job results) -> table. Rows of failed runs
+        and surrogate predictions (not observations) are skipped; several rows
+        of one scenario, protocol and seed (a seed's antithetic run) are
+        averaged into one observation.
+        """
+        metrics = tuple(metrics)
+        scenario_keys = tuple(scenario_keys)
+        index: Dict[str, Dict] = {"scenario": {}, "protocol": {}, "seed": {}}
+        cells, rows = [], []
+        for record in records:
+            if not _truthy(record.get('success', True)) or record.get('stop_reason') == 'predicted':
+                continue
+            key = (tuple(record.get(k) for k in scenario_keys), record.get('protocol'), record.get('seed'))
+            cells.append(tuple(index[name].setdefault(value, len(index[name]))
+                               for name, value in zip(("scenario", "protocol", "seed"), key)))
+            rows.append([_number(record.get(m)) for m in metrics])
+
+        shape = (len(index["scenario"]) or 1, len(index["protocol"]), len(metrics), len(index["seed"]))
+        values = np.full(shape, np.nan)
+        if cells:
+            s, p, n = (np.array(column) for column in zip(*cells))
+            observed = np.array(rows, dtype=float)  # (records, metrics)
+            present = ~np.isnan(observed)
+            sums = np.zeros(shape)
+            counts = np.zeros(shape)
+            k = np.arange(len(metrics))
+            np.add.at(sums, (s[:, None], p[:, None], k, n[:, None]), np.where(present, observed, 0.0))
+            np.add.at(counts, (s[:, None], p[:, None], k, n[:, None]), present)
+            with np.errstate(invalid='ignore'):
+                values = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return cls(values, list(index["scenario"]) or [()], list(index["protocol"]), metrics,
+                   list(index["seed"]), scenario_keys)
+
+    def protocol_index(self, protocol: str) -> int:
+        return self.protocols.index(protocol)
+
+    def metric_index(self, metric: str) -> int:
+        return self.metrics.index(metric)
+
+
+@dataclass
+class SignificanceReport:
+    """analyze() output; arrays are indexed [scenario, protocol or pair, metric]"""
+    table: ResultTable
+    paired: bool
+    confidence: float
+    correction: str
+    resamples: int
+    count: np.ndarray  # observations (seeds) per protocol
+    mean: np.ndarray
+    std: np.ndarray
+    ci_low: np.ndarray
+    ci_high: np.ndarray
+    pairs: List[Tuple[int, int]]  # protocol indices (a, b); differences are a - b
+    pair_count: np.ndarray  # observations used by the test (common seeds when paired)
+    difference: np.ndarray
+    diff_low: np.ndarray
+    diff_high: np.ndarray
+    p_value: np.ndarray
+    p_adjusted: np.ndarray
+    hedges_g: np.ndarray
+    cliffs_delta: np.ndarray
+
+    @property
+    def alpha(self) -> float:
+        return 1.0 - self.confidence
+
+    @property
+    def significant(self) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            return self.p_adjusted < self.alpha
+
+    def ranking(self, scenario: int = 0, metric: str = "pdr", descending: bool = True) -> List[int]:
+        """Protocol indices by mean (protocols without results last)"""
+        means = self.mean[scenario, :, self.table.metric_index(metric)]
+        order = sorted((i for i in range(len(means)) if not np.isnan(means[i])),
+                       key=lambda i: means[i], reverse=descending)
+        return order + [i for i in range(len(means)) if np.isnan(means[i])]
+
+    def rows(self) -> Iterator[Dict]:
+        """
+        Flat rows for ResultWriter: kind "interval" (one protocol) and kind
+        "test" (protocol - other), with the same fields so CSV output works.
+        """
+        table = self.table
+        for s, scenario in enumerate(table.scenarios):
+            base = dict(zip(table.scenario_keys, scenario))
+            for k, metric in enumerate(table.metrics):
+                for p, protocol in enumerate(table.protocols):
+                    if self.count[s, p, k]:
+                        yield dict(base, metric=metric, kind="interval", protocol=protocol, other="",
+                                   n=int(self.count[s, p, k]), estimate=_value(self.mean[s, p, k]),
+                                   ci_low=_value(self.ci_low[s, p, k]), ci_high=_value(self.ci_high[s, p, k]),
+                                   p_value="", p_adjusted="", significant="", hedges_g="", cliffs_delta="")
+                for q, (a, b) in enumerate(self.pairs):
+                    if self.pair_count[s, q, k]:
+                        yield dict(base, metric=metric, kind="test", protocol=table.protocols[a],
+                                   other=table.protocols[b], n=int(self.pair_count[s, q, k]),
+                                   estimate=_value(self.difference[s, q, k]),
+                                   ci_low=_value(self.diff_low[s, q, k]), ci_high=_value(self.diff_high[s, q, k]),
+                                   p_value=_value(self.p_value[s, q, k]),
+                                   p_adjusted=_value(self.p_adjusted[s, q, k]),
+                                   significant=bool(self.significant[s, q, k]),
+                                   hedges_g=_value(self.hedges_g[s, q, k]),
+                                   cliffs_delta=_value(self.cliffs_delta[s, q, k]))
+
+
+def analyze(table: ResultTable, paired: bool = False, confidence: float = DEFAULT_CONFIDENCE,
+            resamples: int = DEFAULT_RESAMPLES, correction: str = DEFAULT_CORRECTION,
+            seed: int = 0) -> SignificanceReport:
+    """Bootstrap intervals, pairwise tests and effect sizes for every scenario and metric"""
+    if correction not in CORRECTIONS:
+        raise ValueError(f"Unknown correction '{correction}' (expected one of {', '.join(CORRECTIONS)})")
+    values = table.values
+    scenarios, protocols, metrics, _ = values.shape
+    pairs = list(itertools.combinations(range(protocols), 2))
+    rng = np.random.default_rng(seed)
+    plans = _ResamplingPlans(rng, resamples)
+    tail = (1.0 - confidence) / 2.0
+
+    group_shape = (scenarios, protocols, metrics)
+    pair_shape = (scenarios, len(pairs), metrics)
+    count = np.count_nonzero(~np.isnan(values), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'), _quiet_nan_warnings():
+        mean = np.nanmean(values, axis=-1)
+        std = np.nanstd(values, axis=-1, ddof=1)
+    std = np.where(count > 1, std, np.nan)
+    ci_low, ci_high = np.full(group_shape, np.nan), np.full(group_shape, np.nan)
+    out = {name: np.full(pair_shape, np.nan) for name in
+           ("difference", "diff_low", "diff_high", "p_value", "hedges_g", "cliffs_delta")}
+    pair_count = np.zeros(pair_shape, dtype=int)
+
+    # Scenario chunks keep the replicate arrays at about CHUNK_ELEMENTS values
+    width = max(protocols, len(pairs), 1) * metrics * max(resamples, values.shape[-1] ** 2)
+    step = max(1, CHUNK_ELEMENTS // max(width, 1))
+    for start in range(0, scenarios, step):
+        chunk = slice(start, min(start + step, scenarios))
+        x = values[chunk]  # (s, P, K, N)
+
+        boot = plans.bootstrap_means(x.reshape(-1, x.shape[-1])).reshape(x.shape[:-1] + (resamples,))
+        low, high = _percentiles(boot, tail)
+        ci_low[chunk] = np.where(count[chunk] > 1, low, np.nan)
+        ci_high[chunk] = np.where(count[chunk] > 1, high, np.nan)
+        if not pairs:
+            continue
+
+        a_index = [a for a, _ in pairs]
+        b_index = [b for _, b in pairs]
+        xa, xb = x[:, a_index], x[:, b_index]  # (s, Q, K, N)
+        rows_a, rows_b = xa.reshape(-1, xa.shape[-1]), xb.reshape(-1, xb.shape[-1])
+        if paired:
+            diffs = rows_a - rows_b  # NaN unless both protocols have the seed
+            n = np.count_nonzero(~np.isnan(diffs), axis=-1)
+            with _quiet_nan_warnings():
+                observed = np.nanmean(diffs, axis=-1)
+            replicates = plans.bootstrap_means(diffs)
+            permuted = plans.sign_flips(diffs)
+        else:
+            n_a = np.count_nonzero(~np.isnan(rows_a), axis=-1)
+            n_b = np.count_nonzero(~np.isnan(rows_b), axis=-1)
+            n = np.minimum(n_a, n_b)
+            observed = mean[chunk][:, a_index].reshape(-1) - mean[chunk][:, b_index].reshape(-1)
+            # Replicates are i.i.d.: pairing replicate r of a with replicate r+1 of b
+            # gives independent resamples of the two protocols
+            replicates = (boot[:, a_index].reshape(-1, resamples)
+                          - np.roll(boot[:, b_index].reshape(-1, resamples), 1, axis=-1))
+            permuted = plans.label_permutations(rows_a, rows_b)
+        low, high = _percentiles(replicates, tail)
+        with np.errstate(invalid='ignore'):
+            exceed = np.sum(np.abs(permuted) >= np.abs(observed)[:, None] - 1e-12, axis=-1)
+        p_value = (1.0 + exceed) / (resamples + 1.0)
+
+        testable = n > 1
+        shape = xa.shape[:-1]
+        pair_count[chunk] = np.where(testable, n, 0).reshape(shape)
+        for name, result in (("difference", observed), ("diff_low", low), ("diff_high", high),
+                             ("p_value", p_value)):
+            out[name][chunk] = np.where(testable, result, np.nan).reshape(shape)
+        out["hedges_g"][chunk] = _hedges_g(xa, xb)
+        out["cliffs_delta"][chunk] = _cliffs_delta(xa, xb)
+
+    return SignificanceReport(table, paired, confidence, correction, resamples, count, mean, std,
+                              ci_low, ci_high, pairs, pair_count,
+                              p_adjusted=adjust_pvalues(out["p_value"], correction, axis=1), **out)
+
+
+def adjust_pvalues(p: np.ndarray, method: str = DEFAULT_CORRECTION, axis: int = -1) -> np.ndarray:
+    """Holm or Benjamini-Hochberg adjusted p-values per family along axis (NaN: not tested)"""
+    if method == "none":
+        return p.copy()
+    p = np.moveaxis(np.asarray(p, dtype=float), axis, -1)
+    missing = np.isnan(p)
+    m = np.count_nonzero(~missing, axis=-1)[..., None]
+    order = np.argsort(np.where(missing, np.inf, p), axis=-1)
+    ranked = np.take_along_axis(np.where(missing, np.inf, p), order, axis=-1)
+    rank = np.arange(1, p.shape[-1] + 1)
+    with np.errstate(invalid='ignore'):
+        if method == "holm":
+            adjusted = np.maximum.accumulate(np.minimum(ranked * (m - rank + 1), 1.0), axis=-1)
+        elif method == "bh":
+            scaled = ranked * m / rank
+            adjusted = np.minimum(np.minimum.accumulate(scaled[..., ::-1], axis=-1)[..., ::-1], 1.0)
+        else:
+            raise ValueError(f"Unknown correction '{method}' (expected one of {', '.join(CORRECTIONS)})")
+    result = np.empty_like(adjusted)
+    np.put_along_axis(result, order, adjusted, axis=-1)
+    result[missing] = np.nan
+    return np.moveaxis(result, -1, axis)
+
+
+class _ResamplingPlans:
+    """Shared replicate weight matrices, one per number of observations in a row"""
+
+    def __init__(self, rng: np.random.Generator, resamples: int):
+        self.rng = rng
+        self.resamples = resamples
+        self._multinomial: Dict[int, np.ndarray] = {}
+        self._signs: Dict[int, np.ndarray] = {}
+        self._labels: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def bootstrap_means(self, rows: np.ndarray) -> np.ndarray:
+        """(R, N) rows with NaN gaps -> (R, resamples) bootstrap means"""
+        return self._apply(rows, self._multinomial, lambda n: self.rng.multinomial(
+            n, np.full(n, 1.0 / n), size=self.resamples) / n)
+
+    def sign_flips(self, rows: np.ndarray) -> np.ndarray:
+        """Means of the rows with random signs: null distribution of a paired mean difference"""
+        return self._apply(rows, self._signs, lambda n: self.rng.choice(
+            np.array([-1.0, 1.0]) / n, size=(self.resamples, n)))
+
+    def label_permutations(self, rows_a: np.ndarray, rows_b: np.ndarray) -> np.ndarray:
+        """Mean differences with the pooled observations randomly relabelled (unpaired null)"""
+        a, b = _compact(rows_a), _compact(rows_b)
+        n_a = np.count_nonzero(~np.isnan(a), axis=-1)
+        n_b = np.count_nonzero(~np.isnan(b), axis=-1)
+        out = np.full((len(a), self.resamples), np.nan)
+        for size_a, size_b in set(zip(n_a.tolist(), n_b.tolist())):
+            if not size_a or not size_b:
+                continue
+            rows = np.flatnonzero((n_a == size_a) & (n_b == size_b))
+            weights = self._labels.get((size_a, size_b))
+            if weights is None:
+                in_a = np.argsort(self.rng.random((self.resamples, size_a + size_b)), axis=-1) < size_a
+                weights = self._labels[size_a, size_b] = np.where(in_a, 1.0 / size_a, -1.0 / size_b)
+            pooled = np.concatenate([a[rows, :size_a], b[rows, :size_b]], axis=-1)
+            out[rows] = pooled @ weights.T
+        return out
+
+    def _apply(self, rows: np.ndarray, cache: Dict[int, np.ndarray], make) -> np.ndarray:
+        rows = _compact(rows)
+        counts = np.count_nonzero(~np.isnan(rows), axis=-1)
+        out = np.full((len(rows), self.resamples), np.nan)
+        for n in np.unique(counts).tolist():
+            if not n:
+                continue
+            weights = cache.get(n)
+            if weights is None:
+                weights = cache[n] = make(n)
+            selected = np.flatnonzero(counts == n)
+            out[selected] = rows[selected, :n] @ weights.T
+        return out
+
+
+def _compact(rows: np.ndarray) -> np.ndarray:
+    """Observations of every row moved to the front, NaN gaps to the end (order is irrelevant)"""
+    return np.sort(rows, axis=-1)
+
+
+def _percentiles(replicates: np.ndarray, tail: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Linear-interpolated percentiles (numpy's default method) of the replicates along the last axis"""
+    # A full sort is several times faster than np.quantile's partition on (rows, 2000) arrays
+    ordered = np.sort(replicates, axis=-1)
+    last = ordered.shape[-1] - 1
+    result = []
+    for q in (tail, 1.0 - tail):
+        position = q * last
+        below = int(math.floor(position))
+        above = min(below + 1, last)
+        result.append(ordered[..., below] + (ordered[..., above] - ordered[..., below]) * (position - below))
+    return result[0], result[1]
+
+
+def _hedges_g(xa: np.ndarray, xb: np.ndarray) -> np.ndarray:
+    """Standardized mean difference (pooled SD, small-sample corrected)"""
+    n_a = np.count_nonzero(~np.isnan(xa), axis=-1)
+    n_b = np.count_nonzero(~np.isnan(xb), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'), _quiet_nan_warnings():
+        var_a = np.nanvar(xa, axis=-1, ddof=1)
+        var_b = np.nanvar(xb, axis=-1, ddof=1)
+        dof = n_a + n_b - 2
+        pooled = np.sqrt(((n_a - 1) * var_a + (n_b - 1) * var_b) / dof)
+        d = (np.nanmean(xa, axis=-1) - np.nanmean(xb, axis=-1)) / pooled
+        g = d * (1.0 - 3.0 / (4.0 * dof - 1.0))
+    return np.where((n_a > 1) & (n_b > 1), g, np.nan)
+
+
+def _cliffs_delta(xa: np.ndarray, xb: np.ndarray) -> np.ndarray:
+    """P(a > b) - P(a < b) over all pairs of observations"""
+    with np.errstate(invalid='ignore'), _quiet_nan_warnings():
+        return np.nanmean(np.sign(xa[..., :, None] - xb[..., None, :]), axis=(-2, -1))
+
+
+@contextlib.contextmanager
+def _quiet_nan_warnings():
+    """nanmean & co. warn about all-NaN rows (protocols without results); those stay NaN"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        yield
+
+
+def _truthy(value) -> bool:
+    """success flags from JSON (bool) or CSV ('True' / 'False')"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _value(x) -> Optional[float]:
+    x = float(x)
+    return None if math.isnan(x) else round(x, 6)
+
+
+def format_ci(mean: float, low: float, high: float) -> str:
+    """'72.10 [70.02, 74.31]'; the interval is left out when there is none (fewer than 2 runs)"""
+    if math.isnan(mean):
+        return "-"
+    if math.isnan(low):
+        return f"{mean:.2f}"
+    return f"{mean:.2f} [{low:.2f}, {high:.2f}]"
+
+
+def format_intervals(report: SignificanceReport, scenario: int = 0,
+                     order: Optional[Sequence[int]] = None) -> List[str]:
+    """One line per protocol: n and mean [CI] of every metric"""
+    table = report.table
+    if order is None:
+        order = report.ranking(scenario) if "pdr" in table.metrics else range(len(table.protocols))
+    lines = []
+    for p in order:
+        n = int(report.count[scenario, p].max()) if report.count.size else 0
+        cells = [f"{METRIC_LABELS.get(metric, metric)} "
+                 f"{format_ci(report.mean[scenario, p, k], report.ci_low[scenario, p, k], report.ci_high[scenario, p, k])}"
+                 for k, metric in enumerate(table.metrics)]
+        lines.append(f"{table.protocols[p]:<10}n={n:<4}" + "  ".join(cells))
+    return lines
+
+
+def format_tests(report: SignificanceReport, scenario: int = 0, metric: str = "pdr") -> List[str]:
+    """One line per protocol pair: difference [CI], p-values, verdict and effect sizes"""
+    table = report.table
+    k = table.metric_index(metric)
+    label = "paired" if report.paired else "unpaired"
+    lines = []
+    for q, (a, b) in enumerate(report.pairs):
+        if not report.pair_count[scenario, q, k]:
+            continue
+        verdict = "significant" if report.significant[scenario, q, k] else "not significant"
+        lines.append(
+            f"{table.protocols[a]} - {table.protocols[b]}: "
+            f"{report.difference[scenario, q, k]:+.2f} "
+            f"[{report.diff_low[scenario, q, k]:+.2f}, {report.diff_high[scenario, q, k]:+.2f}] "
+            f"p={report.p_value[scenario, q, k]:.4f} ({report.correction} {report.p_adjusted[scenario, q, k]:.4f}, "
+            f"{verdict}; {label}, n={report.pair_count[scenario, q, k]}) "
+            f"g={report.hedges_g[scenario, q, k]:+.2f} delta={report.cliffs_delta[scenario, q, k]:+.2f}")
+    return lines
@@ -0,0 +1,175 @@
+"""
+Snapshot and fork of Python-side simulation state
+
+Parameter studies only need to pay the warm-up transient (route
+establishment, node spreading) once per topology: run a SimulationState to
+the end of warm-up, capture a SimulationSnapshot and fork many what-if
+variants from it - either copy-on-write via os.fork (POSIX) or by restoring
+the serialized state in each variant.
+
+OMNeT++ runs cannot be checkpointed this way; this applies to engines built
+on the models.py structures.
+"""
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from models import Event, PerformanceMetrics
+
+FORK_POLL_INTERVAL = 0.005  # seconds between checks for finished variant processes
+
+
+@dataclass
+class SimulationState:
+    """Everything a Python-side engine needs to resume a run"""
+    current_time: float = 0.0
+    event_queue: List[Event] = field(default_factory=list)  # heapq-ordered
+    event_counter: int = 0  # next Event.sequence_number
+    routing_tables: Dict[str, Any] = field(default_factory=dict)  # node -> RoutingTable
+    energy: Any = None  # EnergyBank or {node: EnergyModel}
+    positions: Dict[str, Any] = field(default_factory=dict)
+    metrics: PerformanceMetrics = field(default_factory=PerformanceMetrics)
+    parameters: Dict[str, Any] = field(default_factory=dict)  # e.g. aodv_timeout, traffic load
+    rng: random.Random = field(default_factory=random.Random)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class SimulationSnapshot:
+    """Serialized SimulationState; every restore() returns an independent copy"""
+
+    def __init__(self, blob: bytes, sim_time: float):
+        self.blob = blob
+        self.sim_time = sim_time
+
+    @classmethod
+    def capture(cls, state: SimulationState) -> "SimulationSnapshot":
+        return cls(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), state.current_time)
+
+    def restore(self) -> SimulationState:
+        return pickle.loads(self.blob)
+
+    def __len__(self) -> int:
+        return len(self.blob)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump((self.sim_time, self.blob), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "SimulationSnapshot":
+        with open(path, "rb") as f:
+            sim_time, blob = pickle.load(f)
+        return cls(blob, sim_time)
+
+
+def warm_up(state: SimulationState, run_until: Callable[[SimulationState, float], None],
+            warmup_time: float) -> SimulationSnapshot:
+    """Advance state to warmup_time with the engine's run_until and capture it"""
+    run_until(state, warmup_time)
+    return SimulationSnapshot.capture(state)
+
+
+def apply_parameters(state: SimulationState, overrides: Dict[str, Any]):
+    """Default variant hook: override entries of state.parameters"""
+    state.parameters.update(overrides)
+
+
+def fork_variants(snapshot: SimulationSnapshot, variants: Sequence[Dict[str, Any]],
+                  run: Callable[[SimulationState], Any],
+                  apply: Callable[[SimulationState, Dict[str, Any]], None] = apply_parameters,
+                  reseed: Optional[Callable[[int], int]] = None,
+                  use_os_fork: Optional[bool] = None,
+                  max_parallel: Optional[int] = None) -> List[Any]:
+    """
+    Run every variant from the same warmed-up snapshot.
+
+    Each variant gets its own copy of the state, has `apply(state, variant)`
+    called, optionally its RNG reseeded with reseed(variant_index), and then
+    `run(state)` is executed; the return values are collected in order.
+    With os.fork the children share the restored state copy-on-write and
+    up to max_parallel (default: CPU count) variants run concurrently.
+
+    A forked child gets only the calling thread; locks held by other threads
+    (logging, the GUI, opp_run workers) stay locked in it forever. os.fork is
+    therefore used only while the process has a single thread: by default
+    the variants then run serially, and use_os_fork=True raises RuntimeError.
+    """
+    if use_os_fork is None:
+        use_os_fork = hasattr(os, "fork") and threading.active_count() == 1
+    elif use_os_fork and threading.active_count() > 1:
+        raise RuntimeError(f"Cannot fork variants while other threads are running "
+                           f"({threading.active_count()} in total); use use_os_fork=False")
+
+    def prepare(state: SimulationState, index: int) -> SimulationState:
+        apply(state, variants[index])
+        if reseed is not None:
+            state.rng.seed(reseed(index))
+        return state
+
+    if not use_os_fork:
+        return [run(prepare(snapshot.restore(), i)) for i in range(len(variants))]
+    return _fork_and_collect(snapshot.restore(), len(variants), prepare, run,
+                             max_parallel or os.cpu_count() or 1)
+
+
+def _wait_any(pids) -> int:
+    """Reap one of our variant processes; os.wait() would also reap other children (opp_run, Popen)"""
+    while True:
+        for pid in pids:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                return pid
+        time.sleep(FORK_POLL_INTERVAL)
+
+
+def _fork_and_collect(base: SimulationState, count: int, prepare, run, max_parallel: int) -> List[Any]:
+    results: List[Any] = [None] * count
+    errors = []
+    running: Dict[int, tuple] = {}  # pid -> (index, result path)
+    next_index = 0
+
+    while next_index < count or running:
+        while next_index < count and len(running) < max_parallel:
+            fd, path = tempfile.mkstemp(prefix="manet_variant_", suffix=".pkl")
+            os.close(fd)
+            pid = os.fork()
+            if pid == 0:  # child: the base state is shared copy-on-write
+                status = 0
+                try:
+                    payload = ("ok", run(prepare(base, next_index)))
+                except BaseException:
+                    payload = ("error", traceback.format_exc())
+                    status = 1
+                try:
+                    with open(path, "wb") as f:
+                        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                finally:
+                    os._exit(status)
+            running[pid] = (next_index, path)
+            next_index += 1
+
+        pid = _wait_any(running)
+        index, path = running.pop(pid)
+        try:
+            with open(path, "rb") as f:
+                kind, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            kind, value = "error", "variant process exited without a result"
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        if kind == "ok":
+            results[index] = value
+        else:
+            errors.append((index, value))
+
+    if errors:
+        index, message = errors[0]
+        raise RuntimeError(f"Variant {index} failed ({len(errors)} failed in total):\n{message}")
+    return results
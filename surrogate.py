@@ -0,0 +1,409 @@
+"""
+Surrogate model of simulation results
+
+Surrogate learns PDR, delay and hop count as functions of the create_config
+parameters from stored results and predicts them, with uncertainty, for
+configurations that were never simulated. There is one Gaussian process per
+model group and metric (NumPy, CPU only). A group is a protocol plus the
+values of the parameters the inputs do not cover (FIXED_PARAMS: network,
+bitrate, radio power, mobility model, and the aodv_* settings for AODV); a
+configuration whose group has no results gets no prediction:
+
+    inputs      log nodes, sim time, traffic pairs + 1, area and radio range
+                (runtime_model.features), min/max speed, pause time and
+                warm-up period; standardized
+    targets     PDR and hop count as recorded, delay in log space (the
+                uncertainty of delay is relative)
+    kernel      squared exponential with one length scale per input (ARD)
+    noise       seeds of one configuration are averaged; a mean over n
+                seeds gets noise variance sigma_n^2 / n
+
+Hyperparameters maximize the log marginal likelihood (Adam on a subsample of
+HYPER_POINTS configurations). The model then conditions on up to MAX_POINTS
+configurations.
+
+The predicted quantity is a configuration's mean over seeds:
+
+    confident   its 95% interval is within every tolerance (PDR +-2 points,
+                delay +-10%, DEFAULT_TOLERANCES) and the point lies inside
+                the parameter ranges of the training data (a parameter the
+                results never varied must keep its value). `sweep
+                --surrogate` writes the prediction instead of simulating
+                (stop_reason "predicted"; significance tests leave these
+                rows out)
+    uncertain   the largest half-width / tolerance ratio ranks points, so
+                `suggest` lists the points worth simulating next
+
+Training rows are successful result rows (sweep/compare/submit output,
+JSON lines or CSV) and service result caches. Predicted rows are never
+used for training, and a row only trains the metrics its recording profile
+recorded (a recording=pdr run reports avg_hops 0, which is no measurement).
+"""
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from omnet_manager import GENERIC_NETWORK
+from recording import DEFAULT_PROFILE, resolve_metrics
+from runtime_model import features as runtime_features, parse_quantity
+
+SURROGATE_METRICS = ("pdr", "avg_delay", "avg_hops")
+LOG_METRICS = ("avg_delay",)  # modelled in log space; zero delays (nothing received) are left out
+DEFAULT_TOLERANCES = {"pdr": 2.0, "avg_delay": 0.10}  # 95% half-width: PDR points, delay relative
+CONFIDENCE_Z = 1.96
+STOP_PREDICTED = "predicted"  # stop_reason of rows written from the surrogate
+
+LOG_FEATURES = ("nodes", "sim_time", "traffic_pairs", "area", "radio_range")
+LINEAR_FEATURES = {"min_speed": 1.0, "max_speed": 5.0, "pause_time": 2.0, "warmup_period": 0.0}  # create_config defaults
+FEATURE_NAMES = LOG_FEATURES + tuple(LINEAR_FEATURES)
+# Not model inputs: a model only covers one value of each (create_config defaults)
+FIXED_PARAMS = {"network_name": GENERIC_NETWORK, "bitrate": "2Mbps", "radio_power": 20.0,
+                "mobility_model": "RandomWPMobility"}
+AODV_PARAMS = {"aodv_timeout": 3.0, "aodv_hello_interval": 1.0, "aodv_hello_loss": 2}  # only written for AODV
+RECORDED_AS = {"pdr": "pdr", "avg_delay": "delay", "avg_hops": "hops"}  # metric -> recording.METRICS name
+
+MIN_POINTS = 3  # configurations needed before a group/metric gets a model
+HYPER_POINTS = 192  # configurations used to fit the hyperparameters
+MAX_POINTS = 3000  # configurations the model conditions on
+HYPER_STEPS = 100
+LEARNING_RATE = 0.05
+LENGTH_SCALE_BOUNDS = (0.05, 50.0)  # standardized input units
+NOISE_BOUNDS = (1e-3, 3.0)  # standardized target units
+JITTER = 1e-8
+RANGE_MARGIN = 0.05  # fraction of a parameter's training range still counted as inside
+
+
+def feature_vector(params: Dict) -> List[float]:
+    """Model inputs of create_config kwargs (or a result row; CSV strings are parsed)"""
+    logs = runtime_features(params)
+    linear = [parse_quantity(params.get(name), default) if params.get(name) not in (None, "") else default
+              for name, default in LINEAR_FEATURES.items()]
+    return [logs[name] for name in LOG_FEATURES] + linear
+
+
+def _canonical(value) -> str:
+    """'20', 20 and '20.0' compare equal; other values (e.g. '2Mbps') as text"""
+    try:
+        return f"{float(value):g}"
+    except (TypeError, ValueError):
+        return str(value).strip()
+
+
+def model_group(params: Dict) -> Tuple[str, ...]:
+    """Protocol and fixed-parameter values of a configuration or result row (blank = default)"""
+    protocol = str(params.get("protocol", "")).upper()
+    fixed = dict(FIXED_PARAMS, **AODV_PARAMS) if protocol == "AODV" else FIXED_PARAMS
+    values = [params.get(name) for name in fixed]
+    return (protocol,) + tuple(_canonical(default if value in (None, "") else value)
+                               for value, default in zip(values, fixed.values()))
+
+
+def recorded_metrics(record: Dict) -> Optional[Tuple[str, ...]]:
+    """Surrogate metrics the row's recording profile recorded; None if the profile is unknown"""
+    try:
+        recorded = resolve_metrics(record.get("recording") or DEFAULT_PROFILE)
+    except (ValueError, TypeError):
+        return None
+    return tuple(m for m, name in RECORDED_AS.items() if recorded is None or name in recorded)
+
+
+def _is_true(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def _metric_value(value) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def is_training_row(record: Dict) -> bool:
+    """Successful simulated rows (not failures, not surrogate predictions)"""
+    return (_is_true(record.get("success", True)) and record.get("stop_reason") != STOP_PREDICTED
+            and bool(record.get("protocol")))
+
+
+class GaussianProcess:
+    """Zero-mean GP on standardized data with an ARD squared-exponential kernel"""
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, counts: np.ndarray, seed: int = 0):
+        margin = RANGE_MARGIN * (x.max(axis=0) - x.min(axis=0)) + 1e-9
+        self.x_low, self.x_high = x.min(axis=0) - margin, x.max(axis=0) + margin
+        self.x_mean = x.mean(axis=0)
+        x_std = x.std(axis=0)
+        # An input the data never varied keeps its raw scale: one unit (e.g. a doubling of
+        # nodes is 0.69 in log units) is then about one length scale away
+        self.x_scale = np.where(x_std > 1e-9, x_std, 1.0)
+        self.y_mean = float(y.mean())
+        self.y_scale = float(y.std()) or 1.0
+        self.samples = int(counts.sum())
+        xs = self._inputs(x)
+        ys = (y - self.y_mean) / self.y_scale
+        self.log_length, self.log_signal, self.log_noise = self._fit_hyperparameters(xs, ys, counts, seed)
+        if len(xs) > MAX_POINTS:
+            keep = np.random.default_rng(seed).choice(len(xs), MAX_POINTS, replace=False)
+            xs, ys, counts = xs[keep], ys[keep], counts[keep]
+        self._x = xs
+        k = self._covariance(xs, counts)
+        self._inverse = np.linalg.inv(k)
+        self._alpha = self._inverse @ ys
+
+    @property
+    def noise_std(self) -> float:
+        """Seed-to-seed standard deviation of one run (target units)"""
+        return float(np.exp(self.log_noise)) * self.y_scale
+
+    def _inputs(self, x: np.ndarray) -> np.ndarray:
+        return (x - self.x_mean) / self.x_scale
+
+    def _kernel(self, a: np.ndarray, b: np.ndarray, log_length=None, log_signal=None) -> np.ndarray:
+        length = np.exp(self.log_length if log_length is None else log_length)
+        signal = np.exp(2.0 * (self.log_signal if log_signal is None else log_signal))
+        a, b = a / length, b / length
+        sq = (a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :] - 2.0 * a @ b.T
+        return signal * np.exp(-0.5 * np.maximum(sq, 0.0))
+
+    def _covariance(self, xs: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        noise = np.exp(2.0 * self.log_noise) / counts
+        k = self._kernel(xs, xs)
+        k[np.diag_indices_from(k)] += noise + JITTER * np.exp(2.0 * self.log_signal)
+        return k
+
+    def _fit_hyperparameters(self, xs: np.ndarray, ys: np.ndarray, counts: np.ndarray,
+                             seed: int) -> Tuple[np.ndarray, float, float]:
+        """Adam ascent on the log marginal likelihood over (log length scales, log signal, log noise)"""
+        if len(xs) > HYPER_POINTS:
+            keep = np.random.default_rng(seed).choice(len(xs), HYPER_POINTS, replace=False)
+            xs, ys, counts = xs[keep], ys[keep], counts[keep]
+        d = xs.shape[1]
+        sq_diff = (xs[:, None, :] - xs[None, :, :]) ** 2  # (n, n, d)
+        theta = np.concatenate([np.zeros(d), [0.0, math.log(0.3)]])
+        lower = np.concatenate([np.full(d, math.log(LENGTH_SCALE_BOUNDS[0])), [math.log(0.05), math.log(NOISE_BOUNDS[0])]])
+        upper = np.concatenate([np.full(d, math.log(LENGTH_SCALE_BOUNDS[1])), [math.log(20.0), math.log(NOISE_BOUNDS[1])]])
+        m, v = np.zeros_like(theta), np.zeros_like(theta)
+        for step in range(1, HYPER_STEPS + 1):
+            length, signal, noise = np.exp(theta[:d]), math.exp(2 * theta[d]), math.exp(2 * theta[d + 1])
+            r = np.exp(-0.5 * (sq_diff @ (1.0 / length ** 2)))
+            noise_diag = noise / counts
+            k = signal * r
+            k[np.diag_indices_from(k)] += noise_diag + JITTER * signal
+            try:
+                inverse = np.linalg.inv(k)
+            except np.linalg.LinAlgError:
+                break
+            alpha = inverse @ ys
+            w = np.outer(alpha, alpha) - inverse  # dLML/dK * 2
+            grad = np.empty_like(theta)
+            grad[:d] = 0.5 * np.tensordot(w * (signal * r), sq_diff, axes=2) / length ** 2
+            grad[d] = np.sum(w * (2.0 * signal * r)) * 0.5
+            grad[d + 1] = np.sum(np.diag(w) * 2.0 * noise_diag) * 0.5
+            m = 0.9 * m + 0.1 * grad
+            v = 0.999 * v + 0.001 * grad ** 2
+            theta = np.clip(theta + LEARNING_RATE * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8),
+                            lower, upper)
+        return theta[:d], float(theta[d]), float(theta[d + 1])
+
+    def outside(self, x: np.ndarray) -> np.ndarray:
+        """Rows of x beyond the range of the training inputs in some parameter"""
+        return ((x < self.x_low) | (x > self.x_high)).any(axis=1)
+
+    def predict(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(mean, standard deviation) of the latent function (the mean over seeds) at rows of x"""
+        ks = self._kernel(self._inputs(x), self._x)
+        mean = ks @ self._alpha
+        variance = np.exp(2.0 * self.log_signal) - ((ks @ self._inverse) * ks).sum(axis=1)
+        return (self.y_mean + self.y_scale * mean,
+                self.y_scale * np.sqrt(np.maximum(variance, 0.0)))
+
+
+@dataclass
+class MetricPrediction:
+    mean: float
+    std: float  # of the mean over seeds (relative for log metrics)
+    relative: bool = False
+    extrapolated: bool = False  # outside the parameter range of the training data
+
+    def half_width(self) -> float:
+        return CONFIDENCE_Z * self.std
+
+    def interval(self) -> Tuple[float, float]:
+        if self.relative:
+            return self.mean * math.exp(-self.half_width()), self.mean * math.exp(self.half_width())
+        return self.mean - self.half_width(), self.mean + self.half_width()
+
+
+@dataclass
+class Prediction:
+    """Surrogate prediction for one configuration"""
+    config: Dict
+    metrics: Dict[str, MetricPrediction]
+
+    def uncertainty(self, tolerances: Dict[str, float] = DEFAULT_TOLERANCES) -> float:
+        """Largest 95% half-width / tolerance ratio; <= 1 is confident, inf without a model"""
+        ratios = [self.metrics[m].half_width() / tol if m in self.metrics else math.inf
+                  for m, tol in tolerances.items()]
+        return max(ratios, default=math.inf)
+
+    @property
+    def extrapolated(self) -> bool:
+        return any(metric.extrapolated for metric in self.metrics.values())
+
+    def confident(self, tolerances: Dict[str, float] = DEFAULT_TOLERANCES) -> bool:
+        """Within every tolerance, and not extrapolated (a narrow interval there only reflects the kernel)"""
+        return not self.extrapolated and self.uncertainty(tolerances) <= 1.0
+
+    def record(self) -> Dict:
+        """Result row of the prediction (create_config params, metric means and intervals)"""
+        row = dict(self.config)
+        for name, metric in self.metrics.items():
+            low, high = metric.interval()
+            row.update({name: round(metric.mean, 4), f"{name}_low": round(low, 4), f"{name}_high": round(high, 4)})
+        return row
+
+
+class Surrogate:
+    """Per-group, per-metric Gaussian processes over stored result rows; fitted lazily"""
+
+    def __init__(self, metrics: Sequence[str] = SURROGATE_METRICS):
+        self.metrics = tuple(metrics)
+        # model_group -> (x, metric values)
+        self.rows: Dict[Tuple[str, ...], List[Tuple[List[float], Dict[str, float]]]] = {}
+        self._models: Dict[Tuple[Tuple[str, ...], str], Optional[GaussianProcess]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    # --- Training data ---
+
+    def add(self, record: Dict) -> bool:
+        """Add a result row; False if it is not a successful simulated run"""
+        recorded = recorded_metrics(record) if is_training_row(record) else None
+        if not recorded:
+            return False
+        values = {m: _metric_value(record.get(m)) for m in self.metrics if m in recorded}
+        values = {m: v for m, v in values.items() if v is not None and (m not in LOG_METRICS or v > 0)}
+        if not values:
+            return False
+        group = model_group(record)
+        self.rows.setdefault(group, []).append((feature_vector(record), values))
+        self._models = {key: model for key, model in self._models.items() if key[0] != group}
+        return True
+
+    def load(self, path: str) -> int:
+        """Add rows of a result file (JSON lines / CSV) or a service result cache; returns count"""
+        if not os.path.exists(path):
+            return 0
+        added = 0
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                import csv
+                records = csv.DictReader(f)
+            else:
+                records = (json.loads(line) for line in f if line.strip())
+            for record in records:
+                if "key" in record and "result" in record:  # service_cache.jsonl entry
+                    if not record.get("params"):
+                        continue
+                    record = dict(record["params"], **record["result"], success=True)
+                if self.add(record):
+                    added += 1
+        return added
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], metrics: Sequence[str] = SURROGATE_METRICS) -> "Surrogate":
+        surrogate = cls(metrics)
+        for path in paths:
+            surrogate.load(path)
+        return surrogate
+
+    # --- Model ---
+
+    def model(self, group: Tuple[str, ...], metric: str) -> Optional[GaussianProcess]:
+        """Model of a model_group; None with fewer than MIN_POINTS configurations"""
+        key = (tuple(group), metric)
+        if key not in self._models:
+            self._models[key] = self._train(*key)
+        return self._models[key]
+
+    def _train(self, group: Tuple[str, ...], metric: str) -> Optional[GaussianProcess]:
+        rows = [(x, values[metric]) for x, values in self.rows.get(group, ()) if metric in values]
+        if not rows:
+            return None
+        x = np.array([r[0] for r in rows])
+        y = np.array([r[1] for r in rows])
+        if metric in LOG_METRICS:
+            y = np.log(y)
+        # Seeds of one configuration -> one point with its replicate count
+        unique, inverse = np.unique(np.round(x, 9), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        counts = np.bincount(inverse).astype(float)
+        if len(unique) < MIN_POINTS:
+            return None
+        means = np.bincount(inverse, weights=y) / counts
+        return GaussianProcess(unique, means, counts)
+
+    def predict_many(self, configs: Sequence[Dict]) -> List[Prediction]:
+        """Predictions for many configurations (one batched evaluation per model group and metric)"""
+        predictions = [Prediction(dict(config), {}) for config in configs]
+        by_group: Dict[Tuple[str, ...], List[int]] = {}
+        for i, config in enumerate(configs):
+            by_group.setdefault(model_group(config), []).append(i)
+        for group, indices in by_group.items():
+            x = np.array([feature_vector(configs[i]) for i in indices])
+            for metric in self.metrics:
+                model = self.model(group, metric)
+                if model is None:
+                    continue
+                mean, std = model.predict(x)
+                outside = model.outside(x)
+                log = metric in LOG_METRICS
+                if log:
+                    mean = np.exp(mean)
+                elif metric == "pdr":
+                    mean = np.clip(mean, 0.0, 100.0)
+                for i, mu, sigma, out in zip(indices, mean, std, outside):
+                    predictions[i].metrics[metric] = MetricPrediction(float(mu), float(sigma), log, bool(out))
+        return predictions
+
+    def predict(self, config: Dict) -> Prediction:
+        return self.predict_many([config])[0]
+
+    def split(self, configs: Sequence[Dict], tolerances: Dict[str, float] = DEFAULT_TOLERANCES
+              ) -> Tuple[List[Dict], List[Dict], List[Prediction]]:
+        """(configs to simulate, result rows of confidently predicted configs, predictions of the rest)"""
+        to_run, predicted, uncertain = [], [], []
+        for config, prediction in zip(configs, self.predict_many(configs)):
+            if prediction.confident(tolerances):
+                predicted.append(dict(prediction.record(), success=True, failure='', error='', attempts=0,
+                                      stop_reason=STOP_PREDICTED))
+            else:
+                to_run.append(config)
+                uncertain.append(prediction)
+        return to_run, predicted, uncertain
+
+    def rank(self, configs: Sequence[Dict], tolerances: Dict[str, float] = DEFAULT_TOLERANCES) -> List[Prediction]:
+        """Predictions, most uncertain first: the points to simulate next"""
+        predictions = self.predict_many(configs)
+        return sorted(predictions, key=lambda p: -p.uncertainty(tolerances))
+
+
+def format_prediction(prediction: Prediction, tolerances: Dict[str, float] = DEFAULT_TOLERANCES) -> str:
+    config = prediction.config
+    point = ", ".join(f"{k}={v}" for k, v in config.items() if k not in ("protocol", "seed"))
+    if not prediction.metrics:
+        return f"{config.get('protocol')} {point}: no model (no results with this protocol and these fixed parameters)"
+    parts = []
+    for name, metric in prediction.metrics.items():
+        low, high = metric.interval()
+        parts.append(f"{name}={metric.mean:.2f} [{low:.2f}, {high:.2f}]")
+    note = ", extrapolated" if prediction.extrapolated else ""
+    return (f"{config.get('protocol')} {point}: {', '.join(parts)} "
+            f"(uncertainty {prediction.uncertainty(tolerances):.1f}x{note})")
@@ -0,0 +1,150 @@
+"""
+Common random numbers (CRN) and paired protocol comparison
+
+With create_config(common_random_numbers=True) mobility, traffic and
+everything else (routing jitter, MAC backoff) draw from separate OMNeT++ RNG
+streams, so for the same seed every protocol sees identical node movement
+and traffic - the protocol's own random draws no longer shift the mobility
+stream. Results of the same seed can then be compared as paired
+differences, whose variance is much smaller than that of two independent
+samples when the protocols respond similarly to a scenario.
+
+Antithetic runs (create_config(antithetic=True)) mirror the ini-level random
+draws (initial positions, speeds) of their seed; a seed's normal and
+antithetic run are averaged into one observation. Random choices made inside
+the INET models (e.g. RandomWPMobility waypoints) are not mirrored.
+"""
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+from metrics import RunningStats
+
+
+def t_quantile(confidence: float, dof: int) -> float:
+    """Two-sided Student-t critical value (Cornish-Fisher expansion, stdlib only)"""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    if dof <= 0:
+        return float('inf')
+    g1 = (z ** 3 + z) / 4.0
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96.0
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384.0
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160.0
+    return z + g1 / dof + g2 / dof ** 2 + g3 / dof ** 3 + g4 / dof ** 4
+
+
+class PairedResults:
+    """Metric values per protocol and seed (a seed's antithetic run is stored under the same seed)"""
+
+    def __init__(self):
+        self.values: Dict[str, Dict[int, List[float]]] = {}
+
+    def add(self, protocol: str, seed: int, value: float):
+        self.values.setdefault(protocol, {}).setdefault(seed, []).append(float(value))
+
+    def protocols(self) -> List[str]:
+        return list(self.values)
+
+    def observations(self, protocol: str) -> Dict[int, float]:
+        """One observation per seed (normal and antithetic run averaged)"""
+        return {seed: sum(v) / len(v) for seed, v in self.values.get(protocol, {}).items()}
+
+    def mean(self, protocol: str) -> float:
+        obs = list(self.observations(protocol).values())
+        return sum(obs) / len(obs) if obs else 0.0
+
+    def clear(self):
+        self.values = {}
+
+
+@dataclass
+class PairedComparison:
+    """Paired difference a - b over the seeds both protocols completed"""
+    protocol_a: str
+    protocol_b: str
+    pairs: int
+    runs_per_protocol: int
+    mean_difference: float
+    stdev_difference: float
+    half_width: float  # confidence interval half-width of the mean difference
+    correlation: float
+    independent_runs_needed: float  # per protocol, for the same half-width without pairing
+
+    @property
+    def significant(self) -> bool:
+        return abs(self.mean_difference) > self.half_width
+
+    @property
+    def runs_saved(self) -> float:
+        return max(0.0, self.independent_runs_needed - self.runs_per_protocol)
+
+    @property
+    def variance_reduction(self) -> float:
+        """runs needed independently / runs used (>1 means pairing helped)"""
+        return self.independent_runs_needed / self.runs_per_protocol if self.runs_per_protocol else 0.0
+
+
+def paired_comparison(results: PairedResults, protocol_a: str, protocol_b: str,
+                      confidence: float = 0.95) -> Optional[PairedComparison]:
+    """Compare two protocols on their common seeds; None with fewer than 2 pairs"""
+    obs_a = results.observations(protocol_a)
+    obs_b = results.observations(protocol_b)
+    seeds = sorted(obs_a.keys() & obs_b.keys())
+    if len(seeds) < 2:
+        return None
+
+    diffs, stats_a, stats_b = RunningStats(), RunningStats(), RunningStats()
+    for seed in seeds:
+        diffs.add(obs_a[seed] - obs_b[seed])
+        stats_a.add(obs_a[seed])
+        stats_b.add(obs_b[seed])
+    n = len(seeds)
+    half_width = t_quantile(confidence, n - 1) * diffs.stdev / math.sqrt(n)
+
+    covariance = (stats_a.variance + stats_b.variance - diffs.variance) / 2.0
+    denominator = stats_a.stdev * stats_b.stdev
+    correlation = covariance / denominator if denominator > 0 else 0.0
+
+    # Independent sampling: Var(mean_a - mean_b) = (s_a^2 + s_b^2) / m with m single runs each
+    runs_per_seed = max(len(results.values[protocol_a][s]) for s in seeds)
+    single_a = _run_variance(results, protocol_a, seeds)
+    single_b = _run_variance(results, protocol_b, seeds)
+    if diffs.variance > 0:
+        independent = n * (single_a + single_b) / diffs.variance
+    else:
+        independent = float('inf') if single_a + single_b > 0 else float(n * runs_per_seed)
+
+    return PairedComparison(protocol_a, protocol_b, n, n * runs_per_seed,
+                            diffs.mean, diffs.stdev, half_width, correlation, independent)
+
+
+def _run_variance(results: PairedResults, protocol: str, seeds) -> float:
+    stats = RunningStats()
+    for seed in seeds:
+        for value in results.values[protocol][seed]:
+            stats.add(value)
+    return stats.variance
+
+
+def rank_paired(results: PairedResults, confidence: float = 0.95) -> Tuple[List[str], List[PairedComparison]]:
+    """Protocols by mean (descending) and the paired comparison of each adjacent pair"""
+    ranking = sorted(results.protocols(), key=results.mean, reverse=True)
+    comparisons = []
+    for a, b in zip(ranking, ranking[1:]):
+        comparison = paired_comparison(results, a, b, confidence)
+        if comparison is not None:
+            comparisons.append(comparison)
+    return ranking, comparisons
+
+
+def format_comparison(c: PairedComparison) -> str:
+    verdict = "significant" if c.significant else "not significant"
+    if math.isinf(c.independent_runs_needed):
+        savings = "unpaired sampling could not reach this precision"
+    else:
+        savings = (f"{c.independent_runs_needed:.0f} unpaired runs/protocol for the same CI, "
+                   f"{c.runs_saved:.0f} saved")
+    return (f"{c.protocol_a} - {c.protocol_b}: {c.mean_difference:+.2f} ± {c.half_width:.2f} "
+            f"({verdict}, n={c.pairs}, r={c.correlation:.2f}; "
+            f"{c.runs_per_protocol} runs/protocol, {savings})")
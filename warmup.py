@@ -0,0 +1,307 @@
+"""
+Warm-up detection and run-length recommendation
+
+A pilot run records the application-layer vectors (udpApp sentPk, rcvdPk,
+endToEndDelay); their time series are binned and the end of the initial
+transient (route establishment after the UDP start time) is found with
+MSER-5: observations are grouped into batches of 5 and the truncation point
+d minimising
+
+    MSER(d) = sum_{j>d} (Z_j - mean(Z_{d+1..n}))^2 / (n - d)^2
+
+over d <= n/2 is taken. Production runs then set OMNeT++'s warmup-period
+to that point (statistics recorded before it are discarded), and the
+steady-state batch means of the pilot give the shortest sim-time-limit whose
+PDR / delay estimate reaches the requested precision.
+
+    result = run_pilot(manager, config, pilot_time="300s")
+    config = result.apply(config, sim_time=True)
+
+Stdlib only.
+"""
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from runtime_model import parse_quantity
+from variance_reduction import t_quantile
+
+MSER_BATCH = 5
+MIN_MSER_BATCHES = 10  # fewer batches: series too short to judge
+BIN_WIDTH = 1.0  # seconds per PDR bin
+BATCH_WIDTH = 10.0  # seconds per batch mean for the run-length recommendation
+MIN_STEADY_BATCHES = 5
+PDR_TOLERANCE = 2.0  # CI half-width, percentage points
+DELAY_TOLERANCE = 0.10  # CI half-width relative to the mean delay
+ROUND_SIM_TIME = 10.0  # recommended sim-time-limit is rounded up to this
+DEFAULT_PILOT_TIME = "300s"
+
+SENT_VECTORS = ("sentPk:vector", "packetSent:vector")
+RECEIVED_VECTORS = ("rcvdPk:vector", "packetReceived:vector")
+DELAY_VECTORS = ("endToEndDelay:vector",)
+
+
+# --- .vec files ---
+
+class VectorTail:
+    """
+    Incremental reader of an OMNeT++ 5 text vector file (declaration lines,
+    then "<id> [event] <time> <value>" data lines). poll() returns the samples
+    of complete lines written since the previous poll, for every vector whose
+    name starts with one of prefixes, merged over modules and keyed by prefix.
+    A file that shrank or was replaced (new run) is read from the start.
+    """
+
+    def __init__(self, path: str, prefixes: Sequence[str]):
+        self.path = path
+        self.prefixes = tuple(prefixes)
+        self._offset = 0
+        self._inode = None
+        self._wanted: Dict[int, Tuple[str, int]] = {}  # vector id -> (prefix, time column)
+
+    def poll(self) -> Dict[str, List[Tuple[float, float]]]:
+        samples: Dict[str, List[Tuple[float, float]]] = {p: [] for p in self.prefixes}
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return samples
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._inode, self._offset, self._wanted = stat.st_ino, 0, {}
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1  # leave a partially written line for the next poll
+        self._offset += end
+        for line in chunk[:end].decode("utf-8", errors="ignore").splitlines():
+            if not line or not line[0].isdigit():
+                if line.startswith("vector "):
+                    self._declare(line.split())
+                continue
+            parts = line.split()
+            try:
+                vector = self._wanted.get(int(parts[0]))
+                if vector is not None:
+                    prefix, column = vector
+                    samples[prefix].append((float(parts[column]), float(parts[column + 1])))
+            except (IndexError, ValueError):
+                continue
+        return samples
+
+    def _declare(self, parts: List[str]):
+        if len(parts) < 4:
+            return
+        prefix = next((p for p in self.prefixes if parts[3].startswith(p)), None)
+        if prefix is not None:
+            columns = parts[4] if len(parts) > 4 else "TV"
+            self._wanted[int(parts[1])] = (prefix, 2 if columns.startswith("E") else 1)
+
+
+def read_vectors(path: str, prefixes: Sequence[str]) -> Dict[str, List[Tuple[float, float]]]:
+    """All (time, value) samples of a finished .vec file, per prefix, sorted by time"""
+    samples = VectorTail(path, prefixes).poll()
+    for values in samples.values():
+        values.sort()
+    return samples
+
+
+def latest_vector_file(results_dir: str, since: float = 0.0) -> Optional[str]:
+    files = [p for p in Path(results_dir).glob("*.vec") if p.stat().st_mtime >= since]
+    return str(max(files, key=os.path.getmtime)) if files else None
+
+
+@dataclass
+class TrafficSeries:
+    """Per-bin sent/received counts and per-packet delays of one or more pilot runs"""
+    bin_width: float = BIN_WIDTH
+    sent: List[int] = field(default_factory=list)
+    received: List[int] = field(default_factory=list)
+    delays: List[Tuple[float, float]] = field(default_factory=list)  # (time, seconds)
+
+    def _count(self, counts: List[int], times: Iterable[float]):
+        for t in times:
+            index = int(t // self.bin_width)
+            if index >= len(counts):
+                counts.extend([0] * (index + 1 - len(counts)))
+            counts[index] += 1
+
+    def add_vectors(self, vectors: Dict[str, List[Tuple[float, float]]]):
+        for prefix in SENT_VECTORS:
+            self._count(self.sent, (t for t, _ in vectors.get(prefix, ())))
+        for prefix in RECEIVED_VECTORS:
+            self._count(self.received, (t for t, _ in vectors.get(prefix, ())))
+        for prefix in DELAY_VECTORS:
+            self.delays.extend(vectors.get(prefix, ()))
+        self.delays.sort()
+
+    def pdr_bins(self) -> List[Tuple[float, float]]:
+        """(bin start time, PDR %) for every bin in which packets were sent"""
+        bins = []
+        for index, sent in enumerate(self.sent):
+            if sent:
+                received = self.received[index] if index < len(self.received) else 0
+                bins.append((index * self.bin_width, 100.0 * min(received, sent) / sent))
+        return bins
+
+
+# --- MSER-5 ---
+
+def mser_truncation(values: Sequence[float], batch_size: int = MSER_BATCH) -> Optional[int]:
+    """Observations to discard (multiple of batch_size); None if the series is too short"""
+    n = len(values) // batch_size
+    if n < MIN_MSER_BATCHES:
+        return None
+    batches = [sum(values[i * batch_size:(i + 1) * batch_size]) / batch_size for i in range(n)]
+    # Suffix sums give every candidate's squared deviation in O(1)
+    best, best_d = math.inf, 0
+    s1 = s2 = 0.0
+    suffix = []
+    for z in reversed(batches):
+        s1 += z
+        s2 += z * z
+        suffix.append((s1, s2))
+    suffix.reverse()
+    for d in range(n // 2 + 1):
+        m = n - d
+        total, squares = suffix[d]
+        statistic = (squares - total * total / m) / (m * m)
+        if statistic < best - 1e-15:
+            best, best_d = statistic, d
+    return best_d * batch_size
+
+
+@dataclass
+class WarmupResult:
+    warmup_period: float  # seconds, for warmup-period
+    recommended_sim_time: float  # seconds, shortest sim-time-limit with stable metrics
+    pilot_time: float
+    pdr_truncation: Optional[float]  # transient end per metric (None: too little data)
+    delay_truncation: Optional[float]
+    steady_pdr: float
+    steady_delay_ms: Optional[float]
+    converged: bool  # transient ended within the first half of the pilot
+    pilot_runs: int = 1
+
+    def apply(self, config: Dict, sim_time: bool = False) -> Dict:
+        """create_config kwargs with warmup_period set (and sim_time_limit if sim_time)"""
+        config = dict(config, warmup_period=self.warmup_period)
+        if sim_time:
+            config['sim_time_limit'] = f"{self.recommended_sim_time:g}s"
+        return config
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+def batch_means(bins: List[Tuple[float, float]], start: float, width: float) -> List[float]:
+    """Means of consecutive width-second batches of (time, value) samples from start on"""
+    groups: Dict[int, List[float]] = {}
+    for t, value in bins:
+        if t >= start:
+            groups.setdefault(int((t - start) // width), []).append(value)
+    # Last batch is usually incomplete
+    return [sum(v) / len(v) for k, v in sorted(groups.items())][:-1] if len(groups) > 1 else []
+
+
+def batch_stdev(batches: Sequence[float]) -> float:
+    mean = sum(batches) / len(batches)
+    return math.sqrt(sum((b - mean) ** 2 for b in batches) / (len(batches) - 1))
+
+
+def batch_half_width(batches: Sequence[float], confidence: float = 0.95) -> float:
+    """Confidence-interval half-width of the mean of batch means (inf with < 2 batches)"""
+    if len(batches) < 2:
+        return math.inf
+    return t_quantile(confidence, len(batches) - 1) * batch_stdev(batches) / math.sqrt(len(batches))
+
+
+def _required_length(batches: List[float], half_width: float, batch_width: float,
+                     confidence: float) -> float:
+    """Steady-state seconds for the batch-mean CI half-width to reach half_width"""
+    if len(batches) < 2 or half_width <= 0:
+        return MIN_STEADY_BATCHES * batch_width
+    needed = math.ceil((t_quantile(confidence, len(batches) - 1) * batch_stdev(batches) / half_width) ** 2)
+    return max(MIN_STEADY_BATCHES, needed) * batch_width
+
+
+def detect_warmup(series: TrafficSeries, pilot_time: float, batch_width: float = BATCH_WIDTH,
+                  pdr_tolerance: float = PDR_TOLERANCE, delay_tolerance: float = DELAY_TOLERANCE,
+                  confidence: float = 0.95, pilot_runs: int = 1) -> WarmupResult:
+    """MSER-5 on the binned PDR and per-packet delay series, then the run-length rule"""
+    pdr_bins = series.pdr_bins()
+    if not pdr_bins:
+        raise ValueError("Pilot run recorded no sent packets (vector recording missing?)")
+
+    cut = mser_truncation([v for _, v in pdr_bins])
+    pdr_truncation = pdr_bins[cut][0] if cut is not None else None
+    delay_values = [v for _, v in series.delays]
+    cut = mser_truncation(delay_values)
+    delay_truncation = series.delays[cut][0] if cut is not None else None
+
+    known = [t for t in (pdr_truncation, delay_truncation) if t is not None]
+    # The transient cannot end before traffic starts
+    warmup = float(math.ceil(max(known + [pdr_bins[0][0]])))
+    converged = bool(known) and warmup < pilot_time / 2.0
+
+    pdr_batches = batch_means(pdr_bins, warmup, batch_width)
+    steady_pdr = sum(pdr_batches) / len(pdr_batches) if pdr_batches else pdr_bins[-1][1]
+    length = _required_length(pdr_batches, pdr_tolerance, batch_width, confidence)
+
+    steady_delay = None
+    delay_batches = batch_means([(t, v * 1000.0) for t, v in series.delays], warmup, batch_width)
+    if delay_batches:
+        steady_delay = sum(delay_batches) / len(delay_batches)
+        length = max(length, _required_length(delay_batches, delay_tolerance * steady_delay,
+                                              batch_width, confidence))
+
+    recommended = math.ceil((warmup + length) / ROUND_SIM_TIME) * ROUND_SIM_TIME
+    return WarmupResult(warmup, float(recommended), pilot_time, pdr_truncation, delay_truncation,
+                        round(steady_pdr, 2), round(steady_delay, 3) if steady_delay is not None else None,
+                        converged, pilot_runs)
+
+
+def run_pilot(manager, config: Dict, pilot_time: str = DEFAULT_PILOT_TIME, seeds: Iterable[int] = (0,),
+              bin_width: float = BIN_WIDTH, **detect_options) -> WarmupResult:
+    """
+    Pilot run(s) of config (create_config kwargs) with application vectors
+    recorded, one per seed; the binned series of all seeds are pooled before
+    detection. Use a dedicated manager (e.g. manager.worker_copy("pilot"))
+    when a job queue is running on the same one.
+    """
+    series = TrafficSeries(bin_width)
+    seeds = list(seeds)
+    for seed in seeds:
+        started = time.time()
+        manager.create_config(**dict(config, seed=seed, sim_time_limit=pilot_time,
+                                     warmup_period=None, record_vectors=True))
+        run = manager.current_run  # not recorder.last(): worker copies share the recorder
+        if not manager.run_simulation():
+            raise RuntimeError(f"Pilot run failed ({run.failure if run else 'unknown'})")
+        manager.parse_results()
+        # A parallel (PDES) pilot writes one .vec file per partition
+        vec_files = [latest_vector_file(result_dir, since=started - 1.0) for result_dir in manager.result_dirs()]
+        if not any(vec_files):
+            raise RuntimeError("Pilot run wrote no .vec file")
+        for vec_file in filter(None, vec_files):
+            series.add_vectors(read_vectors(vec_file, SENT_VECTORS + RECEIVED_VECTORS + DELAY_VECTORS))
+    return detect_warmup(series, parse_quantity(pilot_time, 300.0), pilot_runs=len(seeds), **detect_options)
+
+
+def format_warmup(result: WarmupResult) -> str:
+    def fmt(value):
+        return f"{value:g}s" if value is not None else "n/a"
+
+    lines = [
+        f"Warm-up period: {result.warmup_period:g}s "
+        f"(PDR transient ends at {fmt(result.pdr_truncation)}, delay at {fmt(result.delay_truncation)})",
+        f"Recommended sim-time-limit: {result.recommended_sim_time:g}s "
+        f"(pilot {result.pilot_time:g}s x{result.pilot_runs})",
+        f"Steady state: PDR {result.steady_pdr:.2f}%"
+        + (f", delay {result.steady_delay_ms:.2f} ms" if result.steady_delay_ms is not None else ""),
+    ]
+    if not result.converged:
+        lines.append("WARNING: no clear end of the transient within the first half of the pilot; "
+                     "rerun with a longer pilot_time")
+    return "\n".join(lines)